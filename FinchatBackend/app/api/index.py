@@ -1,11 +1,80 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import APIRouter, FastAPI
+from app.config.settings import settings
 from app.api.v1.routes.health import health_router
 from app.api.v1.routes.comprobantes import comprobantes_router
 from app.api.v1.routes.auth import auth_router
+from app.api.v1.routes.trabajos import trabajos_router
 from app.api.v1.middlewares.auth_middleware import AuthMiddleware
+from app.features.agents.registro_agentes import limpiar_agentes
+from app.features.trabajos import WorkerIngesta
+from app.libs.models.model_selector import precalentar_ollama
+from app.libs.ocr.lote_ocr import detener_ocr_lote_worker, get_ocr_lote_worker
+from app.libs.ocr.pdf_extractor import detener_executor_pdf
+from app.libs.ocr.pool_ocr import detener_ocr_pool, get_ocr_pool
+from app.libs.sunat_scraper.browser_pool import detener_browser_pool, iniciar_browser_pool
+from app.utils.ejecutores import detener_ejecutores
+from app.utils.monitor_loop import detener_monitor_loop, iniciar_monitor_loop
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # reporta en /metricas cuánto tiempo queda bloqueado el loop
+    if settings.loop_monitor_habilitado:
+        iniciar_monitor_loop()
+
+    # navegador persistente para el scraper SUNAT
+    if settings.sunat_pool_habilitado:
+        try:
+            await iniciar_browser_pool()
+        except Exception as e:
+            # sin pool el scraper lanza un navegador por consulta
+            logger.error(f"No se pudo iniciar el pool de navegador SUNAT: {e}")
+
+    # PaddleOCR por lotes: el hilo carga el modelo antes del primer request
+    if settings.ocr_modo == "lote":
+        get_ocr_lote_worker()
+    elif settings.ocr_modo == "procesos":
+        try:
+            await asyncio.to_thread(get_ocr_pool().iniciar)
+        except Exception as e:
+            # los procesos se vuelven a crear en el primer OCR
+            logger.error(f"No se pudo precalentar el pool de OCR: {e}")
+
+    # carga el modelo en Ollama en segundo plano: la API arranca sin esperarlo
+    # y la primera petición encuentra el modelo residente (keep_alive)
+    precalentamiento = (
+        asyncio.create_task(asyncio.to_thread(precalentar_ollama))
+        if settings.ollama_precalentar else None
+    )
+
+    # worker de ingesta asíncrona dentro del proceso de la API (opcional)
+    worker = WorkerIngesta() if settings.trabajos_worker_en_proceso else None
+    if worker:
+        await worker.iniciar()
+
+    yield
+
+    if worker:
+        await worker.detener()
+    if precalentamiento and not precalentamiento.done():
+        precalentamiento.cancel()
+    limpiar_agentes()
+    detener_ocr_lote_worker()
+    detener_ocr_pool()
+    detener_executor_pdf()
+    detener_ejecutores()
+    await detener_browser_pool()
+    await detener_monitor_loop()
+
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Finchat Backend API", version="1.0.0")
+    app = FastAPI(title="Finchat Backend API", version="1.0.0", lifespan=lifespan)
     app.add_middleware(
         AuthMiddleware,
         public_paths=["/api/v1/auth", "/api/v1/health", "/docs", "/openapi.json"],
@@ -16,6 +85,7 @@ def create_app() -> FastAPI:
     internal_router.include_router(health_router)
     internal_router.include_router(auth_router, tags=["Auth"])
     internal_router.include_router(comprobantes_router, tags=["Comprobantes"])
+    internal_router.include_router(trabajos_router, tags=["Trabajos"])
 
     # agregamos a la App
     app.include_router(internal_router)
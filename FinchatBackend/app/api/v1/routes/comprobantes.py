@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
 from app.db.sesion import get_db
@@ -13,81 +14,114 @@ from app.api.v1.schemas.comprobantes import (
     SubirComprobantesResponse,
 )
 from app.api.v1.schemas.consultas import ConsultaRequest, ConsultaResponse
-from app.features.agents.pipeline_ingesta import IngestaWorkflow
+from app.api.v1.schemas.trabajos import EncolarComprobantesResponse
+from app.features.agents.ingesta_concurrente import procesar_archivos
 from app.features.agents.agente_consulta import AgenteConsulta
+from app.features.trabajos import ColaIngesta
+from app.utils.ejecutores import ejecutar_en
 
 comprobantes_router = APIRouter()
 
+def _encolar(db: Session, usuario_id: int, entradas: List[Dict]) -> List[Dict]:
+    trabajos = ColaIngesta(db).encolar(usuario_id, entradas)
+    # los atributos expiran con el commit: se leen aquí, en el mismo hilo del pool
+    return [
+        {
+            "idTrabajo": trabajo.id_trabajo,
+            "nombreArchivo": trabajo.nombre_archivo or "",
+            "estado": trabajo.estado,
+        }
+        for trabajo in trabajos
+    ]
+
+def _formatear_procesado(nombre_archivo: str, resultado: Dict) -> Dict:
+    procesado = {
+        "nombreArchivo": nombre_archivo,
+        "hashArchivo": resultado.get("hash_archivo"),
+        "esDuplicado": resultado.get("duplicado", False),
+        "idComprobante": resultado.get("comprobante_id"),
+        "error": resultado.get("error"),
+    }
+
+    # Agregar campos parseados si existen
+    if resultado.get("campos_parseados"):
+        campos = resultado["campos_parseados"]
+        procesado["camposClave"] = {
+            "ruc_emisor": campos.get("ruc_emisor"),
+            "serie_numero": f"{campos.get('serie')}-{campos.get('numero')}",
+            "fecha_emision": campos.get("fecha_emision"),
+            "moneda": campos.get("moneda"),
+            "monto_total": campos.get("monto_total"),
+            "tipo_comprobante": campos.get("tipo_comprobante"),
+        }
+
+    # Agregar validación SUNAT si existe
+    if resultado.get("validacion_sunat"):
+        val = resultado["validacion_sunat"]
+        procesado["validacionSunat"] = {
+            "ruc": resultado.get("campos_parseados", {}).get("ruc_emisor"),
+            "estadoRuc": val.get("estado_ruc"),
+            "condicionRuc": val.get("condicion_ruc"),
+            "ciiuPrincipal": val.get("ciiu"),
+            "pasaReglasBasicas": val.get("pasa_reglas"),
+            "motivoNoDeducible": None,
+        }
+
+    # Agregar clasificación si existe
+    if resultado.get("clasificacion"):
+        clas = resultado["clasificacion"]
+        procesado["clasificacion"] = {
+            "categoriaGasto": clas.get("categoria_gasto"),
+            "porcentajeDeduccion": clas.get("porcentaje_deduccion"),
+            "versionRegla": clas.get("version_regla") or "v1.0",
+        }
+
+    return procesado
+
+
 @comprobantes_router.post(
-    "/comprobantes/subir", response_model=SubirComprobantesResponse
+    "/comprobantes/subir",
+    response_model=SubirComprobantesResponse,
+    responses={202: {"model": EncolarComprobantesResponse}},
 )
 async def subir_comprobantes(
     archivos: List[UploadFile] = File(...),
     request: Request = None,
+    asincrono: bool = Query(False, alias="async"),
     db: Session = Depends(get_db),
 ):
     usuarioId = request.state.user.get("sub") if hasattr(request.state, "user") else None
     if usuarioId is None:
         raise HTTPException(status_code=401, detail="Token sin usuario")
 
-    pipeline = IngestaWorkflow(db)
-
-    procesados = []
+    entradas = []
     for archivo in archivos:
         contenido = await archivo.read()
-
-        # Procesar con pipeline de 5 agentes
-        resultado = await pipeline.run(
-            input_data={
-                "usuario_id": usuarioId,
-                "nombre_archivo": archivo.filename or "",
-                "mime_type": archivo.content_type or "application/pdf",
-                "contenido": contenido,
-            }
+        entradas.append({
+            "usuario_id": usuarioId,
+            "nombre_archivo": archivo.filename or "",
+            "mime_type": archivo.content_type or "application/pdf",
+            "contenido": contenido,
+        })
+
+    # Modo asíncrono: encolar en estado_trabajo y responder 202 de inmediato
+    if asincrono:
+        # escribe los archivos y hace commit: fuera del event loop
+        trabajos = await ejecutar_en("bd", _encolar, db, usuarioId, entradas)
+        respuesta = EncolarComprobantesResponse(
+            usuarioId=usuarioId,
+            totalArchivos=len(archivos),
+            trabajos=trabajos,
         )
+        return JSONResponse(status_code=202, content=respuesta.model_dump(mode="json"))
 
-        # Formatear respuesta
-        procesado = {
-            "nombreArchivo": archivo.filename or "",
-            "hashArchivo": resultado.get("hash_archivo"),
-            "esDuplicado": resultado.get("duplicado", False),
-            "idComprobante": resultado.get("comprobante_id"),
-        }
+    # Procesar con pipeline de 5 agentes (un workflow y una sesión por archivo)
+    resultados = await procesar_archivos(entradas)
 
-        # Agregar campos parseados si existen
-        if resultado.get("campos_parseados"):
-            campos = resultado["campos_parseados"]
-            procesado["camposClave"] = {
-                "ruc_emisor": campos.get("ruc_emisor"),
-                "serie_numero": f"{campos.get('serie')}-{campos.get('numero')}",
-                "fecha_emision": campos.get("fecha_emision"),
-                "moneda": campos.get("moneda"),
-                "monto_total": campos.get("monto_total"),
-                "tipo_comprobante": campos.get("tipo_comprobante"),
-            }
-
-        # Agregar validación SUNAT si existe
-        if resultado.get("validacion_sunat"):
-            val = resultado["validacion_sunat"]
-            procesado["validacionSunat"] = {
-                "ruc": resultado.get("campos_parseados", {}).get("ruc_emisor"),
-                "estadoRuc": val.get("estado_ruc"),
-                "condicionRuc": val.get("condicion_ruc"),
-                "ciiuPrincipal": val.get("ciiu"),
-                "pasaReglasBasicas": val.get("pasa_reglas"),
-                "motivoNoDeducible": None,
-            }
-
-        # Agregar clasificación si existe
-        if resultado.get("clasificacion"):
-            clas = resultado["clasificacion"]
-            procesado["clasificacion"] = {
-                "categoriaGasto": clas.get("categoria_gasto"),
-                "porcentajeDeduccion": clas.get("porcentaje_deduccion"),
-                "versionRegla": "v1.0",
-            }
-
-        procesados.append(procesado)
+    procesados = [
+        _formatear_procesado(entrada["nombre_archivo"], resultado)
+        for entrada, resultado in zip(entradas, resultados)
+    ]
 
     return {
         "usuarioId": usuarioId,
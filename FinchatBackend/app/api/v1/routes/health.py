@@ -2,6 +2,20 @@ from fastapi import APIRouter
 from sqlalchemy import text
 
 from app.db.sesion import Session
+from app.features.agents.cache_ruc import get_ruc_cache
+from app.features.agents.motor_etapas import estadisticas_etapas
+from app.features.agents.perfil_emisor import get_cache_perfil_emisor
+from app.features.agents.pipeline_context import metricas_precarga
+from app.features.agents.registro_agentes import estadisticas_agentes
+from app.libs.models.cache_llm import get_cache_llm
+from app.libs.models.model_selector import estadisticas_ollama
+from app.libs.ocr.cache_ocr import get_cache_ocr
+from app.libs.ocr.lote_ocr import estadisticas_ocr_lote
+from app.libs.ocr.pool_ocr import estadisticas_ocr_pool
+from app.libs.sunat_scraper.browser_pool import get_browser_pool
+from app.libs.sunat_scraper.ruc_scraper import metricas_scraper
+from app.utils.ejecutores import estadisticas_ejecutores
+from app.utils.monitor_loop import estadisticas_monitor_loop
 
 health_router = APIRouter()
 
@@ -16,3 +30,25 @@ async def health_check():
     finally:
         session.close()
 
+# fuera de /health (ruta pública): expone detalles internos, requiere token
+@health_router.get("/metricas", tags=["Health"])
+async def metricas():
+    pool = get_browser_pool()
+    cache_ocr = get_cache_ocr()
+    cache_llm = get_cache_llm()
+    return {
+        "sunat_pool": pool.salud() if pool else {"activo": False},
+        "sunat_scraper": metricas_scraper.resumen(),
+        "sunat_precarga": metricas_precarga.resumen(),
+        "ruc_cache": get_ruc_cache().estadisticas(),
+        "perfil_emisor": get_cache_perfil_emisor().estadisticas(),
+        "ocr_cache": cache_ocr.estadisticas() if cache_ocr else {"activo": False},
+        "ocr_lote": estadisticas_ocr_lote(),
+        "ocr_pool": estadisticas_ocr_pool(),
+        "ollama": estadisticas_ollama(),
+        "llm_cache": cache_llm.estadisticas() if cache_llm else {"activo": False},
+        "agentes": estadisticas_agentes(),
+        "event_loop": estadisticas_monitor_loop(),
+        "ejecutores": estadisticas_ejecutores(),
+        "etapas_ingesta": estadisticas_etapas(),
+    }
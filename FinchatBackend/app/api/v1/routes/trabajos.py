@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+
+from app.api.v1.schemas.trabajos import EstadoTrabajoOut
+from app.db.sesion import get_db
+from app.features.trabajos import ColaIngesta
+
+trabajos_router = APIRouter()
+
+
+@trabajos_router.get("/trabajos/{id_trabajo}", response_model=EstadoTrabajoOut)
+def obtener_trabajo(
+    id_trabajo: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    usuarioId = request.state.user.get("sub") if hasattr(request.state, "user") else None
+    if usuarioId is None:
+        raise HTTPException(status_code=401, detail="Token sin usuario")
+
+    trabajo = ColaIngesta(db).obtener(id_trabajo)
+    if trabajo is None or trabajo.id_usuario != int(usuarioId):
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+
+    return {
+        "idTrabajo": trabajo.id_trabajo,
+        "tipoTrabajo": trabajo.tipo_trabajo,
+        "estado": trabajo.estado,
+        "intentos": trabajo.intentos,
+        "nombreArchivo": trabajo.nombre_archivo,
+        "idComprobante": trabajo.id_comprobante,
+        "codigoError": trabajo.codigo_error,
+        "mensaje": trabajo.mensaje,
+        "creadoEn": trabajo.creado_en,
+        "actualizadoEn": trabajo.actualizado_en,
+    }
@@ -38,6 +38,7 @@ class ArchivoProcesadoOut(BaseModel):
     camposClave: Optional[CamposClave] = None
     validacionSunat: Optional[ValidacionSunatOut] = None
     clasificacion: Optional[ClasificacionOut] = None
+    error: Optional[str] = None
 
 # main response schema para la subida de multiples comprobantes
 class SubirComprobantesResponse(BaseModel):
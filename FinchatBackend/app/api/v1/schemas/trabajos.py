@@ -0,0 +1,33 @@
+"""Schemas para la ingesta asíncrona basada en estado_trabajo."""
+
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class TrabajoEncoladoOut(BaseModel):
+    idTrabajo: UUID
+    nombreArchivo: str
+    estado: str
+
+
+# response 202 de /comprobantes/subir?async=true
+class EncolarComprobantesResponse(BaseModel):
+    usuarioId: int
+    totalArchivos: int
+    trabajos: List[TrabajoEncoladoOut]
+
+
+class EstadoTrabajoOut(BaseModel):
+    idTrabajo: UUID
+    tipoTrabajo: str
+    estado: str
+    intentos: int
+    nombreArchivo: Optional[str] = None
+    idComprobante: Optional[int] = None
+    codigoError: Optional[str] = None
+    mensaje: Optional[str] = None
+    creadoEn: Optional[datetime] = None
+    actualizadoEn: Optional[datetime] = None
@@ -6,6 +6,16 @@ class Settings(BaseSettings):
 
     ollama_host: str = "http://localhost:11434"
     ollama_model: str = "gpt-oss:20b"
+    # JSON schema de los modelos pydantic como `format` de Ollama (decodificación restringida)
+    ollama_salida_estructurada: bool = True
+    # tiempo que Ollama mantiene el modelo en memoria tras cada uso
+    ollama_keep_alive: str = "30m"
+    ollama_precalentar: bool = True
+    # cache en disco de respuestas del LLM (prompts deterministas: temperature 0 y semilla fija)
+    llm_cache_habilitado: bool = True
+    llm_cache_dir: str = "storage/llm_cache"
+    llm_cache_max_mb: float = 128.0
+    llm_cache_max_dias: float = 30.0
 
     device: str = "gpu"
 
@@ -13,6 +23,94 @@ class Settings(BaseSettings):
     jwt_secret: str = "dev-secret"
     jwt_expire_minutes: int = 60
 
+    # ingesta concurrente de varios archivos
+    ingesta_concurrencia_por_request: int = 4
+    ingesta_concurrencia_global: int = 8
+    # ingesta en tubería: workers por etapa y capacidad de la cola de cada una
+    etapa_validacion_workers: int = 2
+    etapa_ocr_workers: int = 1
+    etapa_duplicados_workers: int = 2
+    etapa_parseo_workers: int = 2
+    etapa_sunat_workers: int = 2
+    etapa_clasificacion_workers: int = 2
+    etapa_persistencia_workers: int = 2
+    etapa_capacidad_cola: int = 2
+    # duplicados por RUC/serie/número del texto OCR, antes del LLM y de SUNAT
+    duplicados_metadatos_habilitado: bool = True
+    # hilos para el trabajo bloqueante del pipeline (fuera del event loop)
+    ejecutor_ocr_hilos: int = 1
+    ejecutor_llm_hilos: int = 4
+    ejecutor_bd_hilos: int = 8
+    # monitor de retraso del event loop
+    loop_monitor_habilitado: bool = True
+    loop_monitor_intervalo_ms: float = 100.0
+    loop_monitor_umbral_ms: float = 250.0
+
+    # cola de trabajos de ingesta asíncrona (tabla estado_trabajo)
+    almacenamiento_dir: str = "storage/uploads"
+    trabajos_worker_en_proceso: bool = True
+    trabajos_workers: int = 2
+    trabajos_intervalo_sondeo: float = 2.0
+    trabajos_max_intentos: int = 3
+    trabajos_espera_reintento_seg: int = 30
+    trabajos_timeout_en_proceso_seg: int = 900
+    trabajos_intervalo_huerfanos_seg: float = 60.0
+    # un trabajo en curso renueva su actualizado_en cada tanto; debe ser
+    # bastante menor que trabajos_timeout_en_proceso_seg
+    trabajos_intervalo_latido_seg: float = 60.0
+
+    # pool persistente de Chromium para el scraper SUNAT
+    sunat_pool_habilitado: bool = True
+    sunat_pool_tamano: int = 3
+    sunat_pool_max_usos: int = 200
+    sunat_pool_intervalo_salud_seg: float = 30.0
+    sunat_headless: bool = True
+    sunat_timeout_resultado_ms: int = 15000
+
+    # cache compartido de RUC (memoria + tabla cache_ruc)
+    sunat_cache_ttl_horas: float = 24.0
+    sunat_cache_ttl_negativo_horas: float = 1.0
+    sunat_cache_max_memoria: int = 5000
+
+    # validación SUNAT: "reglas" | "hibrido" | "llm"
+    sunat_validacion_modo: str = "hibrido"
+    # consulta SUNAT especulativa de los RUC del OCR mientras el LLM parsea
+    sunat_precarga_habilitada: bool = True
+    sunat_precarga_max_candidatos: int = 2
+    sunat_umbral_coincide_nombre: float = 0.85
+    sunat_umbral_ambiguo_nombre: float = 0.6
+    # perfil de emisores ya validados: evita validador SUNAT y clasificador
+    perfil_emisor_habilitado: bool = True
+    perfil_emisor_vigencia_horas: float = 72.0
+    perfil_emisor_max_memoria: int = 5000
+
+    # clasificación de gastos
+    clasificacion_version_regla: str = "v1.0"
+    clasificacion_llm_no_mapeados: bool = True
+
+    # cache OCR en disco por hash del archivo
+    ocr_cache_habilitado: bool = True
+    ocr_cache_dir: str = "storage/ocr_cache"
+    ocr_cache_max_mb: float = 512.0
+
+    # ejecución de PaddleOCR: "inline" | "lote" | "procesos"
+    ocr_modo: str = "inline"
+    ocr_lote_max: int = 8
+    ocr_lote_espera_ms: float = 25.0
+    ocr_procesos: int = 2
+
+    # PDFs: páginas en paralelo por procesos y OCR de páginas escaneadas
+    pdf_paralelo_min_paginas: int = 8
+    pdf_procesos: int = 2
+    pdf_dpi_escaneo: int = 200
+    pdf_min_caracteres_texto: int = 10
+
+    # confianza mínima por campo para aceptar un parseo sin LLM
+    parseo_umbral_confianza: float = 0.85
+    # respuesta del LLM en streaming: se corta al cerrar el JSON o si deja de ser válido
+    parseo_llm_stream: bool = True
+    parseo_stream_max_caracteres: int = 12000
+
     class Config:
         env_file = ".env"
         extra = "allow"
@@ -7,6 +7,7 @@ from app.db.models.clasificacion_modelo import Clasificacion
 from app.db.models.ocr_pagina_modelo import OcrPagina
 from app.db.models.estado_trabajo_modelo import EstadoTrabajo
 from app.db.models.historial_chat_modelo import HistorialChat
+from app.db.models.cache_ruc_modelo import CacheRuc
 
 __all__ = [
     "Usuario",
@@ -18,4 +19,5 @@ __all__ = [
     "OcrPagina",
     "EstadoTrabajo",
     "HistorialChat",
+    "CacheRuc",
 ]
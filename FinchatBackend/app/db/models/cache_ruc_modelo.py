@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import CHAR, Boolean, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class CacheRuc(Base):
+    __tablename__ = "cache_ruc"
+
+    ruc: Mapped[str] = mapped_column(CHAR(11), primary_key=True)
+    encontrado: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    datos: Mapped[Optional[dict]] = mapped_column(JSONB)
+    consultado_en: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import List, Optional, TYPE_CHECKING
 
-from sqlalchemy import CHAR, String
+from sqlalchemy import CHAR, DateTime, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -20,6 +21,8 @@ class Emisor(Base):
     ciiu_principal: Mapped[Optional[str]] = mapped_column(String(10))
     estado_ruc: Mapped[Optional[str]] = mapped_column(String(30))
     condicion_ruc: Mapped[Optional[str]] = mapped_column(String(30))
+    # última validación contra SUNAT; NULL si los datos solo vienen del OCR
+    validado_en: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
 
     comprobantes: Mapped[List["Comprobante"]] = relationship(
         back_populates="emisor"
@@ -28,6 +28,9 @@ class EstadoTrabajo(Base):
     intentos: Mapped[int] = mapped_column(
         Integer, nullable=False, default=0, server_default="0")
     mensaje: Mapped[Optional[str]] = mapped_column(Text)
+    nombre_archivo: Mapped[Optional[str]] = mapped_column(String(255))
+    mime_type: Mapped[Optional[str]] = mapped_column(String(100))
+    ruta_archivo: Mapped[Optional[str]] = mapped_column(Text)
 
     creado_en: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -8,6 +8,8 @@ from app.db.repositories.usuario_repositorio import UsuarioRepositorio
 from app.db.repositories.validacion_repositorio import ValidacionRepositorio
 from app.db.repositories.clasificacion_repositorio import ClasificacionRepositorio
 from app.db.repositories.ocr_pagina_repositorio import OcrPaginaRepositorio
+from app.db.repositories.estado_trabajo_repositorio import EstadoTrabajoRepositorio
+from app.db.repositories.cache_ruc_repositorio import CacheRucRepositorio
 
 __all__ = [
     "BaseRepository",
@@ -18,4 +20,6 @@ __all__ = [
     "ValidacionRepositorio",
     "ClasificacionRepositorio",
     "OcrPaginaRepositorio",
+    "EstadoTrabajoRepositorio",
+    "CacheRucRepositorio",
 ]
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.db.models import CacheRuc
+from app.db.repositories.base_repository import BaseRepository
+
+
+class CacheRucRepositorio(BaseRepository[CacheRuc]):
+    def __init__(self, session: Session):
+        super().__init__(session)
+
+    def obtener(self, ruc: str) -> Optional[CacheRuc]:
+        stmt = select(CacheRuc).where(CacheRuc.ruc == ruc)
+        return self.session.scalar(stmt)
+
+    def guardar(self, ruc: str, encontrado: bool, datos: Optional[Dict]) -> None:
+        stmt = insert(CacheRuc).values(
+            ruc=ruc,
+            encontrado=encontrado,
+            datos=datos,
+            consultado_en=func.now(),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CacheRuc.ruc],
+            set_={
+                "encontrado": stmt.excluded.encontrado,
+                "datos": stmt.excluded.datos,
+                "consultado_en": stmt.excluded.consultado_en,
+            },
+        )
+        self.session.execute(stmt)
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Dict, List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from app.db.models import Clasificacion
@@ -34,6 +34,10 @@ class ClasificacionRepositorio(BaseRepository[Clasificacion]):
         self.session.add(clasificacion)
         return clasificacion
 
+    def insertar_lote(self, filas: List[Dict]) -> None:
+        if filas:
+            self.session.execute(insert(Clasificacion), filas)
+
     def obtener_por_comprobante(self, id_comprobante: int) -> Optional[Clasificacion]:
         stmt = select(Clasificacion).where(Clasificacion.id_comprobante == id_comprobante)
         return self.session.scalar(stmt)
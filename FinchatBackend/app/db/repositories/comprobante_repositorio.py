@@ -1,12 +1,12 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
 
-from app.db.models import Comprobante
+from app.db.models import Comprobante, Emisor
 from app.db.repositories.base_repository import BaseRepository
 
 
@@ -53,6 +53,24 @@ class ComprobanteRepositorio(BaseRepository[Comprobante]):
         self.session.add(comprobante)
         return comprobante
 
+    def insertar_lote(self, filas: List[Dict]) -> Dict[Tuple[Optional[int], str], int]:
+        """
+        Inserta varios comprobantes en una sola sentencia con RETURNING.
+
+        Returns:
+            Dict (id_usuario, hash_archivo) -> id_comprobante
+        """
+        if not filas:
+            return {}
+
+        stmt = insert(Comprobante).values(filas).returning(
+            Comprobante.id_usuario, Comprobante.hash_archivo, Comprobante.id_comprobante
+        )
+        return {
+            (id_usuario, hash_archivo): id_comprobante
+            for id_usuario, hash_archivo, id_comprobante in self.session.execute(stmt)
+        }
+
     def buscar_por_hash(self, id_usuario: Optional[int], hash_archivo: str) -> Optional[Comprobante]:
         stmt = select(Comprobante).where(
             Comprobante.id_usuario == id_usuario, Comprobante.hash_archivo == hash_archivo
@@ -70,6 +88,30 @@ class ComprobanteRepositorio(BaseRepository[Comprobante]):
         )
         return self.session.scalar(stmt)
 
+    def buscar_por_ruc_serie_numero(
+        self, id_usuario: Optional[int], rucs: List[str], serie: str, numero: str
+    ) -> Optional[Comprobante]:
+        """
+        Comprobante del usuario con la misma serie y número de alguno de los RUC.
+
+        El número se compara sin ceros a la izquierda ("00012" == "12"): el OCR
+        y el parseo no siempre los conservan igual.
+        """
+        if not rucs:
+            return None
+        stmt = (
+            select(Comprobante)
+            .join(Emisor, Comprobante.id_emisor == Emisor.id_emisor)
+            .where(
+                Comprobante.id_usuario == id_usuario,
+                Comprobante.serie == serie,
+                func.ltrim(Comprobante.numero, "0") == numero.lstrip("0"),
+                Emisor.ruc.in_(rucs),
+            )
+            .limit(1)
+        )
+        return self.session.scalar(stmt)
+
     def listar_por_usuario(self, id_usuario: int) -> List[Comprobante]:
         stmt = select(Comprobante).where(Comprobante.id_usuario == id_usuario)
         return list(self.session.scalars(stmt).all())
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List
 
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from app.db.models import DetalleComprobante
@@ -32,6 +32,10 @@ class DetalleComprobanteRepositorio(BaseRepository[DetalleComprobante]):
         self.session.add(detalle)
         return detalle
 
+    def insertar_lote(self, filas: List[Dict]) -> None:
+        if filas:
+            self.session.execute(insert(DetalleComprobante), filas)
+
     def listar_por_comprobante(self, id_comprobante: int) -> List[DetalleComprobante]:
         stmt = select(DetalleComprobante).where(
             DetalleComprobante.id_comprobante == id_comprobante
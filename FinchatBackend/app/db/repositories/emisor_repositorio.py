@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Dict, List, Optional
 
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from app.db.models import Emisor
@@ -36,3 +37,32 @@ class EmisorRepositorio(BaseRepository[Emisor]):
     def buscar_por_ruc(self, ruc: str) -> Optional[Emisor]:
         stmt = select(Emisor).where(Emisor.ruc == ruc)
         return self.session.scalar(stmt)
+
+    def upsert_lote(self, filas: List[Dict], actualizar: bool = True) -> Dict[str, int]:
+        """
+        Inserta los emisores en una sola sentencia (ON CONFLICT por RUC).
+
+        Args:
+            filas: Una fila por RUC (no se admiten RUC repetidos)
+            actualizar: Si False, los emisores existentes se dejan como están
+
+        Returns:
+            Dict ruc -> id_emisor, incluyendo los que ya existían
+        """
+        if not filas:
+            return {}
+
+        stmt = insert(Emisor).values(filas)
+        if actualizar:
+            set_ = {
+                columna: stmt.excluded[columna]
+                for columna in (
+                    "razon_social", "nombre_comercial", "ciiu_principal", "estado_ruc", "condicion_ruc", "validado_en",
+                )
+            }
+        else:
+            # actualización vacía para que RETURNING también devuelva los existentes
+            set_ = {"ruc": stmt.excluded.ruc}
+        stmt = stmt.on_conflict_do_update(index_elements=[Emisor.ruc], set_=set_)
+        stmt = stmt.returning(Emisor.ruc, Emisor.id_emisor)
+        return {ruc: id_emisor for ruc, id_emisor in self.session.execute(stmt)}
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import uuid
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.db.models import EstadoTrabajo
+from app.db.repositories.base_repository import BaseRepository
+
+
+class EstadoTrabajoRepositorio(BaseRepository[EstadoTrabajo]):
+    def __init__(self, session: Session):
+        super().__init__(session)
+
+    def crear(
+        self,
+        *,
+        id_usuario: Optional[int],
+        tipo_trabajo: str,
+        nombre_archivo: Optional[str] = None,
+        mime_type: Optional[str] = None,
+        ruta_archivo: Optional[str] = None,
+        id_trabajo: Optional[uuid.UUID] = None,
+    ) -> EstadoTrabajo:
+        trabajo = EstadoTrabajo(
+            id_trabajo=id_trabajo or uuid.uuid4(),
+            id_usuario=id_usuario,
+            tipo_trabajo=tipo_trabajo,
+            estado="pendiente",
+            intentos=0,
+            nombre_archivo=nombre_archivo,
+            mime_type=mime_type,
+            ruta_archivo=ruta_archivo,
+        )
+        self.session.add(trabajo)
+        return trabajo
+
+    def obtener(self, id_trabajo: uuid.UUID) -> Optional[EstadoTrabajo]:
+        return self.session.get(EstadoTrabajo, id_trabajo)
+
+    def tomar_pendientes(
+        self, tipo_trabajo: str, limite: int, espera_reintento_seg: int, max_intentos: int
+    ) -> List[EstadoTrabajo]:
+        """
+        Reserva trabajos pendientes con SELECT ... FOR UPDATE SKIP LOCKED.
+
+        Los trabajos tomados pasan a 'en_proceso' e incrementan `intentos`;
+        el llamador debe hacer commit para liberar el lock. Los reintentos
+        solo se toman después de `espera_reintento_seg` y mientras queden
+        intentos.
+        """
+        stmt = (
+            select(EstadoTrabajo)
+            .where(
+                EstadoTrabajo.tipo_trabajo == tipo_trabajo,
+                EstadoTrabajo.estado == "pendiente",
+                EstadoTrabajo.intentos < max_intentos,
+                or_(
+                    EstadoTrabajo.intentos == 0,
+                    EstadoTrabajo.actualizado_en
+                    <= func.now() - timedelta(seconds=espera_reintento_seg),
+                ),
+            )
+            .order_by(EstadoTrabajo.creado_en)
+            .limit(limite)
+            .with_for_update(skip_locked=True)
+        )
+        trabajos = list(self.session.scalars(stmt).all())
+        for trabajo in trabajos:
+            trabajo.estado = "en_proceso"
+            trabajo.intentos += 1
+        return trabajos
+
+    def marcar_completado(
+        self, trabajo: EstadoTrabajo, id_comprobante: Optional[int], mensaje: Optional[str] = None
+    ) -> EstadoTrabajo:
+        trabajo.estado = "completado"
+        trabajo.id_comprobante = id_comprobante
+        trabajo.codigo_error = None
+        trabajo.mensaje = mensaje
+        return trabajo
+
+    def marcar_fallido(
+        self,
+        trabajo: EstadoTrabajo,
+        codigo_error: Optional[str],
+        mensaje: Optional[str],
+        max_intentos: int,
+        reintentable: bool = True,
+    ) -> EstadoTrabajo:
+        # vuelve a la cola mientras queden intentos y el error no sea definitivo
+        trabajo.estado = "pendiente" if reintentable and trabajo.intentos < max_intentos else "error"
+        trabajo.codigo_error = (codigo_error or "")[:50] or None
+        trabajo.mensaje = mensaje
+        return trabajo
+
+    def renovar(self, id_trabajo: uuid.UUID) -> None:
+        """Latido de un trabajo en curso: renueva `actualizado_en` para que no parezca huérfano."""
+        stmt = (
+            update(EstadoTrabajo)
+            .where(EstadoTrabajo.id_trabajo == id_trabajo, EstadoTrabajo.estado == "en_proceso")
+            .values(actualizado_en=func.now())
+        )
+        self.session.execute(stmt)
+
+    def recuperar_huerfanos(
+        self, tipo_trabajo: str, timeout_seg: int, max_intentos: int
+    ) -> Tuple[int, List[Optional[str]]]:
+        """
+        Trabajos 'en_proceso' sin latido de un worker caído.
+
+        Vuelven a 'pendiente' si les quedan intentos; si no (p. ej. un archivo
+        que tumba al worker en cada intento) pasan a 'error'.
+
+        Returns:
+            (trabajos devueltos a la cola, ruta_archivo de los que pasaron a 'error')
+        """
+        huerfanos = (
+            EstadoTrabajo.tipo_trabajo == tipo_trabajo,
+            EstadoTrabajo.estado == "en_proceso",
+            EstadoTrabajo.actualizado_en <= func.now() - timedelta(seconds=timeout_seg),
+        )
+        agotados = self.session.execute(
+            update(EstadoTrabajo)
+            .where(*huerfanos, EstadoTrabajo.intentos >= max_intentos)
+            .values(
+                estado="error",
+                codigo_error="TrabajoHuerfano",
+                mensaje="El worker se detuvo durante el procesamiento en todos los intentos",
+            )
+            .returning(EstadoTrabajo.ruta_archivo)
+        ).scalars().all()
+        recuperados = self.session.execute(
+            update(EstadoTrabajo).where(*huerfanos).values(estado="pendiente")
+        ).rowcount
+        return recuperados, list(agotados)
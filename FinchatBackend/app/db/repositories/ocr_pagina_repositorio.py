@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from app.db.models import OcrPagina
@@ -30,6 +30,10 @@ class OcrPaginaRepositorio(BaseRepository[OcrPagina]):
         self.session.add(ocr_pagina)
         return ocr_pagina
 
+    def insertar_lote(self, filas: List[Dict]) -> None:
+        if filas:
+            self.session.execute(insert(OcrPagina), filas)
+
     def listar_por_comprobante(self, id_comprobante: int) -> List[OcrPagina]:
         stmt = (
             select(OcrPagina)
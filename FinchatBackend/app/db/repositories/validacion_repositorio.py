@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Dict, List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from app.db.models import Validacion
@@ -40,6 +40,10 @@ class ValidacionRepositorio(BaseRepository[Validacion]):
         self.session.add(validacion)
         return validacion
 
+    def insertar_lote(self, filas: List[Dict]) -> None:
+        if filas:
+            self.session.execute(insert(Validacion), filas)
+
     def obtener_por_comprobante(self, id_comprobante: int) -> Optional[Validacion]:
         stmt = select(Validacion).where(Validacion.id_comprobante == id_comprobante)
         return self.session.scalar(stmt)
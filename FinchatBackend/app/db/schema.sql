@@ -12,7 +12,8 @@ CREATE TABLE emisor (
   nombre_comercial VARCHAR(255),
   ciiu_principal VARCHAR(10),
   estado_ruc VARCHAR(30),
-  condicion_ruc VARCHAR(30)
+  condicion_ruc VARCHAR(30),
+  validado_en TIMESTAMPTZ -- última validación contra SUNAT
 );
 
 CREATE TABLE comprobante (
@@ -94,10 +95,16 @@ CREATE TABLE estado_trabajo (
   codigo_error VARCHAR(50),
   intentos INTEGER NOT NULL DEFAULT 0,
   mensaje TEXT,
+  nombre_archivo VARCHAR(255),
+  mime_type VARCHAR(100),
+  ruta_archivo TEXT,
   creado_en TIMESTAMPTZ NOT NULL DEFAULT NOW(),
   actualizado_en TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
+CREATE INDEX idx_estado_trabajo_estado_creado
+  ON estado_trabajo(estado, creado_en);
+
 CREATE TABLE historial_chat (
   id_mensaje BIGSERIAL PRIMARY KEY,
   id_usuario INTEGER REFERENCES usuario(id_usuario),
@@ -105,3 +112,19 @@ CREATE TABLE historial_chat (
   contenido TEXT NOT NULL,
   creado_en TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
+
+-- cache compartido de consultas RUC a SUNAT (incluye RUC no encontrados)
+CREATE TABLE cache_ruc (
+  ruc CHAR(11) PRIMARY KEY,
+  encontrado BOOLEAN NOT NULL,
+  datos JSONB,
+  consultado_en TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- bases creadas antes de la columna validado_en
+ALTER TABLE emisor ADD COLUMN IF NOT EXISTS validado_en TIMESTAMPTZ;
+
+-- duplicados por metadatos tras el OCR (número sin ceros a la izquierda);
+-- IF NOT EXISTS para crearlo también en bases anteriores
+CREATE INDEX IF NOT EXISTS idx_comprobante_usuario_serie_numero
+  ON comprobante(id_usuario, serie, (ltrim(numero, '0')));
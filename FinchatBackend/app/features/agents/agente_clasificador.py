@@ -7,11 +7,16 @@ from typing import Dict, Optional
 from agno.tools import Toolkit
 
 from agno.agent import Agent
+from pydantic import ValidationError
 
 from app.config.settings import settings
+from app.features.agents.models import ClasificacionLlm
+from app.features.agents.motor_clasificacion import CATEGORIA_DEFAULT, ConjuntoReglas
 from app.features.agents.pipeline_context import PipelineContext
+from app.features.agents.registro_agentes import estado_vinculado, get_agente, vincular
+from app.libs.models.cache_llm import clave_llm, get_cache_llm
 from app.libs.models.model_selector import get_ollama
-from app.features.agents.prompts.clasificador import PROMPT_SISTEMA
+from app.features.agents.prompts.clasificador import PROMPT_DATOS_EN_MENSAJE, PROMPT_SISTEMA
 
 logger = logging.getLogger(__name__)
 
@@ -225,17 +230,41 @@ REGLAS_CIIU_PREFIJO = [
 ]
 
 
+# ===============================
+# VERSIONES DE REGLAS
+# ===============================
+# Cada versión se compila una vez al importar; para cambiar tablas se agrega
+# una versión nueva y se selecciona con CLASIFICACION_VERSION_REGLA.
+CONJUNTOS_REGLAS = {
+    "v1.0": ConjuntoReglas.desde_tablas("v1.0", MAPEO_CIIU_CATEGORIAS, REGLAS_CIIU_PREFIJO),
+}
+
+
+def get_conjunto_reglas(version: Optional[str] = None) -> ConjuntoReglas:
+    version = version or settings.clasificacion_version_regla
+    if version not in CONJUNTOS_REGLAS:
+        raise ValueError(f"Versión de reglas de clasificación desconocida: {version}")
+    return CONJUNTOS_REGLAS[version]
+
+
 class ClasificacionToolkit(Toolkit):
 
-    def __init__(self, contexto: PipelineContext):
+    def __init__(self, contexto: Optional[PipelineContext] = None):
         super().__init__(name="clasificacion_tools")
-        self.contexto = contexto
+        self._contexto = contexto
+
+    @property
+    def contexto(self) -> PipelineContext:
+        # sin contexto fijo, el del agente compartido se vincula en cada ejecución
+        if self._contexto is not None:
+            return self._contexto
+        return estado_vinculado("contexto")
 
     def mapear_ciiu(self, ciiu: str) -> str:
         """
         Mapea un código CIIU a categoría y % deducción según SUNAT 2025.
 
-        Lógica de búsqueda:
+        Lógica de búsqueda (índice de prefijos de la versión vigente):
         1. Búsqueda exacta en MAPEO_CIIU_CATEGORIAS
         2. Búsqueda por prefijo en REGLAS_CIIU_PREFIJO
         3. Default si no hay coincidencia
@@ -254,32 +283,18 @@ class ClasificacionToolkit(Toolkit):
                 "fuente": "sin_ciiu"
             })
 
-        # Búsqueda exacta
-        if ciiu in MAPEO_CIIU_CATEGORIAS:
-            datos = MAPEO_CIIU_CATEGORIAS[ciiu]
+        regla = get_conjunto_reglas().buscar(ciiu)
+        if regla is not None:
             return json.dumps({
-                "categoria": datos["categoria"],
-                "porcentaje": datos["deduccion"],
-                "tipo_regla": datos.get("tipo_regla", "general"),
-                "grupo_sunat": datos.get("grupo_sunat", ""),
-                "requiere_renta_cuarta": datos.get("requiere_renta_cuarta", False),
-                "nota": datos.get("nota", ""),
-                "fuente": "ciiu_exacto"
+                "categoria": regla.categoria,
+                "porcentaje": regla.deduccion,
+                "tipo_regla": regla.tipo_regla,
+                "grupo_sunat": regla.grupo_sunat,
+                "requiere_renta_cuarta": regla.requiere_renta_cuarta,
+                "nota": regla.nota,
+                "fuente": regla.fuente
             })
 
-        # Búsqueda por prefijo
-        for regla in REGLAS_CIIU_PREFIJO:
-            if ciiu.startswith(regla["prefijo"]):
-                return json.dumps({
-                    "categoria": regla["categoria"],
-                    "porcentaje": regla["deduccion"],
-                    "tipo_regla": regla.get("tipo_regla", "general"),
-                    "grupo_sunat": regla.get("grupo_sunat", ""),
-                    "requiere_renta_cuarta": regla.get("requiere_renta_cuarta", False),
-                    "nota": regla.get("nota", ""),
-                    "fuente": f"ciiu_prefijo_{regla['prefijo']}"
-                })
-
         # CIIU no mapeado
         logger.warning(f"CIIU no mapeado: {ciiu}, usando clasificación default")
         return json.dumps({
@@ -294,45 +309,96 @@ class ClasificacionToolkit(Toolkit):
 class AgenteClasificador:
     def __init__(self, contexto: PipelineContext):
         self.contexto = contexto
-        self.agent = Agent(
-            name="ClasificadorGastos",
-            model=get_ollama(),
-            tools=[ClasificacionToolkit(contexto)],
-            instructions=[PROMPT_SISTEMA],
-            markdown=False,
-        )
+        self.reglas = get_conjunto_reglas()
+        self._agent: Optional[Agent] = None
+
+    @property
+    def agent(self) -> Agent:
+        # solo se construye si algún CIIU no está mapeado
+        if self._agent is None:
+            # con salida estructurada el resultado del toolkit va en el prompt
+            estructurada = settings.ollama_salida_estructurada
+            self._agent = get_agente(
+                f"ClasificadorGastos:{'estructurada' if estructurada else 'herramientas'}",
+                lambda: Agent(
+                    name="ClasificadorGastos",
+                    model=get_ollama(ClasificacionLlm),
+                    tools=[] if estructurada else [ClasificacionToolkit()],
+                    instructions=[PROMPT_SISTEMA, PROMPT_DATOS_EN_MENSAJE] if estructurada else [PROMPT_SISTEMA],
+                    markdown=False,
+                ),
+            )
+        return self._agent
 
     def tool_clasificar(self) -> Dict:
         """
-        Ejecuta la clasificación usando el agente.
+        Clasifica el comprobante por el CIIU del emisor.
+
+        Los CIIU mapeados se resuelven con el índice de reglas sin llamar al
+        modelo; el agente solo se usa para CIIU no mapeados.
         """
         # Obtener CIIU del contexto
         validacion = self.contexto.validacion_sunat or {}
         ciiu = validacion.get("ciiu")
 
+        clasificacion = self.reglas.clasificar(ciiu)
+        if clasificacion is not None:
+            return clasificacion
+
+        if not settings.clasificacion_llm_no_mapeados:
+            logger.warning(f"CIIU no mapeado: {ciiu}, usando clasificación default")
+            return self._clasificacion_no_mapeado(ciiu)
+
+        logger.info(f"[Clasificador] CIIU {ciiu} no mapeado en {self.reglas.version}, consultando agente")
+        return self._clasificar_con_llm(ciiu)
+
+    def _clasificar_con_llm(self, ciiu: Optional[str]) -> Dict:
         try:
             prompt = f"Clasifica el comprobante con CIIU: {ciiu or 'null'}"
-            response = self.agent.run(prompt)
+            if settings.ollama_salida_estructurada:
+                prompt += f"\nResultado de la herramienta: {ClasificacionToolkit(self.contexto).mapear_ciiu(ciiu)}"
+            cache = get_cache_llm()
+            clave = clave_llm(self.agent, prompt) if cache else None
+            content = cache.obtener(clave) if cache else None
+            if content is None:
+                with vincular(contexto=self.contexto):
+                    response = self.agent.run(prompt)
+                content = response.content.replace("```json", "").replace("```", "").strip()
+                desde_cache = False
+            else:
+                desde_cache = True
 
             # Parsear respuesta
             try:
-                content = response.content.replace("```json", "").replace("```", "").strip()
-                resultado = json.loads(content)
-                return resultado
-            except json.JSONDecodeError:
-                logger.error(f"Error parseando respuesta JSON del clasificador: {response.content}")
+                resultado = ClasificacionLlm.model_validate_json(content).model_dump()
+            except ValidationError:
+                logger.error(f"Error parseando respuesta JSON del clasificador: {content}")
                 return self._clasificacion_default()
+            if cache and not desde_cache:
+                cache.guardar(clave, content)
+            resultado["ciiu_utilizado"] = resultado["ciiu_utilizado"] or ciiu
+            resultado["version_regla"] = resultado["version_regla"] or self.reglas.version
+            return resultado
 
         except Exception as e:
             logger.error(f"Error en AgenteClasificador: {e}")
             return self._clasificacion_default()
 
+    def _clasificacion_no_mapeado(self, ciiu: Optional[str]) -> Dict:
+        return {
+            "categoria_gasto": CATEGORIA_DEFAULT,
+            "porcentaje_deduccion": 0.0,
+            "ciiu_utilizado": ciiu,
+            "version_regla": self.reglas.version,
+            "fuente_clasificacion": "default_ciiu_no_mapeado"
+        }
+
     def _clasificacion_default(self) -> Dict:
         """Clasificación por defecto en caso de error."""
         return {
             "categoria_gasto": "gastoGeneral",
             "porcentaje_deduccion": 0.0,
             "ciiu_utilizado": None,
-            "version_regla": "v1.0",
+            "version_regla": self.reglas.version,
             "fuente_clasificacion": "error_fallback"
         }
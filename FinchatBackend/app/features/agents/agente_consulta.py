@@ -12,11 +12,17 @@ from sqlalchemy.orm import Session
 from app.db.models import Comprobante, Emisor, Clasificacion
 from app.db.repositories.comprobante_repositorio import ComprobanteRepositorio
 from app.db.repositories.emisor_repositorio import EmisorRepositorio
+from app.features.agents.registro_agentes import estado_vinculado, get_agente, vincular
 from app.libs.models.model_selector import get_ollama
 from app.features.agents.prompts.consulta import PROMPT_SISTEMA
 
 class QueryToolkit(Toolkit):
-    def __init__(self, session: Session, usuario_id: int):
+    def __init__(self, session: Optional[Session] = None, usuario_id: Optional[int] = None):
+        """
+        Args:
+            session: Sesión fija; sin ella se usa la vinculada a la ejecución
+            usuario_id: Usuario fijo; sin él se usa el vinculado a la ejecución
+        """
         super().__init__(
             name="query_tools",
             tools=[
@@ -25,10 +31,26 @@ class QueryToolkit(Toolkit):
                 self.buscar_por_emisor,
             ],
         )
-        self.session = session
-        self.usuario_id = usuario_id
-        self.comprobante_repo = ComprobanteRepositorio(session)
-        self.emisor_repo = EmisorRepositorio(session)
+        self._session = session
+        self._usuario_id = usuario_id
+
+    # El toolkit del agente compartido sirve a todas las peticiones: la sesión
+    # y el usuario se vinculan en cada consulta con vincular(...)
+    @property
+    def session(self) -> Session:
+        return self._session if self._session is not None else estado_vinculado("session")
+
+    @property
+    def usuario_id(self) -> int:
+        return self._usuario_id if self._usuario_id is not None else estado_vinculado("usuario_id")
+
+    @property
+    def comprobante_repo(self) -> ComprobanteRepositorio:
+        return ComprobanteRepositorio(self.session)
+
+    @property
+    def emisor_repo(self) -> EmisorRepositorio:
+        return EmisorRepositorio(self.session)
 
     def buscar_comprobantes(
         self,
@@ -279,17 +301,22 @@ class AgenteConsulta:
         self.session = session
         self.usuario_id = usuario_id
 
-        self.agent = Agent(
-            name="AgenteConsulta",
-            model=get_ollama(),
-            tools=[QueryToolkit(session, usuario_id)],
-            instructions=[PROMPT_SISTEMA],
-            markdown=True,
-            add_datetime_to_context=True,
-            tool_call_limit=2,
-            tool_choice="required",
-            debug_mode=True,
-            debug_level=2,
+    @property
+    def agent(self) -> Agent:
+        return get_agente(
+            "AgenteConsulta",
+            lambda: Agent(
+                name="AgenteConsulta",
+                model=get_ollama(),
+                tools=[QueryToolkit()],
+                instructions=[PROMPT_SISTEMA],
+                markdown=True,
+                add_datetime_to_context=True,
+                tool_call_limit=2,
+                tool_choice="required",
+                debug_mode=True,
+                debug_level=2,
+            ),
         )
 
     def consultar(self, query: str) -> Dict:
@@ -302,7 +329,8 @@ class AgenteConsulta:
         Returns:
             Dict con respuesta y datos estructurados
         """
-        response = self.agent.run(query)
+        with vincular(session=self.session, usuario_id=self.usuario_id):
+            response = self.agent.run(query)
 
         return {
             "respuesta": response.content,
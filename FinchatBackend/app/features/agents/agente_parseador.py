@@ -1,45 +1,173 @@
 from __future__ import annotations
 
+import asyncio
 import json
-import os
 import re
-import tempfile
 from datetime import datetime
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from agno.agent import Agent
-
-from app.features.agents.models import ComprobanteParsed
+from agno.run.agent import RunEvent
+from pydantic import TypeAdapter, ValidationError
+
+from app.config.settings import settings
+from app.features.agents.extractor_determinista import (
+    CAMPOS_REQUERIDOS,
+    ExtraccionDeterminista,
+    extraer_comprobante,
+)
+from app.features.agents.models import ComprobanteParsed, ComprobanteSalidaLlm
 from app.features.agents.prompts import PROMPT_SISTEMA
 from app.features.agents.pipeline_context import PipelineContext
+from app.features.agents.registro_agentes import get_agente
+from app.libs.models.cache_llm import clave_llm, get_cache_llm
 from app.libs.models.model_selector import get_ollama
-from app.libs.ocr.imagen_ocr import extraer_texto_img
-from app.libs.ocr.pdf_extractor import extraer_texto_pdf
+from app.libs.ocr.cache_ocr import CacheOcr, get_cache_ocr
+from app.libs.ocr.imagen_ocr import decodificar_imagen, extraer_texto_img
+from app.libs.ocr.lote_ocr import get_ocr_lote_worker
+from app.libs.ocr.pool_ocr import get_ocr_pool
+from app.libs.ocr.pdf_estructurado import extraer_estructura
+from app.libs.ocr.pdf_extractor import extraer_paginas_pdf, extraer_paginas_pdf_async
+from app.utils import patrones
+from app.utils.ejecutores import ejecutar_en
+from app.utils.hashing import calcular_hash_bytes
+from app.utils.json_incremental import JsonIncremental
+
+# validadores de cada campo de primer nivel, para revisar la respuesta del LLM mientras llega
+_ADAPTADORES_CAMPOS = {
+    nombre: TypeAdapter(campo.annotation) for nombre, campo in ComprobanteParsed.model_fields.items()
+}
+
+
+def _validar_miembro(clave: str, valor) -> None:
+    adaptador = _ADAPTADORES_CAMPOS.get(clave)
+    if adaptador is not None:
+        # ValidationError es ValueError: el parser incremental lo trata como salida inválida
+        adaptador.validate_python(valor)
+
 
 class AgenteParseador:
     def __init__(self, contexto: PipelineContext):
         self.contexto = contexto
-        self.agent = Agent(
-            name="ParseadorComprobantes",
-            model=get_ollama(),
-            instructions=[PROMPT_SISTEMA],
-            markdown=False,
+
+    @property
+    def agent(self) -> Agent:
+        # sin herramientas ni estado por petición: un único agente para el proceso
+        return get_agente(
+            "ParseadorComprobantes",
+            lambda: Agent(
+                name="ParseadorComprobantes",
+                model=get_ollama(ComprobanteSalidaLlm),
+                instructions=[PROMPT_SISTEMA],
+                markdown=False,
+            ),
         )
 
-    def _ejecutar_ocr(self, ruta_archivo: str, mime_type: str) -> tuple[str, float]:
+    def _ejecutar_ocr(self, contenido: bytes, mime_type: str) -> tuple[str, float]:
+        resultado = self._ejecutar_ocr_completo(contenido, mime_type)
+        return resultado["texto"], resultado["confianza_promedio"]
+
+    def _ejecutar_ocr_completo(self, contenido: bytes, mime_type: str) -> Dict:
+        # los bytes van directo a PyMuPDF / PaddleOCR, sin archivo temporal
         if mime_type == "application/pdf":
-            paginas = extraer_texto_pdf(ruta_archivo)
-            textos = [p["texto"] for p in paginas]
-            texto_completo = "\n===PÁGINA===\n".join(textos)
-            return texto_completo, 1.0  # PDFs digitales tienen confianza alta
-        else:
-            resultado = extraer_texto_img(ruta_archivo)
-            return resultado["texto"], resultado.get("confianza_promedio", 0.0)
+            paginas = extraer_paginas_pdf(contenido)
+            ocr_escaneadas = {
+                p["numero_pagina"]: extraer_texto_img(p["imagen"]) for p in paginas if p["escaneada"]
+            }
+            return self._resultado_pdf(paginas, ocr_escaneadas)
+        return self._resultado_imagen(extraer_texto_img(contenido))
+
+    async def _ejecutar_ocr_completo_async(self, contenido: bytes, mime_type: str) -> Dict:
+        if mime_type == "application/pdf":
+            paginas = await extraer_paginas_pdf_async(contenido)
+            escaneadas = [p for p in paginas if p["escaneada"]]
+            resultados = await asyncio.gather(*(self._ocr_imagen_async(p["imagen"]) for p in escaneadas))
+            ocr_escaneadas = {p["numero_pagina"]: r for p, r in zip(escaneadas, resultados)}
+            # incluye extraer_estructura de los PDFs digitales
+            return await ejecutar_en("ocr", self._resultado_pdf, paginas, ocr_escaneadas)
+
+        return self._resultado_imagen(await self._ocr_imagen_async(contenido))
+
+    async def _ocr_imagen_async(self, contenido: bytes) -> Dict:
+        if settings.ocr_modo == "lote":
+            # la imagen se agrupa con las de otros requests en el worker de PaddleOCR
+            imagen = await ejecutar_en("ocr", decodificar_imagen, contenido)
+            return await get_ocr_lote_worker().reconocer(imagen)
+        if settings.ocr_modo == "procesos":
+            return await get_ocr_pool().reconocer(contenido)
+        # inline: PaddleOCR en su hilo dedicado, no en el event loop
+        return await ejecutar_en("ocr", extraer_texto_img, contenido)
+
+    @staticmethod
+    def _resultado_pdf(paginas: List[Dict], ocr_escaneadas: Dict[int, Dict]) -> Dict:
+        """
+        Une las páginas del PDF; las escaneadas toman el texto y la confianza del OCR de imagen.
+        """
+        resultado_paginas = []
+        for p in paginas:
+            ocr = ocr_escaneadas.get(p["numero_pagina"])
+            resultado_paginas.append({
+                "numero_pagina": p["numero_pagina"],
+                "texto": ocr["texto"] if ocr else p["texto"],
+                # PDFs digitales tienen confianza alta
+                "confianza_promedio": ocr.get("confianza_promedio", 0.0) if ocr else 1.0,
+            })
+
+        confianzas = [p["confianza_promedio"] for p in resultado_paginas]
+        resultado = {
+            "texto": "\n===PÁGINA===\n".join(p["texto"] for p in resultado_paginas),
+            "confianza_promedio": sum(confianzas) / len(confianzas) if confianzas else 0.0,
+            "paginas": resultado_paginas,
+        }
+        # PDF digital: campos e ítems desde las coordenadas de las palabras
+        if paginas and not ocr_escaneadas:
+            resultado["estructura"] = extraer_estructura([p.get("palabras", []) for p in paginas])
+        return resultado
+
+    @staticmethod
+    def _resultado_imagen(resultado: Dict) -> Dict:
+        confianza = resultado.get("confianza_promedio", 0.0)
+        return {
+            "texto": resultado["texto"],
+            "confianza_promedio": confianza,
+            "paginas": [{"numero_pagina": 1, "texto": resultado["texto"], "confianza_promedio": confianza}],
+        }
+
+    def _leer_cache_ocr(self, contenido: bytes) -> Tuple[Optional[CacheOcr], str, Optional[Dict]]:
+        cache = get_cache_ocr()
+        hash_archivo = self.contexto.hash_archivo or calcular_hash_bytes(contenido)
+
+        resultado = cache.obtener(hash_archivo) if cache is not None else None
+        if resultado is not None:
+            self.contexto.set("ocr_desde_cache", True)
+        return cache, hash_archivo, resultado
+
+    def _obtener_ocr(self, contenido: bytes, mime_type: str) -> Dict:
+        """OCR del archivo, reutilizando el cache global por hash si ya se procesó."""
+        cache, hash_archivo, resultado = self._leer_cache_ocr(contenido)
+        if resultado is not None:
+            return resultado
+
+        resultado = self._ejecutar_ocr_completo(contenido, mime_type)
+        if cache is not None:
+            cache.guardar(hash_archivo, resultado)
+        return resultado
+
+    async def _obtener_ocr_async(self, contenido: bytes, mime_type: str) -> Dict:
+        # SHA-256 y lectura/escritura del cache en disco, fuera del event loop
+        cache, hash_archivo, resultado = await ejecutar_en("bd", self._leer_cache_ocr, contenido)
+        if resultado is not None:
+            return resultado
+
+        resultado = await self._ejecutar_ocr_completo_async(contenido, mime_type)
+        if cache is not None:
+            await ejecutar_en("bd", cache.guardar, hash_archivo, resultado)
+        return resultado
 
     def _fallback_parse(self, texto_ocr: str, confianza_ocr: float) -> Dict:
         lines = [ln.strip() for ln in texto_ocr.splitlines() if ln.strip()]
         norm_text = texto_ocr.upper()
-        norm_ruc_text = texto_ocr.translate(str.maketrans({"O": "0", "o": "0", "I": "1", "l": "1", "B": "8", "S": "5", "Z": "2"}))
+        norm_ruc_text = texto_ocr.translate(patrones.OCR_DIGITOS)
 
         # RUC
         ruc_match = re.search(r"\b\d{11}\b", norm_ruc_text)
@@ -171,6 +299,12 @@ class AgenteParseador:
         }
         return fallback
 
+    def _parseo_sin_llm(self, extraccion: ExtraccionDeterminista, texto_ocr: str, confianza_ocr: float) -> Dict:
+        """Extracción determinista si trae todos los requeridos; si no, la heurística de `_fallback_parse`."""
+        if all(extraccion.valor(campo) not in (None, "") for campo in CAMPOS_REQUERIDOS):
+            return extraccion.como_dict(texto_ocr)
+        return self._fallback_parse(texto_ocr, confianza_ocr)
+
     def _extraer_json_desde_respuesta(self, response) -> Tuple[Dict, str]:
         if hasattr(response, "content"):
             raw_content = response.content
@@ -186,52 +320,130 @@ class AgenteParseador:
             resultado_json = json.loads(cleaned_content)
             return resultado_json, raw_content
         except json.JSONDecodeError:
-            match = re.search(r"\{.*\}", cleaned_content, flags=re.DOTALL)
-            if not match:
-                raise
-            bloque = match.group(0)
-            resultado_json = json.loads(bloque)
-            return resultado_json, raw_content
-
-    def parsear_archivo(self, contenido: bytes, mime_type: str, nombre_archivo: str) -> Dict:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{nombre_archivo}") as tmp:
-            tmp.write(contenido)
-            tmp.flush()
-            ruta_tmp = tmp.name
-
+            # primer objeto balanceado, sin escanear todo el texto con una regex codiciosa
+            parser = JsonIncremental()
+            parser.alimentar(cleaned_content)
+            return parser.resultado(), raw_content
+
+    def _respuesta_llm_stream(self, texto_ocr: str) -> Tuple[Dict, str]:
+        """
+        Consume los tokens del LLM a medida que llegan y corta la generación
+        en cuanto el JSON se cierra o deja de ser válido.
+
+        Raises:
+            ValueError: Si la salida no es un objeto JSON válido para ComprobanteParsed
+        """
+        parser = JsonIncremental(
+            validar_miembro=_validar_miembro,
+            max_caracteres=settings.parseo_stream_max_caracteres,
+        )
+        fragmentos: List[str] = []
+        eventos = self.agent.run(f"TEXTO OCR A PROCESAR:\n{texto_ocr}", stream=True)
         try:
-            texto_ocr, confianza_ocr = self._ejecutar_ocr(ruta_tmp, mime_type)
-
-            self.contexto.set("texto_ocr", texto_ocr)
-            self.contexto.set("confianza_ocr", confianza_ocr)
-
+            for evento in eventos:
+                if getattr(evento, "event", None) != RunEvent.run_content.value:
+                    continue
+                if not isinstance(evento.content, str):
+                    continue
+                fragmentos.append(evento.content)
+                parser.alimentar(evento.content)
+                if parser.terminado:
+                    break
+        finally:
+            # cerrar el generador corta el stream HTTP y Ollama deja de generar
+            cerrar = getattr(eventos, "close", None)
+            if cerrar is not None:
+                cerrar()
+
+        self.contexto.set("llm_stream", {
+            "estado": parser.estado,
+            "motivo": parser.motivo,
+            "caracteres": parser.recibido,
+        })
+        return parser.resultado(), "".join(fragmentos)
+
+    def _respuesta_llm(self, texto_ocr: str) -> Tuple[Dict, str]:
+        # mismo texto OCR, mismo modelo y mismas instrucciones: misma respuesta
+        cache = get_cache_llm()
+        clave = clave_llm(self.agent, f"TEXTO OCR A PROCESAR:\n{texto_ocr}") if cache else None
+        if cache:
+            cacheado = cache.obtener(clave)
+            self.contexto.set("llm_cache_hit", cacheado is not None)
+            if cacheado is not None:
+                return json.loads(cacheado), cacheado
+
+        if settings.parseo_llm_stream:
+            parsed, raw = self._respuesta_llm_stream(texto_ocr)
+        else:
             response = self.agent.run(f"TEXTO OCR A PROCESAR:\n{texto_ocr}")
+            parsed, raw = self._extraer_json_desde_respuesta(response)
 
-            parsed_dict = None
-            raw_content = ""
-
+        if cache:
+            # solo se cachean salidas que cumplen el schema
             try:
-                parsed_dict, raw_content = self._extraer_json_desde_respuesta(response)
-            except Exception as e:
-                print(f"Error decodificando JSON del LLM: {e}")
-                print(f"Contenido recibido: {raw_content}")
-                parsed_dict = self._fallback_parse(texto_ocr, confianza_ocr)
-
-            parsed_dict["confianza_parsing"] = parsed_dict.get("confianza_parsing", confianza_ocr)
-            parsed_dict["texto_completo_ocr"] = texto_ocr
-
-            try:
-                parsed = ComprobanteParsed(**parsed_dict)
-            except Exception as e:
-                print(f"Error validando ComprobanteParsed: {e}")
-                parsed = ComprobanteParsed(**self._fallback_parse(texto_ocr, confianza_ocr))
+                ComprobanteSalidaLlm.model_validate(parsed)
+            except ValidationError:
+                return parsed, raw
+            cache.guardar(clave, json.dumps(parsed, ensure_ascii=False))
+        return parsed, raw
 
+    def parsear_archivo(self, contenido: bytes, mime_type: str, nombre_archivo: str) -> Dict:
+        resultado_ocr = self._obtener_ocr(contenido, mime_type)
+        return self._parsear_resultado_ocr(resultado_ocr)
+
+    async def parsear_archivo_async(self, contenido: bytes, mime_type: str, nombre_archivo: str) -> Dict:
+        """Igual que `parsear_archivo`, pero sin bloquear el event loop: el OCR se espera y el parseo (LLM) corre en el pool "llm"."""
+        resultado_ocr = await self.ocr_async(contenido, mime_type)
+        return await self.parsear_ocr_async(resultado_ocr)
+
+    async def ocr_async(self, contenido: bytes, mime_type: str) -> Dict:
+        """Solo el OCR (con cache); el motor de etapas lo separa del parseo."""
+        return await self._obtener_ocr_async(contenido, mime_type)
+
+    async def parsear_ocr_async(self, resultado_ocr: Dict) -> Dict:
+        """Parseo (extracción determinista + LLM) de un resultado OCR, en el pool "llm"."""
+        return await ejecutar_en("llm", self._parsear_resultado_ocr, resultado_ocr)
+
+    def _parsear_resultado_ocr(self, resultado_ocr: Dict) -> Dict:
+        texto_ocr = resultado_ocr["texto"]
+        confianza_ocr = resultado_ocr["confianza_promedio"]
+
+        self.contexto.set("texto_ocr", texto_ocr)
+        self.contexto.set("confianza_ocr", confianza_ocr)
+        self.contexto.set("paginas_ocr", resultado_ocr["paginas"])
+
+        # primero la extracción determinista; el LLM solo si faltan campos requeridos
+        umbral = settings.parseo_umbral_confianza
+        extraccion = extraer_comprobante(texto_ocr, confianza_ocr, resultado_ocr.get("estructura"))
+        self.contexto.set("confianza_campos", extraccion.confianza)
+        pendientes = extraccion.campos_pendientes(umbral)
+        self.contexto.set("campos_pendientes", pendientes)
+
+        if not pendientes:
+            self.contexto.set("fuente_parseo", extraccion.fuente)
+            parsed = ComprobanteParsed(**extraccion.como_dict(texto_ocr))
             self.contexto.comprobante_parseado = parsed.model_dump()
             return self.contexto.comprobante_parseado
 
-        finally:
-            try:
-                if os.path.exists(ruta_tmp):
-                    os.unlink(ruta_tmp)
-            except Exception:
-                pass
+        self.contexto.set("fuente_parseo", "llm")
+        parsed_dict = None
+
+        try:
+            parsed_dict, _ = self._respuesta_llm(texto_ocr)
+        except Exception as e:
+            # salida inválida: directo al fallback sin esperar el resto de la generación
+            print(f"Error decodificando JSON del LLM: {e}")
+            parsed_dict = self._parseo_sin_llm(extraccion, texto_ocr, confianza_ocr)
+
+        extraccion.completar(parsed_dict, umbral)
+        parsed_dict["confianza_parsing"] = parsed_dict.get("confianza_parsing", confianza_ocr)
+        parsed_dict["texto_completo_ocr"] = texto_ocr
+
+        try:
+            parsed = ComprobanteParsed(**parsed_dict)
+        except Exception as e:
+            print(f"Error validando ComprobanteParsed: {e}")
+            parsed = ComprobanteParsed(**self._parseo_sin_llm(extraccion, texto_ocr, confianza_ocr))
+
+        self.contexto.comprobante_parseado = parsed.model_dump()
+        return self.contexto.comprobante_parseado
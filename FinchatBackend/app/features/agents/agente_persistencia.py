@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 import logging
-from typing import Dict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
 
 from app.db.repositories import (
     ClasificacionRepositorio,
@@ -16,12 +19,10 @@ from app.features.agents.pipeline_context import PipelineContext
 logger = logging.getLogger(__name__)
 
 
-from sqlalchemy.orm import Session
-
 class AgentePersistencia:
     def __init__(
         self,
-        contexto: PipelineContext,
+        contexto: Optional[PipelineContext],
         session: Session,
         emisor_repo: EmisorRepositorio,
         comprobante_repo: ComprobanteRepositorio,
@@ -39,28 +40,22 @@ class AgentePersistencia:
         self.clasificacion_repo = clasificacion_repo
         self.ocr_repo = ocr_repo
 
+    @classmethod
+    def desde_sesion(cls, session: Session, contexto: Optional[PipelineContext] = None) -> "AgentePersistencia":
+        return cls(
+            contexto=contexto,
+            session=session,
+            emisor_repo=EmisorRepositorio(session),
+            comprobante_repo=ComprobanteRepositorio(session),
+            detalle_repo=DetalleComprobanteRepositorio(session),
+            validacion_repo=ValidacionRepositorio(session),
+            clasificacion_repo=ClasificacionRepositorio(session),
+            ocr_repo=OcrPaginaRepositorio(session),
+        )
+
     def guardar_todo(self) -> int:
         try:
-            # Guardar o actualizar emisor
-            emisor = self._guardar_emisor()
-            emisor_id = emisor.id_emisor
-
-            # Guardar comprobante
-            comprobante = self._guardar_comprobante(emisor_id)
-            comprobante_id = comprobante.id_comprobante
-
-            # Guardar items del detalle
-            self._guardar_items(comprobante_id)
-
-            # Guardar validación SUNAT
-            self._guardar_validacion(comprobante_id)
-
-            # Guardar clasificación
-            self._guardar_clasificacion(comprobante_id)
-
-            # Guardar páginas OCR (si hay)
-            self._guardar_ocr_paginas(comprobante_id)
-
+            comprobante_id = self.guardar_lote([self.contexto])[0]
             logger.info(f"Comprobante {comprobante_id} guardado exitosamente")
             return comprobante_id
 
@@ -68,133 +63,212 @@ class AgentePersistencia:
             logger.error(f"Error guardando comprobante: {e}")
             raise
 
-    def _guardar_emisor(self):
-        emisor_data = self.contexto.comprobante_parseado["emisor"]
-        validacion = self.contexto.validacion_sunat
-
-        ruc = "".join(filter(str.isdigit, emisor_data["ruc"]))[:11]
-
-        # Buscar si ya existe
-        emisor_existente = self.emisor_repo.buscar_por_ruc(ruc)
-
-        if emisor_existente:
-            # Actualizar datos de SUNAT si los tenemos
-            if validacion and not validacion.get("fallback"):
-                emisor_existente.razon_social = validacion.get("razon_social") or emisor_data["razon_social"]
-                emisor_existente.nombre_comercial = validacion.get("nombre_comercial_sunat")
-                emisor_existente.ciiu_principal = validacion.get("ciiu")
-                emisor_existente.estado_ruc = validacion.get("estado_ruc")
-                emisor_existente.condicion_ruc = validacion.get("condicion_ruc")
-
-            logger.info(f"Emisor RUC {ruc} actualizado")
-            return emisor_existente
-        else:
-            # Crear nuevo emisor
-            nuevo_emisor = self.emisor_repo.crear(
-                ruc=ruc,
-                razon_social=validacion.get("razon_social") if validacion else emisor_data["razon_social"],
-                nombre_comercial=validacion.get("nombre_comercial_sunat") if validacion else emisor_data.get("nombre_comercial"),
-                ciiu_principal=validacion.get("ciiu") if validacion else None,
-                estado_ruc=validacion.get("estado_ruc") if validacion else None,
-                condicion_ruc=validacion.get("condicion_ruc") if validacion else None,
-            )
-            self.session.flush()  # Generar ID
-            logger.info(f"Nuevo emisor RUC {ruc} creado")
-            return nuevo_emisor
-
-    def _guardar_comprobante(self, emisor_id: int):
-        comp_data = self.contexto.comprobante_parseado["comprobante"]
-        validacion = self.contexto.validacion_sunat
+    def guardar_lote(self, contextos: List[PipelineContext]) -> List[int]:
+        """
+        Guarda varios comprobantes con sentencias masivas.
+
+        Un upsert de emisores, un INSERT ... RETURNING de comprobantes y un
+        INSERT masivo por tabla hija, sin importar cuántos comprobantes o
+        ítems haya. No hace commit: el lote queda en la transacción actual.
+
+        Args:
+            contextos: Contextos con comprobante_parseado, validacion_sunat y clasificacion
+
+        Returns:
+            id_comprobante de cada contexto, en el mismo orden
+        """
+        if not contextos:
+            return []
+
+        ids_emisor = self._guardar_emisores(contextos)
+
+        filas_comprobante = [
+            self._fila_comprobante(contexto, ids_emisor[self._ruc(contexto)]) for contexto in contextos
+        ]
+        ids = self.comprobante_repo.insertar_lote(filas_comprobante)
+        comprobante_ids = [ids[(fila["id_usuario"], fila["hash_archivo"])] for fila in filas_comprobante]
+
+        filas_items, filas_validacion, filas_clasificacion, filas_ocr = [], [], [], []
+        for contexto, comprobante_id in zip(contextos, comprobante_ids):
+            contexto.comprobante_id = comprobante_id
+            filas_items.extend(self._filas_items(contexto, comprobante_id))
+            filas_ocr.extend(self._filas_ocr(contexto, comprobante_id))
+
+            fila = self._fila_validacion(contexto, comprobante_id)
+            if fila:
+                filas_validacion.append(fila)
+            fila = self._fila_clasificacion(contexto, comprobante_id)
+            if fila:
+                filas_clasificacion.append(fila)
+
+        self.detalle_repo.insertar_lote(filas_items)
+        self.validacion_repo.insertar_lote(filas_validacion)
+        self.clasificacion_repo.insertar_lote(filas_clasificacion)
+        self.ocr_repo.insertar_lote(filas_ocr)
+
+        logger.info(
+            f"{len(comprobante_ids)} comprobantes guardados en lote "
+            f"({len(filas_items)} ítems, {len(filas_ocr)} páginas OCR)"
+        )
+        return comprobante_ids
+
+    @staticmethod
+    def _ruc(contexto: PipelineContext) -> str:
+        emisor_data = contexto.comprobante_parseado["emisor"]
+        return "".join(filter(str.isdigit, emisor_data["ruc"]))[:11]
+
+    def _guardar_emisores(self, contextos: List[PipelineContext]) -> Dict[str, int]:
+        # un RUC por sentencia: ON CONFLICT no admite la misma fila dos veces
+        con_sunat: Dict[str, Dict] = {}
+        sin_sunat: Dict[str, Dict] = {}
+        for contexto in contextos:
+            ruc = self._ruc(contexto)
+            if self._validado_en_sunat(contexto):
+                con_sunat[ruc] = self._fila_emisor(contexto, ruc, validado_en=self._consultado_en_sunat(contexto))
+                sin_sunat.pop(ruc, None)
+            elif ruc not in con_sunat:
+                sin_sunat[ruc] = self._fila_emisor(contexto, ruc)
+
+        # solo los datos confirmados por SUNAT sobrescriben un emisor existente
+        # (y renuevan su validado_en; un hit del perfil de emisor no lo renueva)
+        ids = self.emisor_repo.upsert_lote(list(con_sunat.values()), actualizar=True)
+        ids.update(self.emisor_repo.upsert_lote(list(sin_sunat.values()), actualizar=False))
+        return ids
+
+    @staticmethod
+    def _validado_en_sunat(contexto: PipelineContext) -> bool:
+        validacion = contexto.validacion_sunat
+        return bool(validacion) and not validacion.get("fallback") \
+            and validacion.get("fuente_validacion") != "perfil_emisor"
+
+    @staticmethod
+    def _consultado_en_sunat(contexto: PipelineContext) -> Optional[datetime]:
+        # fecha de la consulta a SUNAT, no la de ahora: los datos pueden venir de cache_ruc
+        consultado_en = contexto.sunat_consultado_en.get(contexto.comprobante_parseado["emisor"]["ruc"])
+        if consultado_en is None:
+            return None
+        return datetime.fromtimestamp(consultado_en, tz=timezone.utc)
+
+    @staticmethod
+    def _fila_emisor(contexto: PipelineContext, ruc: str, validado_en: Optional[datetime] = None) -> Dict:
+        emisor_data = contexto.comprobante_parseado["emisor"]
+        validacion = contexto.validacion_sunat or {}
+
+        return {
+            "ruc": ruc,
+            "razon_social": validacion.get("razon_social") or emisor_data["razon_social"],
+            "nombre_comercial": validacion.get("nombre_comercial_sunat") or emisor_data.get("nombre_comercial"),
+            "ciiu_principal": validacion.get("ciiu"),
+            "estado_ruc": validacion.get("estado_ruc"),
+            "condicion_ruc": validacion.get("condicion_ruc"),
+            "validado_en": validado_en,
+        }
+
+    @staticmethod
+    def _fila_comprobante(contexto: PipelineContext, emisor_id: int) -> Dict:
+        comp_data = contexto.comprobante_parseado["comprobante"]
+        validacion = contexto.validacion_sunat
 
         # Determinar si es deducible
         es_deducible = None
         if validacion:
             es_deducible = validacion.get("pasa_reglas_basicas", False)
 
-        comprobante = self.comprobante_repo.crear(
-            id_usuario=self.contexto.usuario_id,
-            id_emisor=emisor_id,
-            tipo_comprobante=comp_data["tipo_comprobante"],
-            serie=comp_data["serie"],
-            numero=comp_data["numero"],
-            fecha_emision=comp_data["fecha_emision"],
-            monto_total=comp_data["monto_total"],
-            moneda=comp_data["moneda"],
-            origen=comp_data["origen"],
-            hash_archivo=self.contexto.hash_archivo,
-            estado_procesamiento="procesado",
-            es_deducible=es_deducible,
-            es_duplicado=False,
-            ruta_archivo=None,  # Se puede agregar después
-            mime_type=self.contexto.mime_type,
-        )
-
-        self.session.flush()  # Generar ID
-        return comprobante
-
-    def _guardar_items(self, comprobante_id: int):
-        items = self.contexto.comprobante_parseado.get("items", [])
-
-        for item in items:
-            self.detalle_repo.crear(
-                id_comprobante=comprobante_id,
-                descripcion=item["descripcion"],
-                cantidad=item.get("cantidad", 1.0),
-                precio_unitario=item.get("precio_unitario", 0.0),
-                monto_item=item["monto_item"],
-            )
-
-        logger.info(f"{len(items)} ítems guardados para comprobante {comprobante_id}")
-
-    def _guardar_validacion(self, comprobante_id: int):
-        validacion = self.contexto.validacion_sunat
+        return {
+            "id_usuario": contexto.usuario_id,
+            "id_emisor": emisor_id,
+            "tipo_comprobante": comp_data["tipo_comprobante"],
+            "serie": comp_data["serie"],
+            "numero": comp_data["numero"],
+            "fecha_emision": comp_data["fecha_emision"],
+            "monto_total": comp_data["monto_total"],
+            "moneda": comp_data["moneda"],
+            "origen": comp_data["origen"],
+            "hash_archivo": contexto.hash_archivo,
+            "estado_procesamiento": "procesado",
+            "es_deducible": es_deducible,
+            "es_duplicado": False,
+            "ruta_archivo": None,  # Se puede agregar después
+            "mime_type": contexto.mime_type,
+        }
+
+    @staticmethod
+    def _filas_items(contexto: PipelineContext, comprobante_id: int) -> List[Dict]:
+        items = contexto.comprobante_parseado.get("items", [])
+        return [
+            {
+                "id_comprobante": comprobante_id,
+                "descripcion": item["descripcion"],
+                "cantidad": item.get("cantidad", 1.0),
+                "precio_unitario": item.get("precio_unitario", 0.0),
+                "monto_item": item["monto_item"],
+            }
+            for item in items
+        ]
+
+    @staticmethod
+    def _fila_validacion(contexto: PipelineContext, comprobante_id: int) -> Optional[Dict]:
+        validacion = contexto.validacion_sunat
 
         if not validacion:
             logger.warning("No hay datos de validación SUNAT para guardar")
-            return
-
-        emisor_data = self.contexto.comprobante_parseado["emisor"]
-
-        self.validacion_repo.crear(
-            id_comprobante=comprobante_id,
-            estado_ruc=validacion.get("estado_ruc"),
-            condicion_ruc=validacion.get("condicion_ruc"),
-            ciiu_detectado=validacion.get("ciiu"),
-            nombre_comercial_sunat=validacion.get("nombre_comercial_sunat"),
-            nombre_emisor_ocr=emisor_data.get("razon_social"),
-            coincide_nombre=validacion.get("coincide_nombre"),
-            pasa_reglas=validacion.get("pasa_reglas_basicas"),
-            motivo_no_deducible=validacion.get("motivo_no_deducible"),
-        )
-
-    def _guardar_clasificacion(self, comprobante_id: int):
-        clasificacion = self.contexto.clasificacion
+            return None
+
+        emisor_data = contexto.comprobante_parseado["emisor"]
+
+        return {
+            "id_comprobante": comprobante_id,
+            "estado_ruc": validacion.get("estado_ruc"),
+            "condicion_ruc": validacion.get("condicion_ruc"),
+            "ciiu_detectado": validacion.get("ciiu"),
+            "nombre_comercial_sunat": validacion.get("nombre_comercial_sunat"),
+            "nombre_emisor_ocr": emisor_data.get("razon_social"),
+            "coincide_nombre": validacion.get("coincide_nombre"),
+            "pasa_reglas": validacion.get("pasa_reglas_basicas"),
+            "motivo_no_deducible": validacion.get("motivo_no_deducible"),
+        }
+
+    @staticmethod
+    def _fila_clasificacion(contexto: PipelineContext, comprobante_id: int) -> Optional[Dict]:
+        clasificacion = contexto.clasificacion
 
         if not clasificacion:
             logger.warning("No hay datos de clasificación para guardar")
-            return
-
-        self.clasificacion_repo.crear(
-            id_comprobante=comprobante_id,
-            categoria_gasto=clasificacion["categoria_gasto"],
-            porcentaje_deduccion=clasificacion["porcentaje_deduccion"],
-            ciiu_utilizado=clasificacion.get("ciiu_utilizado"),
-            version_regla=clasificacion.get("version_regla", "v1.0"),
-            fuente_clasificacion=clasificacion.get("fuente_clasificacion", "automatico"),
-        )
-
-    def _guardar_ocr_paginas(self, comprobante_id: int):
-        texto_ocr = self.contexto.get("texto_ocr")
-        confianza_ocr = self.contexto.get("confianza_ocr")
+            return None
+
+        return {
+            "id_comprobante": comprobante_id,
+            "categoria_gasto": clasificacion["categoria_gasto"],
+            "porcentaje_deduccion": clasificacion["porcentaje_deduccion"],
+            "ciiu_utilizado": clasificacion.get("ciiu_utilizado"),
+            "version_regla": clasificacion.get("version_regla", "v1.0"),
+            "fuente_clasificacion": clasificacion.get("fuente_clasificacion", "automatico"),
+        }
+
+    @staticmethod
+    def _filas_ocr(contexto: PipelineContext, comprobante_id: int) -> List[Dict]:
+        paginas = contexto.get("paginas_ocr")
+        if paginas:
+            # una fila por página, cada una con su confianza
+            return [
+                {
+                    "id_comprobante": comprobante_id,
+                    "numero_pagina": pagina["numero_pagina"],
+                    "texto_pagina": pagina["texto"],
+                    "confianza_promedio": pagina.get("confianza_promedio"),
+                }
+                for pagina in paginas
+            ]
+
+        texto_ocr = contexto.get("texto_ocr")
+        confianza_ocr = contexto.get("confianza_ocr")
 
         if not texto_ocr:
-            return
-
-        self.ocr_repo.crear(
-            id_comprobante=comprobante_id,
-            numero_pagina=1,
-            texto_pagina=texto_ocr,
-            confianza_promedio=confianza_ocr,
-        )
-
-        logger.info(f"Página OCR guardada para comprobante {comprobante_id}")
+            return []
+
+        return [{
+            "id_comprobante": comprobante_id,
+            "numero_pagina": 1,
+            "texto_pagina": texto_ocr,
+            "confianza_promedio": confianza_ocr,
+        }]
@@ -9,8 +9,11 @@ from agno.agent import Agent
 
 from app.config.settings import settings
 from app.db.repositories.comprobante_repositorio import ComprobanteRepositorio
+from app.features.agents.registro_agentes import estado_vinculado, get_agente
 from app.libs.models.model_selector import get_ollama
+from app.utils.extraccion_patron import extraer_serie_numero
 from app.utils.hashing import calcular_hash_bytes
+from app.utils.limpieza import candidatos_ruc
 from app.features.agents.prompts.validador_comprobante import PROMPT_SISTEMA
 
 class ValidationToolkit(Toolkit):
@@ -21,9 +24,16 @@ class ValidationToolkit(Toolkit):
     la estrategia de validación.
     """
 
-    def __init__(self, comprobante_repo: ComprobanteRepositorio):
+    def __init__(self, comprobante_repo: Optional[ComprobanteRepositorio] = None):
         super().__init__(name="validation_tools")
-        self.comprobante_repo = comprobante_repo
+        self._comprobante_repo = comprobante_repo
+
+    @property
+    def comprobante_repo(self) -> ComprobanteRepositorio:
+        # sin repositorio fijo, el del agente compartido se vincula en cada ejecución
+        if self._comprobante_repo is not None:
+            return self._comprobante_repo
+        return estado_vinculado("comprobante_repo")
 
     def calcular_hash(self, contenido_base64: str) -> str:
         """
@@ -131,13 +141,18 @@ class AgenteValidadorComprobante:
         """
         self.comprobante_repo = comprobante_repo
 
-        # Crear agente AGNO con autonomía
-        self.agent = Agent(
-            name="ValidadorComprobante",
-            model=get_ollama(),
-            tools=[ValidationToolkit(comprobante_repo)],
-            instructions=[PROMPT_SISTEMA],
-            markdown=False,
+    @property
+    def agent(self) -> Agent:
+        # Agente AGNO compartido; ejecutarlo dentro de vincular(comprobante_repo=...)
+        return get_agente(
+            "ValidadorComprobante",
+            lambda: Agent(
+                name="ValidadorComprobante",
+                model=get_ollama(),
+                tools=[ValidationToolkit()],
+                instructions=[PROMPT_SISTEMA],
+                markdown=False,
+            ),
         )
 
     def validar_archivo(
@@ -179,6 +194,43 @@ class AgenteValidadorComprobante:
             "motivo": "no_duplicado_hash"
         }
 
+    def validar_metadatos(self, usuario_id: int, texto_ocr: str) -> Optional[Dict]:
+        """
+        Buscar duplicado por RUC/serie/número leídos del texto OCR con patrones.
+
+        Corre antes del LLM y de SUNAT: una foto nueva de un comprobante ya
+        guardado tiene otro hash pero los mismos metadatos.
+
+        Args:
+            usuario_id: ID del usuario
+            texto_ocr: Texto completo del OCR
+
+        Returns:
+            Dict con info de duplicado o None (también si el texto no trae
+            RUC o serie-número reconocibles)
+        """
+        rucs = candidatos_ruc(texto_ocr)
+        serie_numero = extraer_serie_numero(texto_ocr)
+        if not rucs or not serie_numero or "-" not in serie_numero:
+            return None
+
+        serie, numero = serie_numero.rsplit("-", 1)
+        comprobante_existente = self.comprobante_repo.buscar_por_ruc_serie_numero(
+            id_usuario=usuario_id,
+            rucs=rucs,
+            serie=serie,
+            numero=numero,
+        )
+
+        if comprobante_existente:
+            return {
+                "es_duplicado": True,
+                "tipo_duplicado": "metadatos",
+                "comprobante_id": comprobante_existente.id_comprobante,
+            }
+
+        return None
+
     def _buscar_duplicado_fallback(
         self,
         usuario_id: int,
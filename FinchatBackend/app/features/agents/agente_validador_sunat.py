@@ -6,12 +6,17 @@ from typing import Dict, Optional
 
 from agno.tools import Toolkit
 from agno.agent import Agent
-from pydantic import BaseModel, Field
+from pydantic import ValidationError
 
 from app.config.settings import settings
+from app.features.agents.models import ValidacionSunatLlm
 from app.features.agents.pipeline_context import PipelineContext
+from app.features.agents.registro_agentes import estado_vinculado, get_agente, vincular
+from app.features.agents.reglas_sunat import evaluar_reglas
+from app.libs.models.cache_llm import clave_llm, get_cache_llm
 from app.libs.models.model_selector import get_ollama
-from app.features.agents.prompts.validador_sunat import PROMPT_SISTEMA
+from app.features.agents.prompts.validador_sunat import PROMPT_DATOS_EN_MENSAJE, PROMPT_SISTEMA
+from app.utils.ejecutores import ejecutar_en
 
 logger = logging.getLogger(__name__)
 
@@ -19,11 +24,22 @@ logger = logging.getLogger(__name__)
 class SunatToolkit(Toolkit):
     """Toolkit para consultas a SUNAT."""
 
-    def __init__(self, contexto: PipelineContext):
+    def __init__(self, contexto: Optional[PipelineContext] = None):
+        """
+        Args:
+            contexto: Contexto fijo; sin él se usa el vinculado a la ejecución
+                (el toolkit del agente compartido sirve a todas las peticiones)
+        """
         super().__init__(name="sunat_tools")
-        self.contexto = contexto
+        self._contexto = contexto
         # self.register(self.consultar_ruc) # Methods are auto-registered by default
 
+    @property
+    def contexto(self) -> PipelineContext:
+        if self._contexto is not None:
+            return self._contexto
+        return estado_vinculado("contexto")
+
     async def consultar_ruc(self, ruc: str) -> str:
         """
         Consulta información de un RUC en SUNAT.
@@ -49,17 +65,69 @@ class AgenteValidadorSunat:
             contexto: Contexto compartido del pipeline
         """
         self.contexto = contexto
+        self.modo = settings.sunat_validacion_modo
+        self._agent: Optional[Agent] = None
+
+    @property
+    def agent(self) -> Agent:
+        # El agente solo se construye si hace falta el LLM (modo llm o nombre ambiguo)
+        if self._agent is None:
+            # con salida estructurada los datos SUNAT van en el prompt: el schema
+            # restringe toda la generación y no deja emitir llamadas a herramientas
+            estructurada = settings.ollama_salida_estructurada
+            self._agent = get_agente(
+                f"ValidadorSUNAT:{'estructurada' if estructurada else 'herramientas'}",
+                lambda: Agent(
+                    name="ValidadorSUNAT",
+                    model=get_ollama(ValidacionSunatLlm),
+                    tools=[] if estructurada else [SunatToolkit()],
+                    instructions=[PROMPT_SISTEMA, PROMPT_DATOS_EN_MENSAJE] if estructurada else [PROMPT_SISTEMA],
+                    markdown=False,
+                ),
+            )
+        return self._agent
+
+    async def validar_completo(self, ruc: str, nombre_emisor_ocr: str) -> Dict:
+        """
+        Validar emisor en SUNAT.
+
+        Modos (settings.sunat_validacion_modo):
+            - "reglas": solo reglas deterministas.
+            - "hibrido": reglas; el LLM decide solo si la coincidencia de
+              nombres es ambigua.
+            - "llm": el agente decide todo (comportamiento original).
+        """
+        if self.modo == "llm":
+            return await self._validar_con_llm(ruc, nombre_emisor_ocr)
+
+        try:
+            datos = await self.contexto.get_sunat_data(ruc)
+        except Exception as e:
+            logger.error(f"Error consultando SUNAT para {ruc}: {e}")
+            datos = None
+
+        if not datos:
+            return self._fallback_response(ruc, motivo="No se obtuvieron datos de SUNAT para el RUC")
 
-        # Crear agente AGNO con modelo dual (Ollama/OpenAI)
-        self.agent = Agent(
-            name="ValidadorSUNAT",
-            model=get_ollama(),
-            tools=[SunatToolkit(contexto)],
-            instructions=[PROMPT_SISTEMA],
-            markdown=False,
+        resultado = evaluar_reglas(
+            datos,
+            nombre_emisor_ocr,
+            umbral_coincide=settings.sunat_umbral_coincide_nombre,
+            umbral_ambiguo=settings.sunat_umbral_ambiguo_nombre,
         )
+        validacion = resultado.validacion
 
-    async def validar_completo(self, ruc: str, nombre_emisor_ocr: str) -> Dict:
+        if resultado.ambiguo and self.modo == "hibrido":
+            logger.info(f"Nombre ambiguo para RUC {ruc} (similitud={resultado.similitud:.2f}), consultando LLM")
+            respuesta_llm = await self._validar_con_llm(ruc, nombre_emisor_ocr)
+            if not respuesta_llm.get("fallback"):
+                # estado/condición vienen de SUNAT; del LLM solo se toma la decisión de nombre
+                validacion["coincide_nombre"] = bool(respuesta_llm.get("coincide_nombre"))
+                validacion["fuente_validacion"] = "reglas+llm"
+
+        return validacion
+
+    async def _validar_con_llm(self, ruc: str, nombre_emisor_ocr: str) -> Dict:
         try:
             prompt = f"""
             Valida el siguiente emisor:
@@ -68,22 +136,41 @@ class AgenteValidadorSunat:
 
             Responde SOLO con el JSON estructurado.
             """
-
-            response = await self.agent.arun(prompt)
+            # ya en cache en modo híbrido: las reglas acaban de consultarlo
+            # (en modo herramientas, `consultar_ruc` lee el mismo cache)
+            datos = await self.contexto.get_sunat_data(ruc)
+            if settings.ollama_salida_estructurada:
+                if not datos:
+                    return self._fallback_response(ruc, motivo="No se obtuvieron datos de SUNAT para el RUC")
+                prompt += f"\nResultado de consultar_ruc: {json.dumps(datos, ensure_ascii=False)}"
+
+            # la respuesta depende de los datos SUNAT aunque no vayan en el prompt
+            # (modo herramientas): van en la clave para que un cambio de estado la invalide
+            cache = get_cache_llm() if datos else None
+            clave = clave_llm(self.agent, prompt, sunat=datos) if cache else None
+            # disco (y en la primera escritura un recorrido del directorio): fuera del event loop
+            content = await ejecutar_en("bd", cache.obtener, clave) if cache else None
+            if content is not None:
+                return ValidacionSunatLlm.model_validate_json(content).model_dump()
+
+            with vincular(contexto=self.contexto):
+                response = await self.agent.arun(prompt)
 
             try:
                 content = response.content.replace("```json", "").replace("```", "").strip() #  limpia los bloques de codigo si el llm lo incluye
-                resultado = json.loads(content)
-                return resultado
-            except json.JSONDecodeError:
+                resultado = ValidacionSunatLlm.model_validate_json(content).model_dump()
+            except ValidationError:
                 logger.error(f"Error parseando respuesta JSON del agente: {response.content}")
                 return self._fallback_response(ruc)
+            if cache:
+                await ejecutar_en("bd", cache.guardar, clave, content)
+            return resultado
 
         except Exception as e:
             logger.error(f"Error en AgenteValidadorSunat: {e}")
             return self._fallback_response(ruc)
 
-    def _fallback_response(self, ruc: str) -> Dict:
+    def _fallback_response(self, ruc: str, motivo: str = "Error interno en agente de validación") -> Dict:
         return {
             "estado_ruc": "DESCONOCIDO",
             "condicion_ruc": "DESCONOCIDO",
@@ -92,6 +179,6 @@ class AgenteValidadorSunat:
             "nombre_comercial_sunat": None,
             "coincide_nombre": False,
             "pasa_reglas_basicas": False,
-            "motivo_no_deducible": "Error interno en agente de validación",
+            "motivo_no_deducible": motivo,
             "fallback": True
         }
@@ -0,0 +1,176 @@
+"""
+Cache de consultas RUC a SUNAT compartido por todo el proceso.
+
+Dos niveles: memoria (LRU con expiración) y la tabla `cache_ruc`, que
+sobrevive reinicios y se comparte entre procesos. Los RUC que SUNAT no
+encuentra se cachean con un TTL más corto (cache negativo) y las consultas
+concurrentes por el mismo RUC se resuelven con un solo scraping.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.config.settings import settings
+from app.db.repositories import CacheRucRepositorio
+from app.db.sesion import Session
+from app.libs.sunat_scraper.ruc_scraper import ESTADO_ENCONTRADO, ESTADO_NO_ENCONTRADO
+from app.utils.ejecutores import ejecutar_en
+
+logger = logging.getLogger(__name__)
+
+# función que consulta SUNAT: ruc -> (estado, datos)
+ConsultaRuc = Callable[[str], Awaitable[Tuple[str, Optional[Dict]]]]
+
+_AUSENTE = object()
+
+
+class RucCache:
+    def __init__(
+        self,
+        ttl_seg: Optional[float] = None,
+        ttl_negativo_seg: Optional[float] = None,
+        max_memoria: Optional[int] = None,
+    ):
+        self.ttl_seg = ttl_seg or settings.sunat_cache_ttl_horas * 3600
+        self.ttl_negativo_seg = ttl_negativo_seg or settings.sunat_cache_ttl_negativo_horas * 3600
+        self.max_memoria = max_memoria or settings.sunat_cache_max_memoria
+
+        # ruc -> (expira_en epoch, datos o None si no existe, consultado_en epoch)
+        self._memoria: "OrderedDict[str, Tuple[float, Optional[Dict], float]]" = OrderedDict()
+        self._en_vuelo: Dict[str, asyncio.Future] = {}
+
+        self.hits_memoria = 0
+        self.hits_bd = 0
+        self.misses = 0
+        self.deduplicadas = 0
+
+    async def obtener(self, ruc: str, consultar: ConsultaRuc) -> Optional[Dict]:
+        """
+        Datos SUNAT del RUC desde cache, o consultando con `consultar`.
+
+        Returns:
+            Dict con los datos del contribuyente, o None si no existe o la
+            consulta falló (los fallos no se cachean).
+        """
+        datos = self._leer_memoria(ruc)
+        if datos is not _AUSENTE:
+            self.hits_memoria += 1
+            return datos
+
+        # single-flight: si ya hay una consulta en curso para este RUC, esperarla
+        futuro = self._en_vuelo.get(ruc)
+        if futuro is not None:
+            self.deduplicadas += 1
+        else:
+            futuro = asyncio.ensure_future(self._resolver(ruc, consultar))
+            self._en_vuelo[ruc] = futuro
+            futuro.add_done_callback(lambda _: self._en_vuelo.pop(ruc, None))
+
+        # shield: cancelar a un solicitante no cancela la consulta compartida
+        return await asyncio.shield(futuro)
+
+    def consultado_en(self, ruc: str) -> Optional[float]:
+        """
+        Epoch de la consulta a SUNAT de la que salen los datos cacheados del RUC.
+
+        Puede ser anterior al proceso si vinieron de la tabla `cache_ruc`.
+        None si el RUC no está en memoria.
+        """
+        entrada = self._memoria.get(ruc)
+        return entrada[2] if entrada is not None else None
+
+    async def _resolver(self, ruc: str, consultar: ConsultaRuc) -> Optional[Dict]:
+        registro = await ejecutar_en("bd", self._leer_bd, ruc)
+        if registro is not None:
+            encontrado, datos, consultado_en = registro
+            ttl = self.ttl_seg if encontrado else self.ttl_negativo_seg
+            expira_en = consultado_en.timestamp() + ttl
+            if expira_en > time.time():
+                self.hits_bd += 1
+                self._escribir_memoria(ruc, datos if encontrado else None, expira_en, consultado_en.timestamp())
+                return datos if encontrado else None
+
+        self.misses += 1
+        estado, datos = await consultar(ruc)
+
+        ahora = time.time()
+        if estado == ESTADO_ENCONTRADO and datos:
+            self._escribir_memoria(ruc, datos, ahora + self.ttl_seg, ahora)
+            await ejecutar_en("bd", self._guardar_bd, ruc, True, datos)
+        elif estado == ESTADO_NO_ENCONTRADO:
+            self._escribir_memoria(ruc, None, ahora + self.ttl_negativo_seg, ahora)
+            await ejecutar_en("bd", self._guardar_bd, ruc, False, None)
+
+        return datos
+
+    def _leer_memoria(self, ruc: str):
+        entrada = self._memoria.get(ruc)
+        if entrada is None:
+            return _AUSENTE
+        expira_en, datos, _ = entrada
+        if expira_en <= time.time():
+            del self._memoria[ruc]
+            return _AUSENTE
+        self._memoria.move_to_end(ruc)
+        return datos
+
+    def _escribir_memoria(self, ruc: str, datos: Optional[Dict], expira_en: float, consultado_en: float) -> None:
+        self._memoria[ruc] = (expira_en, datos, consultado_en)
+        self._memoria.move_to_end(ruc)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+
+    def _leer_bd(self, ruc: str) -> Optional[Tuple[bool, Optional[Dict], datetime]]:
+        session = Session()
+        try:
+            registro = CacheRucRepositorio(session).obtener(ruc)
+            if registro is None:
+                return None
+            consultado_en = registro.consultado_en
+            if consultado_en.tzinfo is None:
+                consultado_en = consultado_en.replace(tzinfo=timezone.utc)
+            return registro.encontrado, registro.datos, consultado_en
+        except Exception as e:
+            logger.warning(f"[CacheRuc] No se pudo leer cache_ruc para {ruc}: {e}")
+            return None
+        finally:
+            session.close()
+
+    def _guardar_bd(self, ruc: str, encontrado: bool, datos: Optional[Dict]) -> None:
+        session = Session()
+        try:
+            CacheRucRepositorio(session).guardar(ruc, encontrado, datos)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"[CacheRuc] No se pudo guardar cache_ruc para {ruc}: {e}")
+        finally:
+            session.close()
+
+    def estadisticas(self) -> Dict:
+        total = self.hits_memoria + self.hits_bd + self.misses
+        return {
+            "entradas_memoria": len(self._memoria),
+            "en_vuelo": len(self._en_vuelo),
+            "hits_memoria": self.hits_memoria,
+            "hits_bd": self.hits_bd,
+            "misses": self.misses,
+            "deduplicadas": self.deduplicadas,
+            "hit_rate": round((self.hits_memoria + self.hits_bd) / total, 3) if total else 0.0,
+        }
+
+
+_cache: Optional[RucCache] = None
+
+
+def get_ruc_cache() -> RucCache:
+    global _cache
+    if _cache is None:
+        _cache = RucCache()
+    return _cache
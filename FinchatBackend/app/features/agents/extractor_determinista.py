@@ -0,0 +1,312 @@
+"""
+Extracción determinista del comprobante desde el texto OCR.
+
+Usa `extraer_campos` de `app.utils.extraccion_patron` (serie-número, fecha,
+moneda, cliente y línea del importe total, en una sola pasada) y las limpiezas de
+`app.utils.limpieza`, y verifica lo extraído: dígito verificador del RUC,
+fecha en rango y que los ítems sumen el total. Cada campo lleva una
+confianza 0-1; el parseador solo llama al LLM cuando algún campo requerido
+falta, no llega al umbral o es inconsistente.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.utils import patrones
+from app.utils.extraccion_patron import (
+    CamposTexto,
+    extraer_campos,
+    extraer_items,
+    moneda_por_palabras,
+    nombre_antes_de_ruc,
+    tipo_por_palabras,
+)
+from app.utils.limpieza import limpiar_monto, normalizar_moneda, parsear_fecha, ruc_valido
+
+CAMPOS_REQUERIDOS = ("ruc", "serie", "numero", "fecha_emision", "monto_total")
+
+# campo -> sección del comprobante parseado en la que vive
+_SECCION = {
+    "ruc": "emisor",
+    "razon_social": "emisor",
+    "tipo_comprobante": "comprobante",
+    "serie": "comprobante",
+    "numero": "comprobante",
+    "fecha_emision": "comprobante",
+    "moneda": "comprobante",
+    "monto_total": "comprobante",
+}
+
+_RE_DECIMAL_COMA = re.compile(r"(\d),(\d{2})(?![\d,])")
+
+
+@dataclass
+class ExtraccionDeterminista:
+    comprobante: Dict
+    emisor: Dict
+    items: List[Dict]
+    cliente: Dict
+    confianza: Dict[str, float]
+    # campo -> motivo por el que el valor no es fiable
+    inconsistencias: Dict[str, str] = field(default_factory=dict)
+    fuente: str = "patrones"
+
+    def valor(self, campo: str):
+        if campo == "items":
+            return self.items
+        return getattr(self, _SECCION[campo]).get(campo)
+
+    def campos_pendientes(self, umbral: float) -> List[str]:
+        """Campos requeridos que faltan, no llegan al umbral o son inconsistentes."""
+        return [
+            campo for campo in CAMPOS_REQUERIDOS
+            if self.valor(campo) in (None, "")
+            or self.confianza.get(campo, 0.0) < umbral
+            or campo in self.inconsistencias
+        ]
+
+    def requiere_llm(self, umbral: float) -> bool:
+        return bool(self.campos_pendientes(umbral))
+
+    def como_dict(self, texto_ocr: str) -> Dict:
+        """Dict con el esquema de ComprobanteParsed."""
+        return {
+            "comprobante": dict(self.comprobante),
+            "emisor": dict(self.emisor),
+            "items": [dict(i) for i in self.items],
+            "cliente": dict(self.cliente),
+            "confianza_parsing": min(self.confianza.get(c, 0.0) for c in CAMPOS_REQUERIDOS),
+            "texto_completo_ocr": texto_ocr,
+        }
+
+    def completar(self, parsed: Dict, umbral: float) -> Dict:
+        """
+        Sobrescribe en un parseo del LLM los campos que aquí salieron confiables.
+
+        Un RUC con dígito verificador válido o un total que cuadra con los
+        ítems es más fiable que lo que devuelva el modelo.
+        """
+        for campo, seccion in _SECCION.items():
+            valor = self.valor(campo)
+            if valor in (None, "") or campo in self.inconsistencias:
+                continue
+            if self.confianza.get(campo, 0.0) < umbral:
+                continue
+            if not isinstance(parsed.get(seccion), dict):
+                parsed[seccion] = {}
+            parsed[seccion][campo] = valor
+        return parsed
+
+
+def _ruc(texto: str, excluir: Optional[str]) -> Tuple[Optional[str], float]:
+    normalizado = texto.translate(patrones.OCR_DIGITOS)
+    candidatos = [m for m in patrones.RUC.finditer(normalizado) if m.group(1) != excluir]
+    if not candidatos:
+        return None, 0.0
+
+    for match in candidatos:
+        etiquetado = "RUC" in normalizado[max(0, match.start() - 12):match.start()].upper()
+        if ruc_valido(match.group(1)):
+            return match.group(1), 0.95 if etiquetado else 0.85
+    return candidatos[0].group(1), 0.3
+
+
+def _razon_social(lineas: List[str], ruc: Optional[str]) -> Tuple[Optional[str], float]:
+    if ruc:
+        for idx, linea in enumerate(lineas):
+            if ruc not in linea.translate(patrones.OCR_DIGITOS).replace(" ", ""):
+                continue
+            # el nombre antes de la etiqueta RUC o en la línea anterior
+            previo = nombre_antes_de_ruc(linea)
+            if previo and not any(c.isdigit() for c in previo):
+                return previo, 0.85
+            if idx > 0:
+                return lineas[idx - 1], 0.8
+            break
+    return (lineas[0], 0.5) if lineas else (None, 0.0)
+
+
+def _serie_numero(campos: CamposTexto) -> Tuple[Optional[str], Optional[str], float]:
+    serie_numero = campos.serie_numero
+    if not serie_numero or "-" not in serie_numero:
+        return None, None, 0.0
+
+    serie, numero = serie_numero.rsplit("-", 1)
+    numero = numero.lstrip("0") or "0"
+    if patrones.SERIE_ELECTRONICA.match(serie):
+        return serie, numero, 0.95
+    if patrones.SERIE_FISICA.match(serie):
+        return serie, numero, 0.85
+    return serie, numero, 0.4
+
+
+def _fecha(campos: CamposTexto) -> Tuple[Optional[str], float]:
+    fecha = parsear_fecha(campos.fecha) if campos.fecha else None
+    if fecha is None:
+        return None, 0.0
+
+    if campos.fecha_etiquetada:
+        confianza = 0.95
+    elif len(campos.fechas) == 1:
+        # la única fecha del documento, aunque no tenga etiqueta
+        confianza = 0.85
+    else:
+        confianza = 0.6
+    return fecha.isoformat(), confianza
+
+
+def _monto_total(campos: CamposTexto) -> Tuple[Optional[float], float]:
+    linea = campos.linea_importe_total
+    if not linea:
+        return None, 0.0
+    monto = limpiar_monto(_RE_DECIMAL_COMA.sub(r"\1.\2", linea))
+    if monto is None:
+        return None, 0.0
+    # "Total" a secas también aparece en cabeceras de columna
+    return monto, 0.75 if campos.etiqueta_total == "Total" else 0.9
+
+
+def _moneda(texto: str, campos: CamposTexto) -> Tuple[str, float]:
+    explicita = campos.moneda
+    if explicita:
+        return normalizar_moneda(explicita), 0.9
+    por_palabras = moneda_por_palabras(texto)
+    if por_palabras:
+        return por_palabras, 0.8
+    return "PEN", 0.6
+
+
+def _tipo(texto: str, serie: Optional[str]) -> Tuple[str, float]:
+    por_palabras = tipo_por_palabras(texto)
+    if por_palabras:
+        return por_palabras, 0.9
+    if serie and serie[0] in "FB":
+        return ("factura" if serie[0] == "F" else "boleta"), 0.8
+    return "boleta", 0.5
+
+
+def _cliente(campos: CamposTexto) -> Dict:
+    doc = campos.dni_cliente
+    tipo_doc = None
+    if doc:
+        tipo_doc = "DNI" if len(doc) == 8 else "RUC"
+    return {"nombre_cliente": campos.nombre_cliente, "doc_cliente": doc, "tipo_doc_cliente": tipo_doc}
+
+
+def _combinar(extraccion: ExtraccionDeterminista, estructura: Dict) -> None:
+    """Toma de la estructura del PDF digital los campos con confianza igual o mayor."""
+    confianza = estructura.get("confianza", {})
+    desde_estructura = set()
+    for campo, seccion in _SECCION.items():
+        valor = estructura.get(seccion, {}).get(campo)
+        if valor in (None, "") or confianza.get(campo, 0.0) < extraccion.confianza.get(campo, 0.0):
+            continue
+        getattr(extraccion, seccion)[campo] = valor
+        extraccion.confianza[campo] = confianza[campo]
+        desde_estructura.add(campo)
+
+    if estructura.get("items") and confianza.get("items", 0.0) >= extraccion.confianza.get("items", 0.0):
+        extraccion.items = [dict(i) for i in estructura["items"]]
+        extraccion.confianza["items"] = confianza["items"]
+
+    if desde_estructura.issuperset(CAMPOS_REQUERIDOS):
+        extraccion.fuente = "pdf_estructurado"
+
+
+def _verificar(extraccion: ExtraccionDeterminista) -> None:
+    """Marca inconsistencias y deja los ítems cuadrados con el total."""
+    ruc = extraccion.emisor.get("ruc")
+    if ruc and not ruc_valido(ruc):
+        extraccion.inconsistencias["ruc"] = "dígito verificador inválido"
+
+    fecha = extraccion.comprobante.get("fecha_emision")
+    if fecha and not date(2000, 1, 1) <= date.fromisoformat(fecha) <= date.today() + timedelta(days=1):
+        extraccion.inconsistencias["fecha_emision"] = "fecha fuera de rango"
+
+    total = extraccion.comprobante.get("monto_total")
+    if total is not None and total <= 0:
+        extraccion.inconsistencias["monto_total"] = "total no positivo"
+
+    if total and extraccion.items and abs(sum(i["monto_item"] for i in extraccion.items) - total) <= 0.05:
+        extraccion.confianza["items"] = max(extraccion.confianza.get("items", 0.0), 0.9)
+        return
+
+    # ítems que no suman el total: se resume en una sola línea por el total
+    if extraccion.items:
+        extraccion.inconsistencias["items"] = "los ítems no suman el total"
+    extraccion.items = [{
+        "descripcion": "CONSUMO",
+        "cantidad": 1.0,
+        "precio_unitario": total or 0.0,
+        "monto_item": total or 0.0,
+    }]
+    extraccion.confianza["items"] = 0.5
+
+
+def extraer_comprobante(
+    texto_ocr: str,
+    confianza_ocr: float = 1.0,
+    estructura: Optional[Dict] = None,
+) -> ExtraccionDeterminista:
+    """
+    Extrae el comprobante del texto OCR sin usar el LLM.
+
+    Args:
+        texto_ocr: Texto completo del OCR
+        confianza_ocr: Confianza promedio del OCR; limita la de cada campo
+        estructura: Resultado de `extraer_estructura` para PDFs digitales, si existe
+
+    Returns:
+        ExtraccionDeterminista con los datos, la confianza por campo y las inconsistencias
+    """
+    lineas = [ln.strip() for ln in texto_ocr.splitlines() if ln.strip()]
+    campos = extraer_campos(texto_ocr)
+    cliente = _cliente(campos)
+    doc_cliente = cliente["doc_cliente"] if cliente["tipo_doc_cliente"] == "RUC" else None
+
+    ruc, conf_ruc = _ruc(texto_ocr, excluir=doc_cliente)
+    razon_social, conf_nombre = _razon_social(lineas, ruc)
+    serie, numero, conf_serie = _serie_numero(campos)
+    fecha, conf_fecha = _fecha(campos)
+    total, conf_total = _monto_total(campos)
+    moneda, conf_moneda = _moneda(texto_ocr, campos)
+    tipo, conf_tipo = _tipo(texto_ocr, serie)
+    items = extraer_items(lineas)
+
+    # un texto OCR dudoso no puede dar campos más confiables que él mismo
+    tope = min(1.0, confianza_ocr + 0.05)
+    confianza = {
+        "ruc": conf_ruc,
+        "razon_social": conf_nombre,
+        "serie": conf_serie,
+        "numero": conf_serie,
+        "fecha_emision": conf_fecha,
+        "monto_total": conf_total,
+        "tipo_comprobante": conf_tipo,
+        "moneda": conf_moneda,
+        "items": 0.0,
+    }
+    extraccion = ExtraccionDeterminista(
+        comprobante={
+            "tipo_comprobante": tipo,
+            "serie": serie,
+            "numero": numero,
+            "fecha_emision": fecha,
+            "moneda": moneda,
+            "monto_total": total,
+            "origen": "electronico" if "ELECTR" in texto_ocr.upper() else "fisico",
+        },
+        emisor={"ruc": ruc, "razon_social": razon_social, "nombre_comercial": None},
+        items=items,
+        cliente=cliente,
+        confianza={campo: min(valor, tope) for campo, valor in confianza.items()},
+    )
+
+    if estructura:
+        _combinar(extraccion, estructura)
+    _verificar(extraccion)
+    return extraccion
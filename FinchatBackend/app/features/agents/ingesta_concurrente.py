@@ -0,0 +1,133 @@
+"""
+Ingesta concurrente de varios archivos en tubería.
+
+Cada archivo pasa por las etapas de `IngestaWorkflow` (ETAPAS_INGESTA) en el
+motor de etapas: mientras un archivo está en el LLM, el siguiente puede estar
+en OCR y el anterior en SUNAT. Cada etapa tiene sus workers y su cola acotada
+(settings `etapa_*`); los semáforos limitan los archivos en vuelo por request
+y en todo el proceso.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from app.config.settings import settings
+from app.db.sesion import Session
+from app.features.agents.motor_etapas import Elemento, Etapa, MotorEtapas
+from app.features.agents.pipeline_ingesta import ETAPAS_INGESTA, EstadoIngesta, IngestaWorkflow
+
+logger = logging.getLogger(__name__)
+
+# semáforo compartido por todos los requests del proceso
+_semaforo_global: Optional[asyncio.Semaphore] = None
+
+
+def _get_semaforo_global() -> asyncio.Semaphore:
+    global _semaforo_global
+    if _semaforo_global is None:
+        _semaforo_global = asyncio.Semaphore(max(1, settings.ingesta_concurrencia_global))
+    return _semaforo_global
+
+
+def _resultado_error(error: Exception) -> Dict:
+    return {
+        "exito": False,
+        "duplicado": False,
+        "comprobante_id": None,
+        "hash_archivo": None,
+        "error": str(error),
+        "error_tipo": type(error).__name__,
+        "mensaje": f"Error en workflow: {str(error)}",
+    }
+
+
+@dataclass
+class _ArchivoEnCurso:
+    estado: EstadoIngesta
+    session: Any = None
+    workflow: Optional[IngestaWorkflow] = None
+
+    def abrir(self) -> None:
+        # cada archivo usa su propio workflow y su propia sesión de BD
+        if self.workflow is None:
+            self.session = Session()
+            self.workflow = IngestaWorkflow(self.session)
+
+
+def _paso(nombre: str):
+    async def ejecutar(archivo: _ArchivoEnCurso) -> bool:
+        archivo.abrir()
+        return await archivo.workflow.ejecutar_etapa(nombre, archivo.estado)
+    return ejecutar
+
+
+def etapas_ingesta() -> List[Etapa]:
+    """Etapas de la ingesta con los workers configurados para cada una."""
+    return [
+        Etapa(
+            nombre=nombre,
+            funcion=_paso(nombre),
+            workers=getattr(settings, f"etapa_{nombre}_workers"),
+            capacidad=settings.etapa_capacidad_cola,
+        )
+        for nombre in ETAPAS_INGESTA
+    ]
+
+
+async def _resultado(elemento: Elemento) -> Dict:
+    """Resultado del archivo al salir del pipeline; cierra su sesión de BD."""
+    archivo: _ArchivoEnCurso = elemento.valor
+    error = elemento.error
+    if error is not None:
+        logger.error(f"[Ingesta] Error procesando {archivo.estado.input_data.get('nombre_archivo')}: {error}")
+    try:
+        if archivo.workflow is None:
+            return _resultado_error(error)
+        if error is not None:
+            return await archivo.workflow.resultado_error(archivo.estado, error)
+        return archivo.workflow.resultado(archivo.estado)
+    except Exception as e:
+        logger.error(f"[Ingesta] Error armando el resultado de {archivo.estado.input_data.get('nombre_archivo')}: {e}")
+        return _resultado_error(e)
+    finally:
+        if archivo.session is not None:
+            archivo.session.close()
+
+
+def _descartar(elemento: Elemento) -> None:
+    """Cierra la sesión de un archivo que quedó en vuelo al cancelarse el request."""
+    archivo: _ArchivoEnCurso = elemento.valor
+    if archivo.session is not None:
+        archivo.session.close()
+
+
+async def procesar_archivos(
+    archivos: List[Dict[str, Any]],
+    concurrencia: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Procesar varios archivos en tubería con concurrencia acotada.
+
+    Args:
+        archivos: Lista de input_data para IngestaWorkflow.run
+        concurrencia: Máximo de archivos en vuelo para este request
+            (por defecto settings.ingesta_concurrencia_por_request)
+
+    Returns:
+        Lista de resultados en el mismo orden que `archivos`. Un error en un
+        archivo no afecta a los demás.
+    """
+    limite = concurrencia or settings.ingesta_concurrencia_por_request
+    semaforo_request = asyncio.Semaphore(max(1, limite))
+
+    elementos = await MotorEtapas(etapas_ingesta()).procesar(
+        [_ArchivoEnCurso(EstadoIngesta(input_data=archivo)) for archivo in archivos],
+        admision=(semaforo_request, _get_semaforo_global()),
+        al_salir=_resultado,
+        al_descartar=_descartar,
+    )
+    return [elemento.resultado for elemento in elementos]
@@ -3,7 +3,10 @@ from app.features.agents.models.modelos import (
     EmisorData,
     ItemData,
     ClienteData,
+    ComprobanteSalidaLlm,
     ComprobanteParsed,
+    ValidacionSunatLlm,
+    ClasificacionLlm,
 )
 
 __all__ = [
@@ -11,5 +14,8 @@ __all__ = [
     "EmisorData",
     "ItemData",
     "ClienteData",
+    "ComprobanteSalidaLlm",
     "ComprobanteParsed",
+    "ValidacionSunatLlm",
+    "ClasificacionLlm",
 ]
@@ -39,11 +39,36 @@ class ClienteData(BaseModel):
     tipo_doc_cliente: Optional[str] = Field(None, description="Tipo: DNI, RUC, etc.")
 
 
-class ComprobanteParsed(BaseModel):
-    """Resultado completo del parsing con datos para todas las tablas."""
+class ComprobanteSalidaLlm(BaseModel):
+    """Lo que el LLM parseador debe generar; su JSON schema restringe la decodificación."""
     comprobante: ComprobanteData
     emisor: EmisorData
     items: List[ItemData] = Field(description="Lista de ítems del detalle")
     cliente: ClienteData = Field(default_factory=ClienteData)
+
+
+class ComprobanteParsed(ComprobanteSalidaLlm):
+    """Resultado completo del parsing con datos para todas las tablas."""
     confianza_parsing: float = Field(default=0.0, description="Confianza del parsing (0-1)")
     texto_completo_ocr: str = Field(default="", description="Texto completo extraído por OCR")
+
+
+class ValidacionSunatLlm(BaseModel):
+    """Salida del agente ValidadorSUNAT."""
+    estado_ruc: str = Field(..., description="Estado del contribuyente: ACTIVO, BAJA, etc.")
+    condicion_ruc: str = Field(..., description="Condición del contribuyente: HABIDO, NO HABIDO, etc.")
+    ciiu: Optional[str] = Field(None, description="Código CIIU de la actividad económica principal")
+    razon_social: str = Field(..., description="Razón social oficial en SUNAT")
+    nombre_comercial_sunat: Optional[str] = Field(None, description="Nombre comercial en SUNAT")
+    coincide_nombre: bool = Field(..., description="Si el nombre del OCR corresponde al emisor")
+    pasa_reglas_basicas: bool = Field(..., description="ACTIVO y HABIDO")
+    motivo_no_deducible: Optional[str] = Field(None, description="Motivo si no pasa las reglas")
+
+
+class ClasificacionLlm(BaseModel):
+    """Salida del agente ClasificadorGastos."""
+    categoria_gasto: str = Field(..., description="Código de categoría de gasto")
+    porcentaje_deduccion: float = Field(..., description="Porcentaje deducible")
+    ciiu_utilizado: Optional[str] = Field(None, description="CIIU usado para clasificar")
+    version_regla: Optional[str] = Field(None, description="Versión de las reglas de clasificación")
+    fuente_clasificacion: str = Field("llm", description="Origen de la regla aplicada")
@@ -0,0 +1,127 @@
+"""
+Motor de clasificación de gastos por CIIU sin LLM.
+
+Cada versión de reglas se compila una sola vez en un índice de prefijos
+(CIIU exacto y reglas por prefijo en el mismo diccionario), de modo que
+clasificar es buscar, de mayor a menor longitud, los prefijos del CIIU.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# grupo SUNAT -> código de categoria_gasto que se guarda en clasificacion
+CATEGORIAS_POR_GRUPO = {
+    "Restaurantes, bares y hoteles": "hotelesRestaurantes",
+    "Servicios de médicos y odontólogos": "serviciosMedicos",
+    "Servicios profesionales y oficios (4ta)": "serviciosProfesionales",
+    "Aportaciones a EsSalud por trabajadoras/es del hogar": "essaludTrabajadorHogar",
+}
+CATEGORIA_DEFAULT = "gastoGeneral"
+
+
+@dataclass(frozen=True)
+class ReglaCiiu:
+    prefijo: str
+    categoria: str
+    deduccion: float
+    tipo_regla: str
+    grupo_sunat: str
+    requiere_renta_cuarta: bool
+    nota: str
+    fuente: str
+
+    @property
+    def categoria_gasto(self) -> str:
+        return CATEGORIAS_POR_GRUPO.get(self.grupo_sunat, CATEGORIA_DEFAULT)
+
+
+@dataclass
+class ConjuntoReglas:
+    """Versión de reglas compilada en un índice de prefijos."""
+
+    version: str
+    _indice: Dict[str, ReglaCiiu] = field(default_factory=dict, repr=False)
+    _longitudes: Tuple[int, ...] = ()
+
+    @classmethod
+    def desde_tablas(cls, version: str, mapeo_exacto: Dict[str, Dict], reglas_prefijo: List[Dict]) -> "ConjuntoReglas":
+        """
+        Compila las tablas de mapeo de una versión.
+
+        Args:
+            version: Identificador que se guarda en `version_regla`
+            mapeo_exacto: CIIU de 4 dígitos -> datos (formato MAPEO_CIIU_CATEGORIAS)
+            reglas_prefijo: Reglas por prefijo (formato REGLAS_CIIU_PREFIJO)
+
+        Returns:
+            ConjuntoReglas listo para clasificar
+        """
+        indice: Dict[str, ReglaCiiu] = {}
+
+        for regla in reglas_prefijo:
+            prefijo = regla["prefijo"]
+            # si dos reglas comparten prefijo gana la primera, como en la búsqueda lineal
+            indice.setdefault(prefijo, cls._compilar(prefijo, regla, f"ciiu_prefijo_{prefijo}"))
+
+        # el CIIU exacto es el prefijo más largo posible y pisa a cualquier regla
+        for ciiu, datos in mapeo_exacto.items():
+            indice[ciiu] = cls._compilar(ciiu, datos, "ciiu_exacto")
+
+        longitudes = tuple(sorted({len(p) for p in indice}, reverse=True))
+        return cls(version=version, _indice=indice, _longitudes=longitudes)
+
+    @staticmethod
+    def _compilar(prefijo: str, datos: Dict, fuente: str) -> ReglaCiiu:
+        return ReglaCiiu(
+            prefijo=prefijo,
+            categoria=datos["categoria"],
+            deduccion=float(datos["deduccion"]),
+            tipo_regla=datos.get("tipo_regla", "general"),
+            grupo_sunat=datos.get("grupo_sunat", ""),
+            requiere_renta_cuarta=datos.get("requiere_renta_cuarta", False),
+            nota=datos.get("nota", ""),
+            fuente=fuente,
+        )
+
+    def buscar(self, ciiu: Optional[str]) -> Optional[ReglaCiiu]:
+        """Regla con el prefijo más largo que coincide con el CIIU, o None."""
+        if not ciiu:
+            return None
+        ciiu = ciiu.strip()
+        for longitud in self._longitudes:
+            if longitud <= len(ciiu):
+                regla = self._indice.get(ciiu[:longitud])
+                if regla is not None:
+                    return regla
+        return None
+
+    def clasificar(self, ciiu: Optional[str]) -> Optional[Dict]:
+        """
+        Clasificación del comprobante para el CIIU del emisor.
+
+        Returns:
+            Dict con el esquema de `contexto.clasificacion`, o None si el CIIU
+            no está mapeado en esta versión.
+        """
+        if not ciiu:
+            return {
+                "categoria_gasto": CATEGORIA_DEFAULT,
+                "porcentaje_deduccion": 0.0,
+                "ciiu_utilizado": None,
+                "version_regla": self.version,
+                "fuente_clasificacion": "sin_ciiu",
+            }
+
+        regla = self.buscar(ciiu)
+        if regla is None:
+            return None
+
+        return {
+            "categoria_gasto": regla.categoria_gasto,
+            "porcentaje_deduccion": regla.deduccion,
+            "ciiu_utilizado": ciiu.strip(),
+            "version_regla": self.version,
+            "fuente_clasificacion": regla.fuente,
+        }
@@ -0,0 +1,247 @@
+"""
+Motor de etapas en tubería (pipeline) con colas acotadas.
+
+Cada etapa tiene su cola de entrada de capacidad fija y su propio número de
+workers. Un elemento pasa a la cola de la etapa siguiente apenas termina la
+actual, así mientras el archivo N está en el LLM, el N+1 puede estar en OCR y
+el N-1 en SUNAT. Cuando una cola se llena, la etapa anterior espera al
+encolar: esa es la contrapresión, y el tiempo bloqueado queda en las
+estadísticas para dimensionar los workers.
+
+Las estadísticas son por nombre de etapa y acumulan todas las ejecuciones del
+proceso (`estadisticas_etapas`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Etapa:
+    """
+    Etapa del motor.
+
+    `funcion` recibe el valor del elemento y devuelve True para seguir a la
+    etapa siguiente o False si el elemento ya terminó (p. ej. un duplicado).
+    Una excepción también saca al elemento del pipeline.
+    """
+    nombre: str
+    funcion: Callable[[Any], Awaitable[bool]]
+    workers: int = 1
+    capacidad: int = 1
+
+
+@dataclass
+class Elemento:
+    indice: int
+    valor: Any
+    error: Optional[BaseException] = None
+    etapa_final: Optional[str] = None
+    # lo que devuelva `al_salir` para este elemento
+    resultado: Any = None
+    _encolado: float = field(default=0.0, repr=False)
+
+
+class EstadisticasEtapa:
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.workers = 0
+        self.capacidad = 0
+        self.en_proceso = 0
+        self.procesados = 0
+        self.errores = 0
+        self.terminados = 0
+        self.segundos_proceso = 0.0
+        self.segundos_cola = 0.0
+        self.segundos_bloqueado = 0.0
+        self._lock = threading.Lock()
+
+    def registrar(self, proceso: float, cola: float, bloqueado: float, error: bool, termino: bool) -> None:
+        with self._lock:
+            self.procesados += 1
+            self.errores += int(error)
+            self.terminados += int(termino)
+            self.segundos_proceso += proceso
+            self.segundos_cola += cola
+            self.segundos_bloqueado += bloqueado
+
+    def resumen(self) -> Dict:
+        n = self.procesados
+        por_worker = n / self.segundos_proceso if self.segundos_proceso else 0.0
+        return {
+            "workers": self.workers,
+            "capacidad_cola": self.capacidad,
+            "en_proceso": self.en_proceso,
+            "procesados": n,
+            "errores": self.errores,
+            "terminados_aqui": self.terminados,
+            "proceso_promedio_ms": round(self.segundos_proceso / n * 1000, 1) if n else 0.0,
+            "espera_cola_promedio_ms": round(self.segundos_cola / n * 1000, 1) if n else 0.0,
+            "bloqueo_promedio_ms": round(self.segundos_bloqueado / n * 1000, 1) if n else 0.0,
+            # capacidad teórica de la etapa con sus workers actuales
+            "throughput_max_por_min": round(por_worker * max(1, self.workers) * 60, 1),
+        }
+
+
+_estadisticas: Dict[str, EstadisticasEtapa] = {}
+_lock = threading.Lock()
+
+
+def _estadisticas_de(etapa: Etapa) -> EstadisticasEtapa:
+    with _lock:
+        estadisticas = _estadisticas.get(etapa.nombre)
+        if estadisticas is None:
+            estadisticas = EstadisticasEtapa(etapa.nombre)
+            _estadisticas[etapa.nombre] = estadisticas
+    estadisticas.workers = etapa.workers
+    estadisticas.capacidad = etapa.capacidad
+    return estadisticas
+
+
+def estadisticas_etapas() -> Dict:
+    with _lock:
+        return {nombre: e.resumen() for nombre, e in _estadisticas.items()}
+
+
+def limpiar_estadisticas_etapas() -> None:
+    with _lock:
+        _estadisticas.clear()
+
+
+class MotorEtapas:
+    def __init__(self, etapas: Sequence[Etapa]):
+        if not etapas:
+            raise ValueError("El motor necesita al menos una etapa")
+        self.etapas = list(etapas)
+
+    async def procesar(
+        self,
+        valores: Sequence[Any],
+        admision: Sequence[asyncio.Semaphore] = (),
+        al_salir: Optional[Callable[[Elemento], Awaitable[Any]]] = None,
+        al_descartar: Optional[Callable[[Elemento], None]] = None,
+    ) -> List[Elemento]:
+        """
+        Pasa cada valor por todas las etapas, solapando elementos entre etapas.
+
+        Args:
+            valores: Valores a procesar
+            admision: Semáforos que se toman antes de que un elemento entre a
+                la primera etapa y se liberan cuando sale del pipeline
+                (limitan los elementos en vuelo)
+            al_salir: Se espera con cada elemento al salir del pipeline, antes
+                de liberar la admisión (p. ej. para cerrar sus recursos)
+            al_descartar: Se llama con cada elemento admitido que no llegó a
+                salir porque se canceló el procesamiento (p. ej. para cerrar
+                sus recursos); su admisión se libera igual
+
+        Returns:
+            Los elementos en el mismo orden que `valores`, con `error` si alguna
+            etapa lanzó una excepción
+        """
+        loop = asyncio.get_running_loop()
+        colas = [asyncio.Queue(maxsize=max(1, etapa.capacidad)) for etapa in self.etapas]
+        salida: asyncio.Queue = asyncio.Queue()
+
+        tareas = []
+        for i, etapa in enumerate(self.etapas):
+            destino = colas[i + 1] if i + 1 < len(colas) else salida
+            estadisticas = _estadisticas_de(etapa)
+            for _ in range(max(1, etapa.workers)):
+                tareas.append(asyncio.create_task(
+                    self._worker(etapa, estadisticas, colas[i], destino, salida)
+                ))
+
+        # elementos con la admisión tomada que todavía no salieron del pipeline
+        admitidos: Dict[int, Elemento] = {}
+
+        async def alimentar() -> None:
+            for indice, valor in enumerate(valores):
+                tomados = 0
+                try:
+                    for semaforo in admision:
+                        await semaforo.acquire()
+                        tomados += 1
+                except BaseException:
+                    for semaforo in admision[:tomados]:
+                        semaforo.release()
+                    raise
+                elemento = Elemento(indice=indice, valor=valor, _encolado=loop.time())
+                admitidos[indice] = elemento
+                await colas[0].put(elemento)
+
+        alimentador = asyncio.create_task(alimentar())
+        resultados: List[Optional[Elemento]] = [None] * len(valores)
+        try:
+            for _ in range(len(valores)):
+                elemento = await salida.get()
+                admitidos.pop(elemento.indice, None)
+                try:
+                    if al_salir is not None:
+                        elemento.resultado = await al_salir(elemento)
+                finally:
+                    for semaforo in admision:
+                        semaforo.release()
+                resultados[elemento.indice] = elemento
+        finally:
+            alimentador.cancel()
+            for tarea in tareas:
+                tarea.cancel()
+            await asyncio.gather(alimentador, *tareas, return_exceptions=True)
+            # cancelado a medias: los elementos en vuelo no deben retener la admisión
+            for elemento in admitidos.values():
+                for semaforo in admision:
+                    semaforo.release()
+                if al_descartar is not None:
+                    try:
+                        al_descartar(elemento)
+                    except Exception as e:
+                        logger.error(f"[MotorEtapas] Error descartando el elemento {elemento.indice}: {e}")
+
+        return resultados  # type: ignore[return-value]
+
+    @staticmethod
+    async def _worker(
+        etapa: Etapa,
+        estadisticas: EstadisticasEtapa,
+        entrada: asyncio.Queue,
+        siguiente: asyncio.Queue,
+        salida: asyncio.Queue,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            elemento: Elemento = await entrada.get()
+            inicio = loop.time()
+            espera_cola = inicio - elemento._encolado
+
+            estadisticas.en_proceso += 1
+            try:
+                continuar = await etapa.funcion(elemento.valor)
+            except Exception as e:
+                logger.error(f"[MotorEtapas] Error en etapa '{etapa.nombre}': {e}")
+                elemento.error = e
+                continuar = False
+            finally:
+                estadisticas.en_proceso -= 1
+            fin = loop.time()
+
+            if not continuar:
+                elemento.etapa_final = etapa.nombre
+            destino = siguiente if continuar else salida
+            elemento._encolado = loop.time()
+            await destino.put(elemento)  # bloquea si la etapa siguiente está llena
+
+            estadisticas.registrar(
+                proceso=fin - inicio,
+                cola=espera_cola,
+                bloqueado=loop.time() - fin,
+                error=elemento.error is not None,
+                termino=not continuar,
+            )
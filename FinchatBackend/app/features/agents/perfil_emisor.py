@@ -0,0 +1,205 @@
+"""
+Cache de perfiles de emisor: validación SUNAT y clasificación por RUC.
+
+Un emisor ya validado (fila en `emisor` con CIIU, estado y condición) no
+necesita volver a pasar por el validador SUNAT ni por el clasificador en cada
+comprobante: mientras su `validado_en` esté dentro de la ventana de vigencia,
+las reglas deterministas se aplican sobre los datos guardados y la
+clasificación sale de la tabla de reglas (o de la última clasificación del
+proceso para ese RUC).
+
+Dos niveles, igual que `cache_ruc`: memoria (LRU) y la tabla `emisor`. Si el
+perfil no alcanza para decidir (nombre ambiguo en modo híbrido, perfil
+vencido o incompleto) se cuenta como miss y el pipeline sigue el camino
+completo.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timezone
+from typing import Dict, Optional, Tuple
+
+from app.config.settings import settings
+from app.db.repositories import EmisorRepositorio
+from app.db.sesion import Session
+from app.features.agents.agente_clasificador import get_conjunto_reglas
+from app.features.agents.reglas_sunat import evaluar_reglas
+from app.utils.ejecutores import ejecutar_en
+
+logger = logging.getLogger(__name__)
+
+# fuentes de validación que confirman los datos del emisor con SUNAT
+FUENTES_CONFIRMADAS = ("reglas", "reglas+llm")
+
+
+@dataclass
+class PerfilEmisor:
+    # datos en el formato de SUNAT (razon_social, nombre_comercial, estado_ruc, condicion_ruc, ciiu)
+    datos: Dict
+    # epoch de la última validación contra SUNAT
+    validado_en: float
+    clasificacion: Optional[Dict] = None
+
+
+class CachePerfilEmisor:
+    def __init__(self, vigencia_seg: Optional[float] = None, max_memoria: Optional[int] = None):
+        self.vigencia_seg = vigencia_seg or settings.perfil_emisor_vigencia_horas * 3600
+        self.max_memoria = max_memoria or settings.perfil_emisor_max_memoria
+
+        self._memoria: "OrderedDict[str, PerfilEmisor]" = OrderedDict()
+
+        self.hits_memoria = 0
+        self.hits_bd = 0
+        self.misses = 0
+        self.vencidos = 0
+        # perfil vigente pero insuficiente (p. ej. nombre ambiguo): camino completo
+        self.insuficientes = 0
+
+    async def resolver(self, ruc: str, nombre_emisor_ocr: Optional[str]) -> Optional[Tuple[Dict, Optional[Dict]]]:
+        """
+        Validación y clasificación del emisor desde su perfil.
+
+        Returns:
+            (validacion, clasificacion) con el esquema de `contexto.validacion_sunat`
+            y `contexto.clasificacion`; la clasificación es None si el CIIU no
+            está mapeado y no hay una previa. None si no hay perfil vigente o
+            no alcanza para decidir.
+        """
+        perfil = self._leer_memoria(ruc)
+        desde_bd = False
+        if perfil is None:
+            perfil = await ejecutar_en("bd", self._leer_bd, ruc)
+            desde_bd = perfil is not None
+
+        if perfil is None:
+            self.misses += 1
+            return None
+        if perfil.validado_en + self.vigencia_seg <= time.time():
+            self.vencidos += 1
+            self.misses += 1
+            self._memoria.pop(ruc, None)
+            return None
+
+        resultado = evaluar_reglas(
+            perfil.datos,
+            nombre_emisor_ocr,
+            umbral_coincide=settings.sunat_umbral_coincide_nombre,
+            umbral_ambiguo=settings.sunat_umbral_ambiguo_nombre,
+        )
+        if resultado.ambiguo and settings.sunat_validacion_modo == "hibrido":
+            self.insuficientes += 1
+            self.misses += 1
+            return None
+
+        if desde_bd:
+            self.hits_bd += 1
+            self._escribir_memoria(ruc, perfil)
+        else:
+            self.hits_memoria += 1
+
+        validacion = resultado.validacion
+        validacion["fuente_validacion"] = "perfil_emisor"
+        return validacion, self._clasificacion(perfil)
+
+    def registrar(
+        self,
+        ruc: str,
+        validacion: Optional[Dict],
+        clasificacion: Optional[Dict],
+        validado_en: Optional[float],
+    ) -> None:
+        """
+        Guarda en memoria el perfil de un emisor recién validado contra SUNAT.
+
+        `validado_en` es el epoch de la consulta a SUNAT de la que salen los
+        datos (puede venir de `cache_ruc`); sin ella no se registra.
+        """
+        if validado_en is None:
+            return
+        if not validacion or validacion.get("fuente_validacion") not in FUENTES_CONFIRMADAS:
+            return
+        if not (validacion.get("estado_ruc") and validacion.get("condicion_ruc")):
+            return
+        if clasificacion and clasificacion.get("fuente_clasificacion") == "error_fallback":
+            clasificacion = None
+
+        datos = {
+            "razon_social": validacion.get("razon_social"),
+            "nombre_comercial": validacion.get("nombre_comercial_sunat"),
+            "estado_ruc": validacion.get("estado_ruc"),
+            "condicion_ruc": validacion.get("condicion_ruc"),
+            "ciiu": validacion.get("ciiu"),
+        }
+        self._escribir_memoria(ruc, PerfilEmisor(datos=datos, validado_en=validado_en, clasificacion=clasificacion))
+
+    @staticmethod
+    def _clasificacion(perfil: PerfilEmisor) -> Optional[Dict]:
+        reglas = get_conjunto_reglas()
+        previa = perfil.clasificacion
+        # una clasificación de otra versión de reglas no se reutiliza
+        if previa and previa.get("version_regla") == reglas.version:
+            return dict(previa)
+        return reglas.clasificar(perfil.datos.get("ciiu"))
+
+    def _leer_memoria(self, ruc: str) -> Optional[PerfilEmisor]:
+        perfil = self._memoria.get(ruc)
+        if perfil is not None:
+            self._memoria.move_to_end(ruc)
+        return perfil
+
+    def _escribir_memoria(self, ruc: str, perfil: PerfilEmisor) -> None:
+        self._memoria[ruc] = perfil
+        self._memoria.move_to_end(ruc)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+
+    def _leer_bd(self, ruc: str) -> Optional[PerfilEmisor]:
+        session = Session()
+        try:
+            emisor = EmisorRepositorio(session).buscar_por_ruc(ruc)
+            if emisor is None or emisor.validado_en is None:
+                return None
+            if not (emisor.ciiu_principal and emisor.estado_ruc and emisor.condicion_ruc):
+                return None
+            validado_en = emisor.validado_en
+            if validado_en.tzinfo is None:
+                validado_en = validado_en.replace(tzinfo=timezone.utc)
+            datos = {
+                "razon_social": emisor.razon_social,
+                "nombre_comercial": emisor.nombre_comercial,
+                "estado_ruc": emisor.estado_ruc,
+                "condicion_ruc": emisor.condicion_ruc,
+                "ciiu": emisor.ciiu_principal,
+            }
+            return PerfilEmisor(datos=datos, validado_en=validado_en.timestamp())
+        except Exception as e:
+            logger.warning(f"[PerfilEmisor] No se pudo leer el emisor {ruc}: {e}")
+            return None
+        finally:
+            session.close()
+
+    def estadisticas(self) -> Dict:
+        total = self.hits_memoria + self.hits_bd + self.misses
+        return {
+            "entradas_memoria": len(self._memoria),
+            "hits_memoria": self.hits_memoria,
+            "hits_bd": self.hits_bd,
+            "misses": self.misses,
+            "vencidos": self.vencidos,
+            "insuficientes": self.insuficientes,
+            "hit_rate": round((self.hits_memoria + self.hits_bd) / total, 3) if total else 0.0,
+        }
+
+
+_cache: Optional[CachePerfilEmisor] = None
+
+
+def get_cache_perfil_emisor() -> CachePerfilEmisor:
+    global _cache
+    if _cache is None:
+        _cache = CachePerfilEmisor()
+    return _cache
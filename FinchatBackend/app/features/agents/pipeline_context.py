@@ -1,9 +1,35 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 from dataclasses import dataclass, field
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional
 
+from app.features.agents.cache_ruc import get_ruc_cache
 from app.libs.sunat_scraper.ruc_scraper import SunatRucScraper
+
+logger = logging.getLogger(__name__)
+
+
+class MetricasPrecargaSunat:
+    """Consultas SUNAT especulativas lanzadas tras el OCR y cuántas se aprovecharon."""
+
+    def __init__(self):
+        self.lanzadas = 0
+        self.aprovechadas = 0
+        self.descartadas = 0
+
+    def resumen(self) -> Dict:
+        return {
+            "lanzadas": self.lanzadas,
+            "aprovechadas": self.aprovechadas,
+            "descartadas": self.descartadas,
+            "tasa_acierto": round(self.aprovechadas / self.lanzadas, 3) if self.lanzadas else 0.0,
+        }
+
+
+metricas_precarga = MetricasPrecargaSunat()
+
 # GrapState (LangGraph)
 
 @dataclass
@@ -21,9 +47,14 @@ class PipelineContext:
 
     # cache para los datos de sunat extraidos
     sunat_cache: Dict[str, Dict] = field(default_factory=dict)
+    # epoch de la consulta a SUNAT de cada entrada de sunat_cache (puede venir de cache_ruc)
+    sunat_consultado_en: Dict[str, float] = field(default_factory=dict)
 
     datos: Dict[str, Any] = field(default_factory=dict) # datos extra
 
+    # consultas SUNAT especulativas en curso, por RUC
+    _precargas: Dict[str, asyncio.Task] = field(default_factory=dict, init=False, repr=False)
+
     def set(self, key: str, value: Any) -> None:
         self.datos[key] = value
 
@@ -32,11 +63,53 @@ class PipelineContext:
 
     async def get_sunat_data(self, ruc: str) -> Optional[Dict]:
         if ruc not in self.sunat_cache:
-            scraper = SunatRucScraper()
-            self.sunat_cache[ruc] = await scraper.consultar_ruc(ruc)
+            precarga = self._precargas.pop(ruc, None)
+            if precarga is not None:
+                try:
+                    self.sunat_cache[ruc] = await precarga
+                    metricas_precarga.aprovechadas += 1
+                    self._registrar_consultado_en(ruc)
+                    return self.sunat_cache[ruc]
+                except Exception as e:
+                    logger.warning(f"[Contexto] Precarga SUNAT de {ruc} falló, se consulta de nuevo: {e}")
+            self.sunat_cache[ruc] = await self._consultar_sunat(ruc)
+            self._registrar_consultado_en(ruc)
 
         return self.sunat_cache[ruc]
 
+    def _registrar_consultado_en(self, ruc: str) -> None:
+        consultado_en = get_ruc_cache().consultado_en(ruc)
+        if consultado_en is not None:
+            self.sunat_consultado_en[ruc] = consultado_en
+
+    @staticmethod
+    async def _consultar_sunat(ruc: str) -> Optional[Dict]:
+        # cache compartido del proceso (memoria + BD) antes de scrapear
+        scraper = SunatRucScraper()
+        return await get_ruc_cache().obtener(ruc, scraper.consultar_ruc_con_estado)
+
+    def precargar_sunat(self, rucs: Iterable[str]) -> None:
+        """
+        Lanza en segundo plano la consulta SUNAT de RUCs candidatos del OCR,
+        mientras el LLM parsea. `get_sunat_data` reutiliza la que coincida.
+        """
+        for ruc in rucs:
+            if ruc in self.sunat_cache or ruc in self._precargas:
+                continue
+            self._precargas[ruc] = asyncio.ensure_future(self._consultar_sunat(ruc))
+            metricas_precarga.lanzadas += 1
+
+    def descartar_precargas(self, conservar: Optional[str] = None) -> None:
+        """
+        Cancela las precargas de RUCs distintos a `conservar`.
+
+        La consulta compartida del cache de RUC está protegida (shield): si ya
+        empezó, termina y deja el resultado para el próximo comprobante de ese RUC.
+        """
+        for ruc in [r for r in self._precargas if r != conservar]:
+            self._precargas.pop(ruc).cancel()
+            metricas_precarga.descartadas += 1
+
     def to_dict(self) -> Dict:
         return {
             "usuario_id": self.usuario_id,
@@ -52,6 +125,7 @@ class PipelineContext:
         }
 
     def reset(self) -> None:
+        self.descartar_precargas()
         self.hash_archivo = None
         self.es_duplicado = False
         self.comprobante_parseado = None
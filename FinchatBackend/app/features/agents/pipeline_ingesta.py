@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import logging
-from typing import Dict, Optional, Any
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from agno.workflow import Workflow
 
@@ -19,10 +21,37 @@ from app.features.agents.agente_parseador import AgenteParseador
 from app.features.agents.agente_persistencia import AgentePersistencia
 from app.features.agents.agente_validador_comprobante import AgenteValidadorComprobante
 from app.features.agents.agente_validador_sunat import AgenteValidadorSunat
+from app.config.settings import settings
+from app.features.agents.perfil_emisor import get_cache_perfil_emisor
 from app.features.agents.pipeline_context import PipelineContext
+from app.utils.ejecutores import ejecutar_en
+from app.utils.limpieza import candidatos_ruc
 
 logger = logging.getLogger(__name__)
 
+# etapas de la ingesta, en orden; el motor de etapas las ejecuta en tubería
+ETAPAS_INGESTA: Tuple[str, ...] = (
+    "validacion", "ocr", "duplicados", "parseo", "sunat", "clasificacion", "persistencia",
+)
+
+
+# restricción que detecta el mismo archivo guardado en paralelo por otro request o worker
+RESTRICCION_HASH = "comprobante_unq_usuario_hash"
+
+
+def _paso(etapa: str) -> str:
+    return f"Paso {ETAPAS_INGESTA.index(etapa) + 1}/{len(ETAPAS_INGESTA)}"
+
+
+@dataclass
+class EstadoIngesta:
+    """Estado de un archivo entre etapas."""
+    input_data: Dict[str, Any]
+    contexto: Optional[PipelineContext] = None
+    resultado_ocr: Optional[Dict] = None
+    # resultado final si el archivo terminó antes de la última etapa (duplicado)
+    resultado: Optional[Dict] = None
+
 
 class IngestaWorkflow(Workflow):
     def __init__(self, session: Session, **kwargs):
@@ -36,152 +65,311 @@ class IngestaWorkflow(Workflow):
         self.clasificacion_repo = ClasificacionRepositorio(session)
         self.ocr_repo = OcrPaginaRepositorio(session)
 
+    def _persistir(self, contexto: PipelineContext) -> int:
+        persistencia = AgentePersistencia(
+            contexto=contexto,
+            session=self.session,
+            emisor_repo=self.emisor_repo,
+            comprobante_repo=self.comprobante_repo,
+            detalle_repo=self.detalle_repo,
+            validacion_repo=self.validacion_repo,
+            clasificacion_repo=self.clasificacion_repo,
+            ocr_repo=self.ocr_repo,
+        )
+        comprobante_id = persistencia.guardar_todo()
+        self.session.commit()
+        return comprobante_id
+
+    async def ejecutar_etapa(self, nombre: str, estado: EstadoIngesta) -> bool:
+        """
+        Ejecuta una etapa de ETAPAS_INGESTA sobre el estado del archivo.
+
+        Returns:
+            True para seguir con la etapa siguiente, False si el archivo ya
+            terminó (`estado.resultado` queda con la respuesta)
+        """
+        etapas: Dict[str, Callable[[EstadoIngesta], Awaitable[bool]]] = {
+            "validacion": self._validar,
+            "ocr": self._ocr,
+            "duplicados": self._buscar_duplicado_metadatos,
+            "parseo": self._parsear,
+            "sunat": self._validar_sunat,
+            "clasificacion": self._clasificar,
+            "persistencia": self._guardar,
+        }
+        return await etapas[nombre](estado)
+
     async def run(self, input_data: Dict[str, Any], **kwargs) -> Dict:
+        # Todo lo síncrono (sesión de BD, OCR inline, LLM, clasificación) corre en
+        # los executors de app.utils.ejecutores: el event loop queda libre para
+        # los demás requests mientras se procesa este archivo.
+        estado = EstadoIngesta(input_data=input_data)
+        try:
+            for nombre in ETAPAS_INGESTA:
+                if not await self.ejecutar_etapa(nombre, estado):
+                    break
+            return self.resultado(estado)
+        except Exception as e:
+            return await self.resultado_error(estado, e)
+
+    async def _validar(self, estado: EstadoIngesta) -> bool:
+        input_data = estado.input_data
         usuario_id = input_data["usuario_id"]
         nombre_archivo = input_data["nombre_archivo"]
-        mime_type = input_data["mime_type"]
-        contenido = input_data["contenido"]
 
-        contexto = None
+        logger.info(f"[Workflow] Iniciando procesamiento de {nombre_archivo} para usuario {usuario_id}")
+        contexto = PipelineContext(
+            usuario_id=usuario_id,
+            nombre_archivo=nombre_archivo,
+            mime_type=input_data["mime_type"],
+        )
+        estado.contexto = contexto
+
+        # Agente validador del comprobante
+        logger.info(f"[Workflow] {_paso('validacion')}: Validando archivo {nombre_archivo}")
+        validador = AgenteValidadorComprobante(self.comprobante_repo)
+        resultado_validacion = await ejecutar_en("bd", validador.validar_archivo, usuario_id, input_data["contenido"])
+        logger.info(f"[Workflow] Validación completada: hash={resultado_validacion['hash_archivo'][:8]}..., duplicado={resultado_validacion['es_duplicado']}")
+
+        contexto.hash_archivo = resultado_validacion["hash_archivo"]
+        contexto.es_duplicado = resultado_validacion["es_duplicado"]
+
+        # si es duplicado entonces
+        if resultado_validacion["es_duplicado"]:
+            logger.info(f"[Workflow] Archivo duplicado detectado: {nombre_archivo}")
+            estado.resultado = self._resultado_duplicado(contexto, resultado_validacion)
+            return False
+        return True
+
+    async def _ocr(self, estado: EstadoIngesta) -> bool:
+        # Agente parseador (1/2): OCR, separado del LLM para solapar archivos
+        nombre_archivo = estado.input_data["nombre_archivo"]
+        logger.info(f"[Workflow] {_paso('ocr')}: OCR de {nombre_archivo}")
         try:
-            logger.info(f"[Workflow] Iniciando procesamiento de {nombre_archivo} para usuario {usuario_id}")
-            contexto = PipelineContext(
-                usuario_id=usuario_id,
-                nombre_archivo=nombre_archivo,
-                mime_type=mime_type,
+            parseador = AgenteParseador(estado.contexto)
+            estado.resultado_ocr = await parseador.ocr_async(
+                contenido=estado.input_data["contenido"],
+                mime_type=estado.input_data["mime_type"],
             )
+        except Exception as e:
+            logger.error(f"[Workflow] Error en OCR: {e}", exc_info=True)
+            raise Exception(f"Error en parsing: {str(e)}") from e
 
-            # Agente validador del comprobante
-            logger.info(f"[Workflow] Paso 1/5: Validando archivo {nombre_archivo}")
-            validador = AgenteValidadorComprobante(self.comprobante_repo)
-            resultado_validacion = validador.validar_archivo(usuario_id, contenido)
-            logger.info(f"[Workflow] Validación completada: hash={resultado_validacion['hash_archivo'][:8]}..., duplicado={resultado_validacion['es_duplicado']}")
-
-            contexto.hash_archivo = resultado_validacion["hash_archivo"]
-            contexto.es_duplicado = resultado_validacion["es_duplicado"]
-
-            # si es duplicado entonces
-            if resultado_validacion["es_duplicado"]:
-                logger.info(f"[Workflow] Archivo duplicado detectado: {nombre_archivo}")
-                return {
-                    "exito": True,
-                    "duplicado": True,
-                    "comprobante_id": resultado_validacion["comprobante_id"],
-                    "hash_archivo": resultado_validacion["hash_archivo"],
-                    "tipo_duplicado": resultado_validacion["tipo_duplicado"],
-                    "mensaje": "Archivo duplicado - workflow detenido"
-                }
-
-            # Agente parseador
-            logger.info(f"[Workflow] Paso 2/5: Parseando archivo {nombre_archivo}")
-            try:
-                parseador = AgenteParseador(contexto)
-                resultado_parsing = parseador.parsear_archivo(
-                    contenido=contenido,
-                    mime_type=mime_type,
-                    nombre_archivo=nombre_archivo,
-                )
-                contexto.comprobante_parseado = resultado_parsing
-                logger.info(f"[Workflow] Parsing completado: tipo={resultado_parsing['comprobante']['tipo_comprobante']}, serie={resultado_parsing['comprobante']['serie']}")
-            except Exception as e:
-                logger.error(f"[Workflow] Error en Parseador: {e}", exc_info=True)
-                raise Exception(f"Error en parsing: {str(e)}") from e
-
-            # Agente validador SUNAT
-            logger.info(f"[Workflow] Paso 3/5: Validando en SUNAT")
-            try:
-                ruc_emisor = resultado_parsing["emisor"]["ruc"]
-                nombre_emisor_ocr = resultado_parsing["emisor"]["razon_social"]
-                logger.info(f"[Workflow] Validando RUC {ruc_emisor}")
-
-                validador_sunat = AgenteValidadorSunat(contexto)
-                validacion_sunat = await validador_sunat.validar_completo(ruc_emisor, nombre_emisor_ocr)
-                contexto.validacion_sunat = validacion_sunat
-                logger.info(f"[Workflow] SUNAT completado: estado={validacion_sunat.get('estado_ruc')}")
-            except Exception as e:
-                logger.error(f"[Workflow] Error en Validador SUNAT: {e}", exc_info=True)
-                raise Exception(f"Error en validación SUNAT: {str(e)}") from e
-
-            # Agente clasificador
-            logger.info(f"[Workflow] Paso 4/5: Clasificando comprobante")
-            try:
-                clasificador = AgenteClasificador(contexto)
-                clasificacion = clasificador.tool_clasificar()
-                contexto.clasificacion = clasificacion
-                logger.info(f"[Workflow] Clasificación completada: categoria={clasificacion['categoria_gasto']}")
-            except Exception as e:
-                logger.error(f"[Workflow] Error en Clasificador: {e}", exc_info=True)
-                raise Exception(f"Error en clasificación: {str(e)}") from e
-
-            # Agente persistencia
-            logger.info(f"[Workflow] Paso 5/5: Guardando en BD")
-            try:
-                persistencia = AgentePersistencia(
-                    contexto=contexto,
-                    session=self.session,
-                    emisor_repo=self.emisor_repo,
-                    comprobante_repo=self.comprobante_repo,
-                    detalle_repo=self.detalle_repo,
-                    validacion_repo=self.validacion_repo,
-                    clasificacion_repo=self.clasificacion_repo,
-                    ocr_repo=self.ocr_repo,
-                )
+        # el RUC suele verse en el texto crudo: SUNAT se consulta mientras el LLM parsea
+        if settings.sunat_precarga_habilitada:
+            candidatos = candidatos_ruc(estado.resultado_ocr["texto"], settings.sunat_precarga_max_candidatos)
+            if candidatos:
+                logger.info(f"[Workflow] Precarga SUNAT de {candidatos}")
+                estado.contexto.precargar_sunat(candidatos)
+        return True
+
+    async def _buscar_duplicado_metadatos(self, estado: EstadoIngesta) -> bool:
+        # mismo RUC/serie/número que un comprobante guardado (otra foto del mismo papel)
+        if not settings.duplicados_metadatos_habilitado:
+            return True
+
+        contexto = estado.contexto
+        logger.info(f"[Workflow] {_paso('duplicados')}: Buscando duplicado por metadatos de {estado.input_data['nombre_archivo']}")
+        validador = AgenteValidadorComprobante(self.comprobante_repo)
+        duplicado = await ejecutar_en(
+            "bd", validador.validar_metadatos, contexto.usuario_id, estado.resultado_ocr["texto"]
+        )
+        if duplicado is None:
+            return True
 
-                comprobante_id = persistencia.guardar_todo()
-                self.session.commit()
-                logger.info(f"[Workflow] Commit exitoso, comprobante_id={comprobante_id}")
-            except Exception as e:
-                logger.error(f"[Workflow] Error en Persistencia: {e}", exc_info=True)
-                self.session.rollback()
-                raise Exception(f"Error en persistencia: {str(e)}") from e
-
-            logger.info(f"[Workflow] ✓ Completado exitosamente: comprobante_id={comprobante_id}")
-
-            # Retornar resultado completo
-            return {
-                "exito": True,
-                "duplicado": False,
-                "comprobante_id": comprobante_id,
-                "hash_archivo": contexto.hash_archivo,
-                "campos_parseados": {
-                    "tipo_comprobante": resultado_parsing["comprobante"]["tipo_comprobante"],
-                    "serie": resultado_parsing["comprobante"]["serie"],
-                    "numero": resultado_parsing["comprobante"]["numero"],
-                    "fecha_emision": resultado_parsing["comprobante"]["fecha_emision"],
-                    "monto_total": resultado_parsing["comprobante"]["monto_total"],
-                    "moneda": resultado_parsing["comprobante"]["moneda"],
-                    "ruc_emisor": ruc_emisor,
-                    "razon_social_emisor": nombre_emisor_ocr,
-                    "num_items": len(resultado_parsing["items"]),
-                },
-                "validacion_sunat": {
-                    "estado_ruc": validacion_sunat.get("estado_ruc"),
-                    "condicion_ruc": validacion_sunat.get("condicion_ruc"),
-                    "ciiu": validacion_sunat.get("ciiu"),
-                    "pasa_reglas": validacion_sunat.get("pasa_reglas_basicas"),
-                    "coincide_nombre": validacion_sunat.get("coincide_nombre"),
-                },
-                "clasificacion": {
-                    "categoria_gasto": clasificacion["categoria_gasto"],
-                    "porcentaje_deduccion": clasificacion["porcentaje_deduccion"],
-                    "ciiu_utilizado": clasificacion.get("ciiu_utilizado"),
-                },
-                "mensaje": "Archivo procesado exitosamente"
-            }
+        logger.info(f"[Workflow] Duplicado por metadatos: comprobante_id={duplicado['comprobante_id']}")
+        contexto.es_duplicado = True
+        contexto.descartar_precargas()
+        estado.resultado = self._resultado_duplicado(contexto, duplicado)
+        return False
 
+    @staticmethod
+    def _resultado_duplicado(contexto: PipelineContext, duplicado: Dict) -> Dict:
+        return {
+            "exito": True,
+            "duplicado": True,
+            "comprobante_id": duplicado["comprobante_id"],
+            "hash_archivo": contexto.hash_archivo,
+            "tipo_duplicado": duplicado["tipo_duplicado"],
+            "mensaje": "Archivo duplicado - workflow detenido"
+        }
+
+    async def _parsear(self, estado: EstadoIngesta) -> bool:
+        # Agente parseador (2/2): extracción determinista y LLM
+        logger.info(f"[Workflow] {_paso('parseo')}: Parseando archivo {estado.input_data['nombre_archivo']}")
+        try:
+            parseador = AgenteParseador(estado.contexto)
+            resultado_parsing = await parseador.parsear_ocr_async(estado.resultado_ocr)
+            estado.contexto.comprobante_parseado = resultado_parsing
+            logger.info(f"[Workflow] Parsing completado: tipo={resultado_parsing['comprobante']['tipo_comprobante']}, serie={resultado_parsing['comprobante']['serie']}")
         except Exception as e:
-            logger.error(f"[Workflow] ERROR procesando {nombre_archivo}: {type(e).__name__}: {str(e)}", exc_info=True)
-            try:
-                self.session.rollback()
-            except Exception:
-                pass
-
-            return {
-                "exito": False,
-                "duplicado": False,
-                "comprobante_id": None,
-                "hash_archivo": contexto.hash_archivo if contexto and hasattr(contexto, 'hash_archivo') else None,
-                "error": str(e),
-                "error_tipo": type(e).__name__,
-                "mensaje": f"Error en workflow: {str(e)}"
-            }
+            logger.error(f"[Workflow] Error en Parseador: {e}", exc_info=True)
+            raise Exception(f"Error en parsing: {str(e)}") from e
+        return True
+
+    async def _validar_sunat(self, estado: EstadoIngesta) -> bool:
+        # Agente validador SUNAT
+        logger.info(f"[Workflow] {_paso('sunat')}: Validando en SUNAT")
+        contexto = estado.contexto
+        try:
+            ruc_emisor = contexto.comprobante_parseado["emisor"]["ruc"]
+            nombre_emisor_ocr = contexto.comprobante_parseado["emisor"]["razon_social"]
+
+            # emisor conocido y validado hace poco: sin validador SUNAT ni clasificador
+            if await self._usar_perfil_emisor(contexto, ruc_emisor, nombre_emisor_ocr):
+                return True
+
+            # la precarga del RUC parseado se reutiliza; las demás se descartan
+            contexto.descartar_precargas(conservar=ruc_emisor)
+            logger.info(f"[Workflow] Validando RUC {ruc_emisor}")
+
+            validador_sunat = AgenteValidadorSunat(contexto)
+            validacion_sunat = await validador_sunat.validar_completo(ruc_emisor, nombre_emisor_ocr)
+            contexto.validacion_sunat = validacion_sunat
+            logger.info(f"[Workflow] SUNAT completado: estado={validacion_sunat.get('estado_ruc')}")
+        except Exception as e:
+            logger.error(f"[Workflow] Error en Validador SUNAT: {e}", exc_info=True)
+            raise Exception(f"Error en validación SUNAT: {str(e)}") from e
+        return True
+
+    async def _usar_perfil_emisor(self, contexto: PipelineContext, ruc: str, nombre_emisor_ocr: str) -> bool:
+        # en modo "llm" el agente decide siempre; el perfil no lo reemplaza
+        if not settings.perfil_emisor_habilitado or settings.sunat_validacion_modo == "llm":
+            return False
+
+        perfil = await get_cache_perfil_emisor().resolver(ruc, nombre_emisor_ocr)
+        if perfil is None:
+            return False
+
+        validacion, clasificacion = perfil
+        contexto.descartar_precargas()
+        contexto.validacion_sunat = validacion
+        contexto.set("perfil_emisor_hit", True)
+        if clasificacion is not None:
+            contexto.clasificacion = clasificacion
+        logger.info(f"[Workflow] Perfil de emisor {ruc} vigente: estado={validacion.get('estado_ruc')}, "
+                    f"clasificacion={'perfil' if clasificacion else 'pendiente'}")
+        return True
+
+    async def _clasificar(self, estado: EstadoIngesta) -> bool:
+        # Agente clasificador
+        if estado.contexto.clasificacion is not None:
+            logger.info(f"[Workflow] {_paso('clasificacion')}: Clasificación tomada del perfil del emisor")
+            return True
+
+        logger.info(f"[Workflow] {_paso('clasificacion')}: Clasificando comprobante")
+        try:
+            clasificador = AgenteClasificador(estado.contexto)
+            clasificacion = await ejecutar_en("llm", clasificador.tool_clasificar)
+            estado.contexto.clasificacion = clasificacion
+            logger.info(f"[Workflow] Clasificación completada: categoria={clasificacion['categoria_gasto']}")
+        except Exception as e:
+            logger.error(f"[Workflow] Error en Clasificador: {e}", exc_info=True)
+            raise Exception(f"Error en clasificación: {str(e)}") from e
+        return True
+
+    async def _guardar(self, estado: EstadoIngesta) -> bool:
+        # Agente persistencia
+        logger.info(f"[Workflow] {_paso('persistencia')}: Guardando en BD")
+        try:
+            comprobante_id = await ejecutar_en("bd", self._persistir, estado.contexto)
+            estado.contexto.comprobante_id = comprobante_id
+            logger.info(f"[Workflow] Commit exitoso, comprobante_id={comprobante_id}")
+            if settings.perfil_emisor_habilitado and not estado.contexto.get("perfil_emisor_hit"):
+                ruc_emisor = estado.contexto.comprobante_parseado["emisor"]["ruc"]
+                get_cache_perfil_emisor().registrar(
+                    ruc_emisor,
+                    estado.contexto.validacion_sunat,
+                    estado.contexto.clasificacion,
+                    estado.contexto.sunat_consultado_en.get(ruc_emisor),
+                )
+        except Exception as e:
+            await ejecutar_en("bd", self.session.rollback)
+            if isinstance(e, IntegrityError) and RESTRICCION_HASH in str(e.orig):
+                # otra copia del mismo archivo se guardó mientras este se procesaba
+                return await self._duplicado_al_guardar(estado, e)
+            logger.error(f"[Workflow] Error en Persistencia: {e}", exc_info=True)
+            raise Exception(f"Error en persistencia: {str(e)}") from e
+
+        logger.info(f"[Workflow] ✓ Completado exitosamente: comprobante_id={comprobante_id}")
+        return True
+
+    async def _duplicado_al_guardar(self, estado: EstadoIngesta, error: IntegrityError) -> bool:
+        contexto = estado.contexto
+        validador = AgenteValidadorComprobante(self.comprobante_repo)
+        duplicado = await ejecutar_en("bd", validador.validar_archivo, contexto.usuario_id, estado.input_data["contenido"])
+        if not duplicado["es_duplicado"]:
+            logger.error(f"[Workflow] Error en Persistencia: {error}", exc_info=True)
+            raise Exception(f"Error en persistencia: {str(error)}") from error
+
+        logger.info(f"[Workflow] Archivo duplicado detectado al guardar: {contexto.nombre_archivo}")
+        contexto.es_duplicado = True
+        estado.resultado = self._resultado_duplicado(contexto, duplicado)
+        return False
+
+    def resultado(self, estado: EstadoIngesta) -> Dict:
+        """Respuesta del archivo tras su última etapa."""
+        if estado.resultado is not None:
+            return estado.resultado
+
+        contexto = estado.contexto
+        resultado_parsing = contexto.comprobante_parseado
+        validacion_sunat = contexto.validacion_sunat
+        clasificacion = contexto.clasificacion
+
+        # Retornar resultado completo
+        return {
+            "exito": True,
+            "duplicado": False,
+            "comprobante_id": contexto.comprobante_id,
+            "hash_archivo": contexto.hash_archivo,
+            "campos_parseados": {
+                "tipo_comprobante": resultado_parsing["comprobante"]["tipo_comprobante"],
+                "serie": resultado_parsing["comprobante"]["serie"],
+                "numero": resultado_parsing["comprobante"]["numero"],
+                "fecha_emision": resultado_parsing["comprobante"]["fecha_emision"],
+                "monto_total": resultado_parsing["comprobante"]["monto_total"],
+                "moneda": resultado_parsing["comprobante"]["moneda"],
+                "ruc_emisor": resultado_parsing["emisor"]["ruc"],
+                "razon_social_emisor": resultado_parsing["emisor"]["razon_social"],
+                "num_items": len(resultado_parsing["items"]),
+            },
+            "validacion_sunat": {
+                "estado_ruc": validacion_sunat.get("estado_ruc"),
+                "condicion_ruc": validacion_sunat.get("condicion_ruc"),
+                "ciiu": validacion_sunat.get("ciiu"),
+                "pasa_reglas": validacion_sunat.get("pasa_reglas_basicas"),
+                "coincide_nombre": validacion_sunat.get("coincide_nombre"),
+            },
+            "clasificacion": {
+                "categoria_gasto": clasificacion["categoria_gasto"],
+                "porcentaje_deduccion": clasificacion["porcentaje_deduccion"],
+                "ciiu_utilizado": clasificacion.get("ciiu_utilizado"),
+                "version_regla": clasificacion.get("version_regla"),
+            },
+            "mensaje": "Archivo procesado exitosamente"
+        }
+
+    async def resultado_error(self, estado: EstadoIngesta, e: BaseException) -> Dict:
+        """Respuesta de un archivo cuya etapa falló; deshace lo pendiente en la sesión."""
+        nombre_archivo = estado.input_data.get("nombre_archivo")
+        logger.error(f"[Workflow] ERROR procesando {nombre_archivo}: {type(e).__name__}: {str(e)}", exc_info=e)
+        try:
+            await ejecutar_en("bd", self.session.rollback)
+        except Exception:
+            pass
+
+        contexto = estado.contexto
+        if contexto is not None:
+            contexto.descartar_precargas()
+        return {
+            "exito": False,
+            "duplicado": False,
+            "comprobante_id": None,
+            "hash_archivo": contexto.hash_archivo if contexto else None,
+            "error": str(e),
+            "error_tipo": type(e).__name__,
+            # las etapas envuelven el error original: su tipo dice si vale la pena reintentar
+            "error_causa": type(e.__cause__ or e).__name__,
+            "mensaje": f"Error en workflow: {str(e)}"
+        }
@@ -15,3 +15,8 @@ OUTPUT ESPERADO (JSON):
   'fuente_clasificacion': 'Origen de la regla'
 }
 """
+
+PROMPT_DATOS_EN_MENSAJE = """
+La herramienta no está disponible: su resultado ya viene en el mensaje como
+"Resultado de la herramienta". Úsalo directamente en el paso 1.
+"""
@@ -34,3 +34,8 @@ OUTPUT ESPERADO (JSON):
   "pasa_reglas_basicas": true,
   "motivo_no_deducible": null
 }"""
+
+PROMPT_DATOS_EN_MENSAJE = """
+La herramienta `consultar_ruc` no está disponible: su resultado ya viene en el
+mensaje como "Resultado de consultar_ruc". Úsalo directamente en el paso 1.
+"""
@@ -0,0 +1,81 @@
+"""
+Registro de agentes compartidos por el proceso.
+
+Construir un `Agent` de agno por petición re-crea el modelo, su cliente HTTP y
+el toolkit cada vez. Aquí cada agente se construye una sola vez (en el primer
+uso) y el estado propio de cada petición (contexto del pipeline, sesión de BD,
+usuario) se vincula con `vincular(...)`: los toolkits lo leen de una ContextVar,
+que agno propaga también a las herramientas que corre en hilos (`asyncio.to_thread`).
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator
+
+from agno.agent import Agent
+
+logger = logging.getLogger(__name__)
+
+_agentes: Dict[str, Agent] = {}
+_lock = threading.Lock()
+
+_estado: ContextVar[Dict[str, Any]] = ContextVar("estado_agente", default={})
+
+
+def get_agente(nombre: str, fabrica: Callable[[], Agent]) -> Agent:
+    """
+    Agente compartido registrado con `nombre`; lo construye con `fabrica` la primera vez.
+
+    Args:
+        nombre: Clave del agente (incluye cualquier variante de configuración)
+        fabrica: Construye el agente; no debe capturar estado de una petición
+    """
+    agente = _agentes.get(nombre)
+    if agente is not None:
+        return agente
+    with _lock:
+        agente = _agentes.get(nombre)
+        if agente is None:
+            agente = fabrica()
+            _agentes[nombre] = agente
+            logger.info(f"[Agentes] Agente '{nombre}' creado")
+        return agente
+
+
+@contextmanager
+def vincular(**estado: Any) -> Iterator[None]:
+    """Vincula estado de la petición a las herramientas de los agentes compartidos."""
+    token = _estado.set({**_estado.get(), **estado})
+    try:
+        yield
+    finally:
+        _estado.reset(token)
+
+
+def estado_vinculado(clave: str) -> Any:
+    """
+    Valor vinculado con `vincular`.
+
+    Raises:
+        RuntimeError: Si la herramienta se ejecuta fuera de un `vincular` con esa clave
+    """
+    estado = _estado.get()
+    if clave not in estado:
+        raise RuntimeError(f"'{clave}' no está vinculado a la ejecución del agente")
+    return estado[clave]
+
+
+def limpiar_agentes() -> None:
+    with _lock:
+        _agentes.clear()
+
+
+def estadisticas_agentes() -> Dict:
+    return {
+        "agentes": sorted(_agentes),
+        "total": len(_agentes),
+    }
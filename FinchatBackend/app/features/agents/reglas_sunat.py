@@ -0,0 +1,116 @@
+"""
+Reglas deterministas de validación SUNAT.
+
+Reproduce lo que hacía el agente ValidadorSUNAT (estado ACTIVO, condición
+HABIDO y comparación de nombres) sin pasar por el LLM. La comparación de
+nombres es difusa; solo los casos ambiguos se derivan al LLM.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, Optional
+
+# tokens de forma societaria que no aportan a la comparación de nombres
+TOKENS_SOCIETARIOS = {
+    "SAC", "SA", "SAA", "SRL", "EIRL", "SCRL", "SOCIEDAD", "ANONIMA", "CERRADA",
+    "ABIERTA", "COMERCIAL", "RESPONSABILIDAD", "LIMITADA", "EMPRESA", "INDIVIDUAL",
+    "DE", "DEL", "LA", "LOS", "LAS", "Y", "E",
+}
+
+_RE_PUNTUACION = re.compile(r"[^A-Z0-9 ]+")
+_RE_SIGLAS = re.compile(r"\b(?:[A-Z]\.){2,}")
+
+
+def normalizar_nombre(nombre: Optional[str]) -> str:
+    if not nombre:
+        return ""
+    texto = unicodedata.normalize("NFKD", nombre.upper())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    texto = texto.replace("&", " Y ")
+    # "S.A.C." -> "SAC" antes de quitar la puntuación
+    texto = _RE_SIGLAS.sub(lambda m: m.group(0).replace(".", ""), texto)
+    texto = _RE_PUNTUACION.sub(" ", texto)
+    tokens = [t for t in texto.split() if t not in TOKENS_SOCIETARIOS]
+    return " ".join(tokens)
+
+
+def similitud_nombres(nombre_a: Optional[str], nombre_b: Optional[str]) -> float:
+    """Similitud 0-1 tolerante a puntuación, forma societaria y orden de palabras."""
+    a = normalizar_nombre(nombre_a)
+    b = normalizar_nombre(nombre_b)
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+
+    tokens_a, tokens_b = a.split(), b.split()
+    directo = SequenceMatcher(None, a, b).ratio()
+    ordenado = SequenceMatcher(None, " ".join(sorted(tokens_a)), " ".join(sorted(tokens_b))).ratio()
+
+    # nombre OCR parcial ("TEAM SABOR" vs "TEAM SABOR GOURMET")
+    contencion = 0.0
+    menor = min(len(set(tokens_a)), len(set(tokens_b)))
+    if menor >= 2:
+        contencion = len(set(tokens_a) & set(tokens_b)) / menor
+
+    return max(directo, ordenado, contencion)
+
+
+@dataclass
+class ResultadoReglas:
+    validacion: Dict
+    similitud: float
+    ambiguo: bool
+
+
+def evaluar_reglas(
+    datos_sunat: Dict,
+    nombre_emisor_ocr: Optional[str],
+    umbral_coincide: float,
+    umbral_ambiguo: float,
+) -> ResultadoReglas:
+    """
+    Aplica las reglas de deducibilidad a los datos de SUNAT.
+
+    Returns:
+        ResultadoReglas con la validación en el mismo esquema que el agente
+        ValidadorSUNAT y si la comparación de nombres quedó en zona ambigua
+        (entre `umbral_ambiguo` y `umbral_coincide`).
+    """
+    estado = (datos_sunat.get("estado_ruc") or "").strip().upper()
+    condicion = (datos_sunat.get("condicion_ruc") or "").strip().upper()
+    razon_social = datos_sunat.get("razon_social")
+    nombre_comercial = datos_sunat.get("nombre_comercial")
+
+    motivos = []
+    if estado != "ACTIVO":
+        motivos.append(f"Estado del contribuyente: {estado or 'DESCONOCIDO'}")
+    if condicion != "HABIDO":
+        motivos.append(f"Condición del contribuyente: {condicion or 'DESCONOCIDO'}")
+
+    similitud = max(
+        similitud_nombres(nombre_emisor_ocr, razon_social),
+        similitud_nombres(nombre_emisor_ocr, nombre_comercial),
+    )
+
+    validacion = {
+        "estado_ruc": estado or None,
+        "condicion_ruc": condicion or None,
+        "ciiu": datos_sunat.get("ciiu"),
+        "razon_social": razon_social,
+        "nombre_comercial_sunat": nombre_comercial,
+        "coincide_nombre": similitud >= umbral_coincide,
+        "pasa_reglas_basicas": not motivos,
+        "motivo_no_deducible": "; ".join(motivos) or None,
+        "similitud_nombre": round(similitud, 3),
+        "fuente_validacion": "reglas",
+    }
+    return ResultadoReglas(
+        validacion=validacion,
+        similitud=similitud,
+        ambiguo=umbral_ambiguo <= similitud < umbral_coincide,
+    )
@@ -0,0 +1,4 @@
+from app.features.trabajos.cola_ingesta import ColaIngesta
+from app.features.trabajos.worker_ingesta import WorkerIngesta
+
+__all__ = ["ColaIngesta", "WorkerIngesta"]
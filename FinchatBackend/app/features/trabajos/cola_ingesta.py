@@ -0,0 +1,71 @@
+"""Encolado de archivos para ingesta asíncrona (tabla estado_trabajo)."""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.db.models import EstadoTrabajo
+from app.db.repositories import EstadoTrabajoRepositorio
+
+logger = logging.getLogger(__name__)
+
+TIPO_TRABAJO_INGESTA = "ingesta"
+
+
+def _guardar_archivo(id_trabajo: uuid.UUID, nombre_archivo: str, contenido: bytes) -> str:
+    directorio = Path(settings.almacenamiento_dir)
+    directorio.mkdir(parents=True, exist_ok=True)
+    ruta = directorio / f"{id_trabajo}{Path(nombre_archivo).suffix}"
+    ruta.write_bytes(contenido)
+    return str(ruta)
+
+
+class ColaIngesta:
+    def __init__(self, session: Session):
+        self.session = session
+        self.repo = EstadoTrabajoRepositorio(session)
+
+    def encolar(self, usuario_id: int, archivos: List[Dict]) -> List[EstadoTrabajo]:
+        """
+        Guarda cada archivo en disco y crea su fila en estado_trabajo.
+
+        Args:
+            usuario_id: ID del usuario
+            archivos: Lista de dicts con nombre_archivo, mime_type y contenido
+
+        Returns:
+            Trabajos creados, en el mismo orden que `archivos`
+        """
+        trabajos = []
+        rutas = []
+        try:
+            for archivo in archivos:
+                id_trabajo = uuid.uuid4()
+                ruta = _guardar_archivo(id_trabajo, archivo["nombre_archivo"], archivo["contenido"])
+                rutas.append(ruta)
+                trabajos.append(self.repo.crear(
+                    id_trabajo=id_trabajo,
+                    id_usuario=usuario_id,
+                    tipo_trabajo=TIPO_TRABAJO_INGESTA,
+                    nombre_archivo=archivo["nombre_archivo"],
+                    mime_type=archivo["mime_type"],
+                    ruta_archivo=ruta,
+                ))
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            for ruta in rutas:
+                Path(ruta).unlink(missing_ok=True)
+            raise
+
+        logger.info(f"[Cola] {len(trabajos)} trabajos de ingesta encolados para usuario {usuario_id}")
+        return trabajos
+
+    def obtener(self, id_trabajo: uuid.UUID) -> EstadoTrabajo | None:
+        return self.repo.obtener(id_trabajo)
@@ -0,0 +1,249 @@
+"""
+Worker de ingesta asíncrona.
+
+Toma trabajos pendientes de estado_trabajo con SELECT ... FOR UPDATE SKIP
+LOCKED, de modo que varios workers (en el proceso de la API o lanzados con
+`python -m app.features.trabajos.worker_ingesta`) pueden compartir la cola.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.config.settings import settings
+from app.db.repositories import EstadoTrabajoRepositorio
+from app.db.sesion import Session
+from app.features.agents.pipeline_ingesta import IngestaWorkflow
+from app.features.trabajos.cola_ingesta import TIPO_TRABAJO_INGESTA
+from app.utils.ejecutores import ejecutar_en
+
+logger = logging.getLogger(__name__)
+
+# errores deterministas (archivo inválido, datos que no validan, duplicado al
+# guardar): reintentar da el mismo resultado, el trabajo pasa directo a 'error'
+ERRORES_NO_REINTENTABLES = frozenset({
+    "FileNotFoundError",
+    "FileDataError",
+    "EmptyFileError",
+    "ValueError",
+    "ValidationError",
+    "IntegrityError",
+})
+
+
+class WorkerIngesta:
+    def __init__(
+        self,
+        num_workers: Optional[int] = None,
+        intervalo_sondeo: Optional[float] = None,
+    ):
+        self.num_workers = max(1, num_workers or settings.trabajos_workers)
+        self.intervalo_sondeo = intervalo_sondeo or settings.trabajos_intervalo_sondeo
+        self._tareas: List[asyncio.Task] = []
+        self._detener = asyncio.Event()
+        self._proxima_recuperacion = 0.0
+
+    async def iniciar(self) -> None:
+        self._detener.clear()
+        await self._recuperar_huerfanos_periodico()
+        self._tareas = [
+            asyncio.create_task(self._loop(i), name=f"worker-ingesta-{i}")
+            for i in range(self.num_workers)
+        ]
+        logger.info(f"[Worker] {self.num_workers} workers de ingesta iniciados")
+
+    async def detener(self) -> None:
+        self._detener.set()
+        for tarea in self._tareas:
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+        self._tareas = []
+        logger.info("[Worker] Workers de ingesta detenidos")
+
+    def solicitar_detencion(self) -> None:
+        self._detener.set()
+
+    async def esperar(self) -> None:
+        await self._detener.wait()
+
+    def _recuperar_huerfanos(self) -> None:
+        session = Session()
+        try:
+            recuperados, agotados = EstadoTrabajoRepositorio(session).recuperar_huerfanos(
+                TIPO_TRABAJO_INGESTA, settings.trabajos_timeout_en_proceso_seg, settings.trabajos_max_intentos
+            )
+            session.commit()
+            for ruta in agotados:
+                if ruta:
+                    Path(ruta).unlink(missing_ok=True)
+            if recuperados:
+                logger.warning(f"[Worker] {recuperados} trabajos huérfanos devueltos a la cola")
+            if agotados:
+                logger.error(f"[Worker] {len(agotados)} trabajos huérfanos sin intentos pasaron a 'error'")
+        except Exception as e:
+            session.rollback()
+            logger.error(f"[Worker] Error recuperando trabajos huérfanos: {e}")
+        finally:
+            session.close()
+
+    async def _recuperar_huerfanos_periodico(self) -> None:
+        # no solo al arrancar: un trabajo de un worker caído con la API arriba también vuelve a la cola
+        ahora = asyncio.get_running_loop().time()
+        if ahora < self._proxima_recuperacion:
+            return
+        self._proxima_recuperacion = ahora + settings.trabajos_intervalo_huerfanos_seg
+        await ejecutar_en("bd", self._recuperar_huerfanos)
+
+    async def _loop(self, indice: int) -> None:
+        while not self._detener.is_set():
+            try:
+                if indice == 0:
+                    await self._recuperar_huerfanos_periodico()
+                procesado = await self.procesar_siguiente()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[Worker {indice}] Error inesperado: {e}", exc_info=True)
+                procesado = False
+
+            if not procesado:
+                try:
+                    await asyncio.wait_for(self._detener.wait(), timeout=self.intervalo_sondeo)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def procesar_siguiente(self) -> bool:
+        """Procesa un trabajo pendiente. Retorna False si la cola está vacía."""
+        # sesión, SELECT ... FOR UPDATE, commits y archivos van al pool "bd":
+        # el worker comparte el event loop con la API
+        session = await ejecutar_en("bd", Session)
+        try:
+            repo = EstadoTrabajoRepositorio(session)
+            trabajo = await ejecutar_en("bd", self._tomar_siguiente, session, repo)
+            if trabajo is None:
+                return False
+
+            id_trabajo = trabajo["id_trabajo"]
+            logger.info(f"[Worker] Procesando trabajo {id_trabajo} (intento {trabajo['intentos']})")
+            latido = asyncio.create_task(self._latido(id_trabajo))
+            try:
+                contenido = await ejecutar_en("bd", Path(trabajo["ruta_archivo"]).read_bytes)
+                resultado = await IngestaWorkflow(session).run(
+                    input_data={
+                        "usuario_id": trabajo["id_usuario"],
+                        "nombre_archivo": trabajo["nombre_archivo"] or "",
+                        "mime_type": trabajo["mime_type"] or "application/pdf",
+                        "contenido": contenido,
+                    }
+                )
+            except Exception as e:
+                resultado = {
+                    "exito": False,
+                    "error": str(e),
+                    "error_tipo": type(e).__name__,
+                }
+            finally:
+                latido.cancel()
+
+            await ejecutar_en("bd", self._registrar_resultado, session, repo, id_trabajo, resultado)
+            return True
+        except Exception:
+            await ejecutar_en("bd", session.rollback)
+            raise
+        finally:
+            await ejecutar_en("bd", session.close)
+
+    async def _latido(self, id_trabajo) -> None:
+        # mientras el pipeline corre, el trabajo no debe parecer huérfano
+        while True:
+            await asyncio.sleep(settings.trabajos_intervalo_latido_seg)
+            await ejecutar_en("bd", self._renovar, id_trabajo)
+
+    @staticmethod
+    def _renovar(id_trabajo) -> None:
+        # sesión propia: la del trabajo la está usando el pipeline en otro hilo
+        session = Session()
+        try:
+            EstadoTrabajoRepositorio(session).renovar(id_trabajo)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"[Worker] No se pudo renovar el trabajo {id_trabajo}: {e}")
+        finally:
+            session.close()
+
+    @staticmethod
+    def _tomar_siguiente(session, repo: EstadoTrabajoRepositorio) -> Optional[Dict]:
+        trabajos = repo.tomar_pendientes(
+            TIPO_TRABAJO_INGESTA,
+            limite=1,
+            espera_reintento_seg=settings.trabajos_espera_reintento_seg,
+            max_intentos=settings.trabajos_max_intentos,
+        )
+        if not trabajos:
+            session.rollback()
+            return None
+
+        trabajo = trabajos[0]
+        # copia antes del commit: después los atributos expiran y leerlos consultaría la BD
+        datos = {
+            "id_trabajo": trabajo.id_trabajo,
+            "id_usuario": trabajo.id_usuario,
+            "intentos": trabajo.intentos,
+            "nombre_archivo": trabajo.nombre_archivo,
+            "mime_type": trabajo.mime_type,
+            "ruta_archivo": trabajo.ruta_archivo,
+        }
+        session.commit()  # libera el lock; el trabajo queda 'en_proceso'
+        return datos
+
+    @staticmethod
+    def _registrar_resultado(session, repo: EstadoTrabajoRepositorio, id_trabajo, resultado: Dict) -> None:
+        trabajo = repo.obtener(id_trabajo)
+        if resultado.get("exito"):
+            repo.marcar_completado(
+                trabajo,
+                id_comprobante=resultado.get("comprobante_id"),
+                mensaje=resultado.get("mensaje"),
+            )
+            session.commit()
+            Path(trabajo.ruta_archivo).unlink(missing_ok=True)
+            logger.info(f"[Worker] Trabajo {id_trabajo} completado")
+        else:
+            causa = resultado.get("error_causa") or resultado.get("error_tipo")
+            repo.marcar_fallido(
+                trabajo,
+                codigo_error=resultado.get("error_tipo"),
+                mensaje=resultado.get("error"),
+                max_intentos=settings.trabajos_max_intentos,
+                reintentable=causa not in ERRORES_NO_REINTENTABLES,
+            )
+            session.commit()
+            if trabajo.estado == "error":
+                # sin más intentos el archivo no se vuelve a leer
+                Path(trabajo.ruta_archivo).unlink(missing_ok=True)
+            logger.warning(f"[Worker] Trabajo {id_trabajo} falló ({trabajo.estado}): {resultado.get('error')}")
+
+async def main() -> None:
+    worker = WorkerIngesta()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.solicitar_detencion)
+        except NotImplementedError:  # Windows
+            pass
+
+    await worker.iniciar()
+    try:
+        await worker.esperar()
+    finally:
+        await worker.detener()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""
+Cache en disco de respuestas del LLM.
+
+Los modelos corren con `temperature: 0` y semilla fija, así que el mismo
+prompt con el mismo modelo, opciones, schema de salida e instrucciones da
+siempre la misma respuesta. La clave es el SHA-256 de todo eso
+(`clave_llm`). Solo se guardan respuestas ya validadas por el llamador.
+
+Las entradas vencen a los `llm_cache_max_dias`; el almacenamiento y el
+desalojo LRU son los de `CacheDisco`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Optional
+
+from app.config.settings import settings
+from app.utils.cache_disco import CacheDisco
+
+# subir cuando cambie el formato de la entrada para invalidar lo anterior
+VERSION_FORMATO = 1
+
+
+def clave_llm(agente: Any, prompt: str, **extra: Any) -> str:
+    """
+    Clave de cache para una ejecución de `agente` con `prompt`.
+
+    Args:
+        agente: Agent de agno (se usan id, opciones y formato del modelo, e instrucciones)
+        prompt: Mensaje del usuario
+        **extra: Otros datos de los que depende la respuesta (p. ej. la fecha)
+    """
+    modelo = agente.model
+    material = {
+        "modelo": getattr(modelo, "id", None),
+        "opciones": getattr(modelo, "options", None),
+        "formato": getattr(modelo, "format", None),
+        "instrucciones": agente.instructions,
+        "prompt": prompt,
+        **extra,
+    }
+    serializado = json.dumps(material, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+
+
+class CacheLlm(CacheDisco):
+    nombre = "CacheLlm"
+    campo = "contenido"
+
+    def __init__(self, directorio: str, max_bytes: int, max_edad_segundos: float):
+        super().__init__(directorio, max_bytes, max_edad_segundos)
+
+    @property
+    def version(self) -> int:
+        return VERSION_FORMATO
+
+    def obtener(self, clave: str) -> Optional[str]:
+        """Respuesta cacheada para la clave, o None si no existe o venció."""
+        return self.leer(clave)
+
+    def guardar(self, clave: str, contenido: str) -> None:
+        self.escribir(clave, contenido)
+
+
+_cache: Optional[CacheLlm] = None
+
+
+def get_cache_llm() -> Optional[CacheLlm]:
+    """Cache de respuestas LLM del proceso, o None si está deshabilitado."""
+    global _cache
+    if not settings.llm_cache_habilitado:
+        return None
+    if _cache is None:
+        _cache = CacheLlm(
+            directorio=settings.llm_cache_dir,
+            max_bytes=int(settings.llm_cache_max_mb * 1024 * 1024),
+            max_edad_segundos=settings.llm_cache_max_dias * 86400,
+        )
+    return _cache
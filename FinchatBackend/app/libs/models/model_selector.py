@@ -1,13 +1,80 @@
+import json
+import logging
+import threading
+from typing import Dict, Optional, Type, Union
+
 from agno.models.ollama import Ollama
+from pydantic import BaseModel
+
 from app.config.settings import settings
 
+logger = logging.getLogger(__name__)
+
+# un Ollama por schema de salida: cada uno mantiene su cliente HTTP (y sus conexiones keep-alive)
+_modelos: Dict[str, Ollama] = {}
+_lock = threading.Lock()
+
+
+def get_ollama(formato: Optional[Union[Type[BaseModel], Dict]] = None) -> Ollama:
+    """
+    Modelo Ollama compartido del proceso.
+
+    Args:
+        formato: Modelo pydantic (o JSON schema) que la respuesta debe cumplir.
+            Ollama restringe la decodificación al schema, así la salida siempre
+            parsea y termina en cuanto el objeto se cierra.
+    """
+    esquema = None
+    if formato is not None and settings.ollama_salida_estructurada:
+        esquema = formato.model_json_schema() if isinstance(formato, type) else formato
+
+    clave = json.dumps(esquema, sort_keys=True) if esquema is not None else ""
+    with _lock:
+        modelo = _modelos.get(clave)
+        if modelo is None:
+            modelo = Ollama(
+                id=settings.ollama_model,
+                host=settings.ollama_host,
+                format=esquema,
+                keep_alive=settings.ollama_keep_alive,
+                options={
+                    "temperature": 0,
+                    "seed": 123,
+                },
+            )
+            _modelos[clave] = modelo
+        return modelo
+
+
+def precalentar_ollama() -> bool:
+    """
+    Carga el modelo en Ollama y lo deja residente por `ollama_keep_alive`.
+
+    Un generate con prompt vacío solo carga el modelo; así la primera
+    petición de un usuario no paga la carga en frío.
+    """
+    try:
+        get_ollama().get_client().generate(
+            model=settings.ollama_model,
+            prompt="",
+            keep_alive=settings.ollama_keep_alive,
+        )
+    except Exception as e:
+        logger.error(f"[Ollama] No se pudo precalentar {settings.ollama_model}: {e}")
+        return False
+    logger.info(f"[Ollama] Modelo {settings.ollama_model} residente (keep_alive={settings.ollama_keep_alive})")
+    return True
+
+
+def limpiar_modelos() -> None:
+    with _lock:
+        _modelos.clear()
+
 
-def get_ollama() -> Ollama:
-    return Ollama(
-        id=settings.ollama_model,
-        host=settings.ollama_host,
-        options={
-            "temperature": 0,
-            "seed": 123,
-        },
-    )
+def estadisticas_ollama() -> Dict:
+    return {
+        "modelo": settings.ollama_model,
+        "keep_alive": settings.ollama_keep_alive,
+        "instancias": len(_modelos),
+        "clientes_http": sum(1 for m in _modelos.values() if m.client is not None or m.async_client is not None),
+    }
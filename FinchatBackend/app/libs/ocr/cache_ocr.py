@@ -0,0 +1,58 @@
+"""
+Cache en disco de resultados OCR direccionado por contenido.
+
+La clave es el SHA-256 del archivo (`calcular_hash_bytes`), así que un mismo
+archivo subido por distintos usuarios se procesa con OCR una sola vez. Cada
+entrada es un JSON con el texto, la confianza y las páginas; el
+almacenamiento y el desalojo LRU son los de `CacheDisco`.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from app.config.settings import settings
+from app.utils.cache_disco import CacheDisco
+
+# subir cuando cambie el formato del resultado OCR para invalidar lo anterior
+VERSION_FORMATO = 3
+
+
+class CacheOcr(CacheDisco):
+    nombre = "CacheOcr"
+    campo = "resultado"
+
+    def __init__(self, directorio: str, max_bytes: int):
+        super().__init__(directorio, max_bytes)
+
+    @property
+    def version(self) -> int:
+        return VERSION_FORMATO
+
+    def obtener(self, hash_archivo: str) -> Optional[Dict]:
+        """
+        Resultado OCR cacheado para el hash.
+
+        Returns:
+            Dict con `texto`, `confianza_promedio` y `paginas`, o None si no existe
+        """
+        return self.leer(hash_archivo)
+
+    def guardar(self, hash_archivo: str, resultado: Dict) -> None:
+        self.escribir(hash_archivo, resultado)
+
+
+_cache: Optional[CacheOcr] = None
+
+
+def get_cache_ocr() -> Optional[CacheOcr]:
+    """Cache OCR del proceso, o None si está deshabilitado."""
+    global _cache
+    if not settings.ocr_cache_habilitado:
+        return None
+    if _cache is None:
+        _cache = CacheOcr(
+            directorio=settings.ocr_cache_dir,
+            max_bytes=int(settings.ocr_cache_max_mb * 1024 * 1024),
+        )
+    return _cache
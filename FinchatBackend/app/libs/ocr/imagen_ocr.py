@@ -3,8 +3,9 @@
 from __future__ import annotations
 
 from functools import lru_cache
-from typing import Iterable, Tuple
+from typing import Iterable, Tuple, Union
 
+import cv2
 import numpy as np
 from paddleocr import PaddleOCR
 
@@ -54,11 +55,7 @@ def _parse_result(result: Iterable) -> Tuple[list, list]:
     return [], []
 
 
-def extraer_texto_img(ruta_img: str) -> dict:
-    ocr = _get_ocr()
-    result = ocr.ocr(ruta_img)
-    textos, scores = _parse_result(result)
-
+def resultado_ocr(textos: list, scores: list) -> dict:
     if scores:
         confianza_promedio = float(np.mean(scores))
     else:
@@ -68,3 +65,26 @@ def extraer_texto_img(ruta_img: str) -> dict:
         "texto": "\n".join(textos),
         "confianza_promedio": confianza_promedio,
     }
+
+
+def decodificar_imagen(contenido: bytes) -> np.ndarray:
+    """Decodifica la imagen en memoria a un arreglo BGR, el formato que espera PaddleOCR."""
+    imagen = cv2.imdecode(np.frombuffer(contenido, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if imagen is None:
+        raise ValueError("No se pudo decodificar la imagen")
+    return imagen
+
+
+def extraer_texto_img(fuente: Union[bytes, np.ndarray, str]) -> dict:
+    """
+    Texto y confianza promedio de una imagen.
+
+    Args:
+        fuente: Bytes de la imagen, arreglo ya decodificado o ruta en disco
+    """
+    if isinstance(fuente, (bytes, bytearray, memoryview)):
+        fuente = decodificar_imagen(bytes(fuente))
+
+    ocr = _get_ocr()
+    result = ocr.ocr(fuente)
+    return resultado_ocr(*_parse_result(result))
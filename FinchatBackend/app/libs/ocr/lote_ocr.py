@@ -0,0 +1,190 @@
+"""
+Worker de PaddleOCR con micro-lotes dinámicos.
+
+Las imágenes de todos los requests en curso entran a una cola; un hilo
+dedicado las agrupa (hasta `max_lote` imágenes o `max_espera_ms` desde la
+primera) y las envía juntas a `PaddleOCR.predict`. Cada imagen recibe su
+resultado por un `Future`, así que los handlers async pueden esperarlo sin
+bloquear el event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config.settings import settings
+from app.libs.ocr.imagen_ocr import _get_ocr, _parse_result, resultado_ocr
+
+logger = logging.getLogger(__name__)
+
+_FIN = object()
+
+
+class OcrLoteWorker:
+    def __init__(self, max_lote: int, max_espera_ms: float):
+        self.max_lote = max_lote
+        self.max_espera = max_espera_ms / 1000
+        self._cola: "queue.Queue[Tuple[np.ndarray, Future]]" = queue.Queue()
+        self._hilo: Optional[threading.Thread] = None
+        # True si el hilo ya no atiende la cola (falló la carga del modelo)
+        self._cerrado = False
+        self._lock_cola = threading.Lock()
+
+        self.lotes = 0
+        self.imagenes = 0
+        self.max_lote_observado = 0
+
+    @property
+    def activo(self) -> bool:
+        return self._hilo is not None and self._hilo.is_alive() and not self._cerrado
+
+    def iniciar(self) -> None:
+        if self.activo:
+            return
+        self._cerrado = False
+        self._hilo = threading.Thread(target=self._bucle, name="ocr-lote", daemon=True)
+        self._hilo.start()
+        logger.info(f"[OcrLote] Worker iniciado (lote={self.max_lote}, espera={self.max_espera * 1000:.0f}ms)")
+
+    def detener(self, timeout: Optional[float] = 10.0) -> None:
+        if not self.activo:
+            return
+        self._cola.put(_FIN)
+        self._hilo.join(timeout)
+        self._hilo = None
+        logger.info("[OcrLote] Worker detenido")
+
+    def enviar(self, imagen: np.ndarray) -> Future:
+        """Encola una imagen decodificada; el Future resuelve a {texto, confianza_promedio}."""
+        futuro: Future = Future()
+        # mismo lock que el cierre por error: ninguna imagen queda en una cola sin hilo
+        with self._lock_cola:
+            if not self.activo:
+                raise RuntimeError("El worker OCR por lotes no está iniciado")
+            self._cola.put((imagen, futuro))
+        return futuro
+
+    async def reconocer(self, imagen: np.ndarray) -> Dict:
+        return await asyncio.wrap_future(self.enviar(imagen))
+
+    def _tomar_lote(self) -> Tuple[List[Tuple[np.ndarray, Future]], bool]:
+        primero = self._cola.get()
+        if primero is _FIN:
+            return [], True
+
+        lote = [primero]
+        limite = time.monotonic() + self.max_espera
+        while len(lote) < self.max_lote:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                item = self._cola.get(timeout=restante)
+            except queue.Empty:
+                break
+            if item is _FIN:
+                return lote, True
+            lote.append(item)
+        return lote, False
+
+    def _fallar_pendientes(self, error: BaseException) -> None:
+        while True:
+            try:
+                item = self._cola.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _FIN and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(error)
+
+    def _bucle(self) -> None:
+        try:
+            ocr = _get_ocr()  # se carga una vez, en este hilo
+        except Exception as e:
+            logger.error(f"[OcrLote] No se pudo cargar PaddleOCR: {e}")
+            with self._lock_cola:
+                self._cerrado = True
+                self._fallar_pendientes(e)
+            return
+
+        fin = False
+        while not fin:
+            lote, fin = self._tomar_lote()
+            # descartar imágenes cuyo solicitante ya canceló
+            lote = [(img, fut) for img, fut in lote if fut.set_running_or_notify_cancel()]
+            if not lote:
+                continue
+
+            try:
+                resultados = list(ocr.predict([img for img, _ in lote]))
+            except Exception as e:
+                logger.error(f"[OcrLote] Falló la inferencia de un lote de {len(lote)}: {e}")
+                for _, futuro in lote:
+                    futuro.set_exception(e)
+                continue
+
+            self.lotes += 1
+            self.imagenes += len(lote)
+            self.max_lote_observado = max(self.max_lote_observado, len(lote))
+
+            for (_, futuro), resultado in zip(lote, resultados):
+                try:
+                    futuro.set_result(resultado_ocr(*_parse_result([resultado])))
+                except Exception as e:
+                    logger.error(f"[OcrLote] No se pudo convertir un resultado: {e}")
+                    futuro.set_exception(e)
+
+            # predict devolvió menos resultados que imágenes: ningún Future queda sin resolver
+            faltantes = lote[len(resultados):]
+            if faltantes:
+                error = RuntimeError(f"PaddleOCR devolvió {len(resultados)} resultados para {len(lote)} imágenes")
+                logger.error(f"[OcrLote] {error}")
+                for _, futuro in faltantes:
+                    futuro.set_exception(error)
+
+    def estadisticas(self) -> Dict:
+        return {
+            "activo": self.activo,
+            "en_cola": self._cola.qsize(),
+            "lotes": self.lotes,
+            "imagenes": self.imagenes,
+            "lote_promedio": round(self.imagenes / self.lotes, 2) if self.lotes else 0.0,
+            "lote_maximo": self.max_lote_observado,
+        }
+
+
+_worker: Optional[OcrLoteWorker] = None
+_lock = threading.Lock()
+
+
+def get_ocr_lote_worker() -> OcrLoteWorker:
+    """Worker del proceso; se inicia en el primer uso."""
+    global _worker
+    with _lock:
+        if _worker is None:
+            _worker = OcrLoteWorker(
+                max_lote=settings.ocr_lote_max,
+                max_espera_ms=settings.ocr_lote_espera_ms,
+            )
+        if not _worker.activo:
+            _worker.iniciar()
+        return _worker
+
+
+def detener_ocr_lote_worker() -> None:
+    global _worker
+    with _lock:
+        if _worker is not None:
+            _worker.detener()
+            _worker = None
+
+
+def estadisticas_ocr_lote() -> Dict:
+    return _worker.estadisticas() if _worker is not None else {"activo": False}
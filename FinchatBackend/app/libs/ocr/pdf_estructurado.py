@@ -0,0 +1,248 @@
+"""
+Extracción estructurada de PDFs digitales a partir de coordenadas.
+
+Usa las palabras de `page.get_text("words")` para reconstruir líneas (por
+posición vertical), los campos clave-valor del comprobante y las filas de la
+tabla de ítems (asignando cada número a la columna del encabezado más
+cercana). Cada campo lleva una confianza; si los requeridos superan el
+umbral, el parseador no necesita llamar al LLM.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.utils import patrones
+from app.utils.extraccion_patron import (
+    extraer_items,
+    filas_items,
+    inicio_items,
+    moneda_por_palabras,
+    nombre_antes_de_ruc,
+    numero_item,
+    tipo_por_palabras,
+)
+from app.utils.limpieza import ruc_valido
+
+# (x0, y0, x1, y1, texto)
+Palabra = Tuple[float, float, float, float, str]
+
+CAMPOS_REQUERIDOS = ("ruc", "razon_social", "serie", "numero", "fecha_emision", "monto_total", "items")
+
+_ETIQUETAS_TOTAL = ("IMPORTE TOTAL", "TOTAL A PAGAR", "TOTAL VENTA", "MONTO TOTAL", "TOTAL")
+_EXCLUIR_TOTAL = ("SUB TOTAL", "SUBTOTAL", "TOTAL IGV", "OP.", "GRAVADA", "DESCUENTO", "TOTAL DSCTO")
+_INICIO_CLIENTE = ("CLIENTE", "SEÑOR", "SENOR", "ADQUIRIENTE")
+
+_COLUMNAS = {
+    "descripcion": ("DESCRIP", "DESCRIPCION", "DESCRIPCIÓN"),
+    "cantidad": ("CANT", "CANT.", "CANTIDAD"),
+    "precio_unitario": ("P.U", "P.U.", "PRECIO", "P.UNIT", "P.UNIT.", "UNIT", "UNIT.", "V.UNIT", "VALOR"),
+    "monto_item": ("IMPORTE", "TOTAL", "P.TOTAL", "SUBTOTAL", "MONTO"),
+}
+
+
+def agrupar_lineas(palabras: Sequence[Palabra]) -> List[List[Palabra]]:
+    """Agrupa palabras en líneas por su centro vertical y las ordena de izquierda a derecha."""
+    if not palabras:
+        return []
+
+    alturas = sorted(p[3] - p[1] for p in palabras)
+    tolerancia = max(alturas[len(alturas) // 2] / 2, 1.0)
+
+    lineas: List[List[Palabra]] = []
+    centros: List[float] = []
+    for palabra in sorted(palabras, key=lambda p: ((p[1] + p[3]) / 2, p[0])):
+        centro = (palabra[1] + palabra[3]) / 2
+        if lineas and abs(centro - centros[-1]) <= tolerancia:
+            lineas[-1].append(palabra)
+        else:
+            lineas.append([palabra])
+            centros.append(centro)
+
+    return [sorted(linea, key=lambda p: p[0]) for linea in lineas]
+
+
+def _texto(linea: Sequence[Palabra]) -> str:
+    return " ".join(p[4] for p in linea)
+
+
+def _emisor(textos: List[str]) -> Tuple[Optional[str], Optional[str], float, float]:
+    for idx, texto in enumerate(textos):
+        upper = texto.upper()
+        if any(k in upper for k in _INICIO_CLIENTE):
+            break
+        match = patrones.RUC.search(texto)
+        if not match:
+            continue
+
+        ruc = match.group(1)
+        # el nombre antes de la etiqueta RUC o en la línea anterior
+        nombre = nombre_antes_de_ruc(texto[:match.start()])
+        confianza_nombre = 0.85
+        if not nombre and idx > 0:
+            nombre = textos[idx - 1].strip()
+        if not nombre and textos:
+            nombre, confianza_nombre = textos[0].strip(), 0.6
+        return ruc, nombre or None, 0.95 if ruc_valido(ruc) else 0.5, confianza_nombre if nombre else 0.0
+
+    return None, None, 0.0, 0.0
+
+
+def _fecha(textos: List[str]) -> Tuple[Optional[str], float]:
+    candidata, confianza = None, 0.0
+    for texto in textos:
+        match = patrones.FECHA_DMA.search(texto)
+        if not match:
+            continue
+        dia, mes, anio = (int(g) for g in match.groups())
+        try:
+            iso = date(anio, mes, dia).isoformat()
+        except ValueError:
+            continue
+        upper = texto.upper()
+        if "EMISI" in upper or "FECHA" in upper:
+            return iso, 0.95
+        if candidata is None:
+            candidata, confianza = iso, 0.7
+    return candidata, confianza
+
+
+def _total(textos: List[str]) -> Tuple[Optional[float], float]:
+    for texto in reversed(textos):
+        upper = texto.upper()
+        if not any(e in upper for e in _ETIQUETAS_TOTAL) or any(e in upper for e in _EXCLUIR_TOTAL):
+            continue
+        numeros = [n for n in (numero_item(t) for t in texto.split()) if n is not None]
+        if numeros:
+            return numeros[-1], 0.9
+    return None, 0.0
+
+
+def _columnas(encabezado: Sequence[Palabra]) -> Dict[str, float]:
+    columnas: Dict[str, float] = {}
+    for palabra in encabezado:
+        token = palabra[4].upper()
+        for campo, etiquetas in _COLUMNAS.items():
+            if campo not in columnas and (token in etiquetas or token.startswith(etiquetas[0])):
+                columnas[campo] = (palabra[0] + palabra[2]) / 2
+    return columnas
+
+
+def _items(lineas: List[List[Palabra]]) -> List[Dict]:
+    textos = [_texto(linea) for linea in lineas]
+    inicio = inicio_items(textos)
+    if inicio is None:
+        return []
+
+    columnas = _columnas(lineas[inicio])
+    if not columnas:
+        # encabezado sin columnas reconocibles: se lee como texto
+        return extraer_items(textos)
+
+    items: List[Dict] = []
+    for idx in filas_items(textos, inicio):
+        descripcion, valores = [], {}
+        sueltos: List[float] = []
+        for palabra in lineas[idx]:
+            valor = numero_item(palabra[4])
+            if valor is None:
+                descripcion.append(palabra[4])
+                continue
+            centro = (palabra[0] + palabra[2]) / 2
+            campo = min(columnas, key=lambda c: abs(columnas[c] - centro))
+            if campo == "descripcion":
+                # número dentro de la descripción ("GASEOSA 1.5 LIT")
+                descripcion.append(palabra[4])
+            elif campo in valores:
+                sueltos.append(valor)
+            else:
+                valores[campo] = valor
+
+        if not valores and not sueltos:
+            # descripción partida en varias líneas
+            if items and descripcion:
+                items[-1]["descripcion"] += " " + " ".join(descripcion)
+            continue
+
+        if "monto_item" not in valores:
+            numeros = list(valores.values()) + sueltos
+            valores["monto_item"] = numeros[-1]
+        items.append({
+            "descripcion": " ".join(descripcion) or "ITEM",
+            "cantidad": valores.get("cantidad", 1.0),
+            "precio_unitario": valores.get("precio_unitario", valores["monto_item"]),
+            "monto_item": valores["monto_item"],
+        })
+    return items
+
+
+def extraer_estructura(paginas: Sequence[Sequence[Palabra]]) -> Dict:
+    """
+    Comprobante estructurado desde las palabras de cada página.
+
+    Args:
+        paginas: Palabras (x0, y0, x1, y1, texto) de cada página, en orden
+
+    Returns:
+        Dict con `comprobante`, `emisor`, `items` (esquema de ComprobanteParsed)
+        y `confianza` por campo (0-1)
+    """
+    lineas = [linea for palabras in paginas for linea in agrupar_lineas(palabras)]
+    textos = [_texto(linea) for linea in lineas]
+    completo = "\n".join(textos).upper()
+
+    ruc, razon_social, conf_ruc, conf_nombre = _emisor(textos)
+
+    serie, numero, conf_serie = None, None, 0.0
+    match = patrones.SERIE_NUMERO_ELECTRONICO.search(completo)
+    if match:
+        serie, numero, conf_serie = match.group(1), match.group(2), 0.95
+
+    fecha, conf_fecha = _fecha(textos)
+    total, conf_total = _total(textos)
+    items = _items(lineas)
+
+    conf_items = 0.0
+    if items:
+        suma = sum(i["monto_item"] for i in items)
+        conf_items = 0.95 if total is not None and abs(suma - total) <= 0.05 else 0.5
+
+    tipo = tipo_por_palabras(completo)
+    tipo, conf_tipo = (tipo, 0.9) if tipo else ("boleta", 0.5)
+
+    moneda = moneda_por_palabras(completo)
+    moneda, conf_moneda = (moneda, 0.9) if moneda else ("PEN", 0.6)
+
+    return {
+        "comprobante": {
+            "tipo_comprobante": tipo,
+            "serie": serie,
+            "numero": numero,
+            "fecha_emision": fecha,
+            "moneda": moneda,
+            "monto_total": total,
+            "origen": "electronico",
+        },
+        "emisor": {"ruc": ruc, "razon_social": razon_social, "nombre_comercial": None},
+        "items": items,
+        "confianza": {
+            "ruc": conf_ruc,
+            "razon_social": conf_nombre,
+            "serie": conf_serie,
+            "numero": conf_serie,
+            "fecha_emision": conf_fecha,
+            "monto_total": conf_total,
+            "items": conf_items,
+            "tipo_comprobante": conf_tipo,
+            "moneda": conf_moneda,
+        },
+    }
+
+
+def estructura_confiable(estructura: Optional[Dict], umbral: float) -> bool:
+    """True si todos los campos requeridos tienen confianza >= umbral."""
+    if not estructura:
+        return False
+    confianza = estructura.get("confianza", {})
+    return all(confianza.get(campo, 0.0) >= umbral for campo in CAMPOS_REQUERIDOS)
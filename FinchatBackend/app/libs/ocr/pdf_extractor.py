@@ -1,9 +1,134 @@
+"""
+Extracción de texto de PDFs con PyMuPDF.
+
+Los PDFs largos se reparten por rangos de páginas entre procesos (PyMuPDF no
+es seguro entre hilos). Las páginas sin capa de texto (escaneadas) se
+renderizan a PNG para que el llamador las pase por OCR de imagen.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple, Union
+
 import fitz  # PyMuPDF
 
+from app.config.settings import settings
+from app.utils.ejecutores import ejecutar_en
+
+_executor: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def _abrir(fuente: Union[bytes, str]) -> fitz.Document:
+    if isinstance(fuente, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=bytes(fuente), filetype="pdf")
+    return fitz.open(fuente)
+
+
+def _extraer_pagina(page: fitz.Page, numero_pagina: int, dpi: int, min_caracteres: int) -> dict:
+    texto = page.get_text("text")
+    escaneada = len(texto.strip()) < min_caracteres
+    return {
+        "numero_pagina": numero_pagina,
+        "texto": texto,
+        "escaneada": escaneada,
+        "imagen": page.get_pixmap(dpi=dpi).tobytes("png") if escaneada else None,
+        # palabras con coordenadas para la extracción estructurada de PDFs digitales
+        "palabras": [] if escaneada else [tuple(w[:5]) for w in page.get_text("words")],
+    }
+
+
+def _extraer_rango(fuente: Union[bytes, str], inicio: int, fin: int, dpi: int, min_caracteres: int) -> List[dict]:
+    """Páginas [inicio, fin) del PDF; corre dentro de un proceso del pool."""
+    with _abrir(fuente) as doc:
+        return [_extraer_pagina(doc[i], i + 1, dpi, min_caracteres) for i in range(inicio, fin)]
+
+
+def _rangos(total_paginas: int, partes: int) -> List[Tuple[int, int]]:
+    tamano = -(-total_paginas // partes)  # división hacia arriba
+    return [(i, min(i + tamano, total_paginas)) for i in range(0, total_paginas, tamano)]
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.pdf_procesos,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def detener_executor_pdf() -> None:
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _contar_paginas(fuente: Union[bytes, str]) -> int:
+    with _abrir(fuente) as doc:
+        return doc.page_count
+
+
+def _repartir(total_paginas: int) -> bool:
+    return total_paginas >= settings.pdf_paralelo_min_paginas and settings.pdf_procesos > 1
+
+
+def extraer_paginas_pdf(fuente: Union[bytes, str]) -> List[dict]:
+    """
+    Páginas del PDF con su texto y, si no tienen capa de texto, su render PNG.
+
+    Args:
+        fuente: Contenido del PDF en memoria, o ruta en disco
+
+    Returns:
+        Lista ordenada de {numero_pagina, texto, escaneada, imagen, palabras}
+    """
+    dpi, min_caracteres = settings.pdf_dpi_escaneo, settings.pdf_min_caracteres_texto
+    total = _contar_paginas(fuente)
+    if not _repartir(total):
+        return _extraer_rango(fuente, 0, total, dpi, min_caracteres)
+
+    executor = _get_executor()
+    futuros = [
+        executor.submit(_extraer_rango, fuente, ini, fin, dpi, min_caracteres)
+        for ini, fin in _rangos(total, settings.pdf_procesos)
+    ]
+    return [pagina for futuro in futuros for pagina in futuro.result()]
+
+
+async def extraer_paginas_pdf_async(fuente: Union[bytes, str]) -> List[dict]:
+    """
+    Igual que `extraer_paginas_pdf` sin bloquear el event loop: en el loop solo
+    se cuentan las páginas; los PDFs cortos se extraen en el executor "ocr" y
+    los largos en el pool de procesos.
+    """
+    dpi, min_caracteres = settings.pdf_dpi_escaneo, settings.pdf_min_caracteres_texto
+    total = _contar_paginas(fuente)
+    if not _repartir(total):
+        return await ejecutar_en("ocr", _extraer_rango, fuente, 0, total, dpi, min_caracteres)
+
+    executor = _get_executor()
+    partes = await asyncio.gather(*(
+        asyncio.wrap_future(executor.submit(_extraer_rango, fuente, ini, fin, dpi, min_caracteres))
+        for ini, fin in _rangos(total, settings.pdf_procesos)
+    ))
+    return [pagina for parte in partes for pagina in parte]
+
+
+def extraer_texto_pdf(fuente: Union[bytes, str]) -> list[dict]:
+    """
+    Texto por página de un PDF.
 
-def extraer_texto_pdf(ruta_pdf: str) -> list[dict]:
-    paginas = []
-    with fitz.open(ruta_pdf) as doc:
-        for i, page in enumerate(doc, start=1):
-            paginas.append({"numero_pagina": i, "texto": page.get_text("text")})
-    return paginas
+    Args:
+        fuente: Contenido del PDF en memoria, o ruta en disco
+    """
+    with _abrir(fuente) as doc:
+        return [{"numero_pagina": i, "texto": page.get_text("text")} for i, page in enumerate(doc, start=1)]
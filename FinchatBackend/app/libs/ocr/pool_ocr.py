@@ -0,0 +1,135 @@
+"""
+Pool de procesos para PaddleOCR.
+
+PaddleOCR es CPU-bound y retiene el GIL en buena parte de la inferencia, así
+que un hilo no escala con los núcleos. Cada proceso del pool carga su propia
+instancia de `PaddleOCR` una sola vez (en el initializer) y recibe los bytes
+de la imagen; devuelve `{texto, confianza_promedio}`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+from app.config.settings import settings
+from app.libs.ocr.imagen_ocr import _get_ocr, extraer_texto_img
+
+logger = logging.getLogger(__name__)
+
+
+def _inicializar_worker() -> None:
+    # se ejecuta una vez por proceso: deja el modelo cargado (lru_cache de _get_ocr)
+    _get_ocr()
+
+
+def _reconocer_en_worker(contenido: bytes) -> Dict:
+    return extraer_texto_img(contenido)
+
+
+def _precalentar() -> bool:
+    return True
+
+
+class OcrProcesoPool:
+    def __init__(
+        self,
+        procesos: int,
+        inicializador: Callable[[], None] = _inicializar_worker,
+        funcion: Callable[[bytes], Dict] = _reconocer_en_worker,
+    ):
+        self.procesos = procesos
+        self._inicializador = inicializador
+        self._funcion = funcion
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        self.tareas = 0
+        self.en_curso = 0
+        self.errores = 0
+        self.reinicios = 0
+        self._tiempo_total = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: PaddlePaddle no es seguro tras un fork con hilos activos
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.procesos,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self._inicializador,
+                )
+            return self._executor
+
+    def iniciar(self) -> None:
+        """Levanta los procesos y carga el modelo en cada uno antes del primer request."""
+        executor = self._get_executor()
+        for futuro in [executor.submit(_precalentar) for _ in range(self.procesos)]:
+            futuro.result()
+        logger.info(f"[OcrPool] {self.procesos} procesos listos")
+
+    def detener(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    async def reconocer(self, contenido: bytes) -> Dict:
+        """OCR de la imagen (bytes codificados) en un proceso del pool."""
+        loop = asyncio.get_running_loop()
+        inicio = time.perf_counter()
+        self.en_curso += 1
+        try:
+            return await loop.run_in_executor(self._get_executor(), self._funcion, contenido)
+        except BrokenProcessPool:
+            # un proceso murió (p. ej. OOM): el próximo request crea un pool nuevo
+            self.errores += 1
+            self.reinicios += 1
+            logger.error("[OcrPool] Pool roto, se recreará en la próxima tarea")
+            self.detener()
+            raise
+        except Exception:
+            self.errores += 1
+            raise
+        finally:
+            self.en_curso -= 1
+            self.tareas += 1
+            self._tiempo_total += time.perf_counter() - inicio
+
+    def estadisticas(self) -> Dict:
+        return {
+            "activo": self._executor is not None,
+            "procesos": self.procesos,
+            "en_curso": self.en_curso,
+            "tareas": self.tareas,
+            "errores": self.errores,
+            "reinicios": self.reinicios,
+            "tiempo_promedio_seg": round(self._tiempo_total / self.tareas, 3) if self.tareas else 0.0,
+        }
+
+
+_pool: Optional[OcrProcesoPool] = None
+
+
+def get_ocr_pool() -> OcrProcesoPool:
+    global _pool
+    if _pool is None:
+        _pool = OcrProcesoPool(procesos=settings.ocr_procesos)
+    return _pool
+
+
+def detener_ocr_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.detener()
+        _pool = None
+
+
+def estadisticas_ocr_pool() -> Dict:
+    return _pool.estadisticas() if _pool is not None else {"activo": False}
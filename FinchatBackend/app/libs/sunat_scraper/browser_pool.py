@@ -0,0 +1,245 @@
+"""
+Pool persistente de Chromium para el scraper de SUNAT.
+
+Mantiene un solo navegador abierto con un conjunto de páginas precalentadas
+(cada una en su propio contexto). El tamaño del pool es también el límite de
+consultas concurrentes. El navegador se reinicia cuando se cae o cuando
+alcanza `max_usos` consultas.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from playwright.async_api import Browser, Page, Playwright, async_playwright
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+class SunatBrowserPool:
+    def __init__(
+        self,
+        tamano: Optional[int] = None,
+        max_usos: Optional[int] = None,
+        intervalo_salud_seg: Optional[float] = None,
+        headless: Optional[bool] = None,
+    ):
+        self.tamano = max(1, tamano or settings.sunat_pool_tamano)
+        self.max_usos = max(1, max_usos or settings.sunat_pool_max_usos)
+        self.intervalo_salud_seg = intervalo_salud_seg or settings.sunat_pool_intervalo_salud_seg
+        self.headless = settings.sunat_headless if headless is None else headless
+
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._paginas: asyncio.Queue[Page] = asyncio.Queue()
+        self._limite = asyncio.Semaphore(self.tamano)
+        self._cond = asyncio.Condition()
+        self._vigilante: Optional[asyncio.Task] = None
+
+        self.activo = False
+        self._reiniciando = False
+        self._en_uso = 0
+        self._usos_navegador = 0
+        self._faltantes = 0
+        self.reinicios = 0
+        self.errores = 0
+
+    # ------------------------------------------------------------------
+    # ciclo de vida
+    # ------------------------------------------------------------------
+    async def iniciar(self) -> None:
+        if self.activo:
+            return
+        self._playwright = await async_playwright().start()
+        await self._lanzar_navegador()
+        self.activo = True
+        self._vigilante = asyncio.create_task(self._vigilar(), name="sunat-pool-salud")
+        logger.info(f"[SunatPool] Navegador iniciado con {self.tamano} páginas")
+
+    async def detener(self) -> None:
+        self.activo = False
+        if self._vigilante:
+            self._vigilante.cancel()
+            await asyncio.gather(self._vigilante, return_exceptions=True)
+            self._vigilante = None
+        await self._cerrar_navegador()
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+        logger.info("[SunatPool] Navegador detenido")
+
+    async def _lanzar_navegador(self) -> None:
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        self._paginas = asyncio.Queue()
+        for _ in range(self.tamano):
+            self._paginas.put_nowait(await self._nueva_pagina())
+        self._usos_navegador = 0
+        self._faltantes = 0
+
+    async def _nueva_pagina(self) -> Page:
+        context = await self._browser.new_context(user_agent=USER_AGENT)
+        return await context.new_page()
+
+    async def _cerrar_navegador(self) -> None:
+        browser, self._browser = self._browser, None
+        if browser:
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.warning(f"[SunatPool] Error cerrando navegador: {e}")
+
+    async def _reiniciar(self) -> None:
+        logger.info(f"[SunatPool] Reiniciando navegador (usos={self._usos_navegador})")
+        await self._cerrar_navegador()
+        await self._lanzar_navegador()
+        self.reinicios += 1
+
+    def _necesita_reinicio(self) -> bool:
+        return (
+            self._browser is None
+            or not self._browser.is_connected()
+            or self._usos_navegador >= self.max_usos
+        )
+
+    # ------------------------------------------------------------------
+    # préstamo de páginas
+    # ------------------------------------------------------------------
+    async def _entrar(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: not self._reiniciando)
+            if self._necesita_reinicio():
+                # esperar a que se devuelvan todas las páginas antes de reiniciar
+                self._reiniciando = True
+                try:
+                    await self._cond.wait_for(lambda: self._en_uso == 0)
+                    await self._reiniciar()
+                finally:
+                    self._reiniciando = False
+                    self._cond.notify_all()
+            self._en_uso += 1
+            self._usos_navegador += 1
+
+    async def _salir(self) -> None:
+        async with self._cond:
+            self._en_uso -= 1
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def pagina(self) -> AsyncIterator[Page]:
+        """Presta una página del pool; bloquea si todas están en uso."""
+        if not self.activo:
+            raise RuntimeError("SunatBrowserPool no está iniciado")
+
+        async with self._limite:
+            await self._entrar()
+            try:
+                page = await self._tomar_pagina()
+                sana = True
+                try:
+                    yield page
+                except asyncio.CancelledError:
+                    # cancelada a mitad de navegación: la página puede seguir cargando, no se reutiliza
+                    sana = False
+                    raise
+                except Exception:
+                    sana = False
+                    self.errores += 1
+                    raise
+                finally:
+                    await self._devolver(page, sana)
+            finally:
+                await self._salir()
+
+    async def _tomar_pagina(self) -> Page:
+        # con el semáforo tomado, si la cola está vacía es porque falta una
+        # página que no se pudo recrear: se crea aquí
+        if self._paginas.empty() and self._faltantes > 0:
+            self._faltantes -= 1
+            try:
+                return await self._nueva_pagina()
+            except Exception:
+                self._faltantes += 1
+                self._usos_navegador = self.max_usos
+                raise
+        return await self._paginas.get()
+
+    async def _devolver(self, page: Page, sana: bool) -> None:
+        if sana and not page.is_closed():
+            self._paginas.put_nowait(page)
+            return
+
+        # página en mal estado: reemplazarla por una nueva en un contexto limpio
+        try:
+            await page.context.close()
+        except Exception:
+            pass
+        try:
+            self._paginas.put_nowait(await self._nueva_pagina())
+        except Exception as e:
+            # el navegador se cayó: forzar reinicio en el próximo préstamo
+            logger.error(f"[SunatPool] No se pudo crear página nueva: {e}")
+            self._faltantes += 1
+            self._usos_navegador = self.max_usos
+
+    # ------------------------------------------------------------------
+    # health checks
+    # ------------------------------------------------------------------
+    async def _vigilar(self) -> None:
+        while True:
+            await asyncio.sleep(self.intervalo_salud_seg)
+            try:
+                await self.verificar_salud()
+            except Exception as e:
+                logger.error(f"[SunatPool] Error en health check: {e}")
+
+    async def verificar_salud(self) -> None:
+        """Reinicia el navegador si se cayó y no hay consultas en curso."""
+        async with self._cond:
+            if self._reiniciando or self._en_uso > 0:
+                return
+            if self._browser is None or not self._browser.is_connected():
+                logger.warning("[SunatPool] Navegador desconectado, reiniciando")
+                await self._reiniciar()
+
+    def salud(self) -> Dict:
+        return {
+            "activo": self.activo,
+            "conectado": bool(self._browser and self._browser.is_connected()),
+            "tamano": self.tamano,
+            "paginas_libres": self._paginas.qsize(),
+            "en_uso": self._en_uso,
+            "usos_navegador": self._usos_navegador,
+            "max_usos": self.max_usos,
+            "reinicios": self.reinicios,
+            "errores": self.errores,
+        }
+
+
+_pool: Optional[SunatBrowserPool] = None
+
+
+def get_browser_pool() -> Optional[SunatBrowserPool]:
+    """Pool del proceso, o None si no se inició (el scraper lanza su propio navegador)."""
+    return _pool if _pool and _pool.activo else None
+
+
+async def iniciar_browser_pool() -> SunatBrowserPool:
+    global _pool
+    if _pool is None:
+        _pool = SunatBrowserPool()
+    await _pool.iniciar()
+    return _pool
+
+
+async def detener_browser_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.detener()
+        _pool = None
@@ -9,66 +9,156 @@ from __future__ import annotations
 
 import logging
 import re
-from typing import Dict, Optional
+import time
+from typing import Dict, Optional, Tuple
 
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 
+from app.config.settings import settings
+from app.libs.sunat_scraper.browser_pool import USER_AGENT, get_browser_pool
+
 logger = logging.getLogger(__name__)
 
+# marcadores que indican que SUNAT ya respondió la búsqueda
+TEXTO_RESULTADO = "Número de RUC:"
+TEXTO_SIN_RESULTADOS = "No se encontraron resultados"
 
-class SunatRucScraper:
-    def __init__(self, headless: bool = True):
-        self.headless = headless
-        self.url_consulta = "https://e-consultaruc.sunat.gob.pe/cl-ti-itmrconsruc/FrameCriterioBusquedaWeb.jsp"
+FASES = ("goto", "fill", "result", "extract")
 
-    async def consultar_ruc(self, ruc: str) -> Optional[Dict[str, str]]:
-        logger.info(f"Iniciando scraping async SUNAT para RUC: {ruc}")
+# resultado de una consulta: permite distinguir "no existe" de "falló"
+ESTADO_ENCONTRADO = "encontrado"
+ESTADO_NO_ENCONTRADO = "no_encontrado"
+ESTADO_ERROR = "error"
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=self.headless)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            )
-            page = await context.new_page()
 
-            try:
-                # Navegar a la página
-                await page.goto(self.url_consulta, timeout=30000)
+class MetricasScraper:
+    """Acumula tiempos por fase (ms) de las consultas a SUNAT del proceso."""
 
-                # Llenar formulario
-                await page.wait_for_selector("#txtRuc", state="visible", timeout=10000)
-                await page.fill("#txtRuc", ruc)
+    def __init__(self):
+        self.consultas = 0
+        self.total_ms = {fase: 0.0 for fase in FASES}
+        self.max_ms = {fase: 0.0 for fase in FASES}
 
-                # Click en Buscar
-                await page.click("#btnAceptar", timeout=5000)
+    def registrar(self, tiempos: Dict[str, float]) -> None:
+        self.consultas += 1
+        for fase, ms in tiempos.items():
+            self.total_ms[fase] += ms
+            self.max_ms[fase] = max(self.max_ms[fase], ms)
 
-                # Esperar resultados
-                await page.wait_for_timeout(5000)
+    def resumen(self) -> Dict:
+        return {
+            "consultas": self.consultas,
+            "promedio_ms": {
+                fase: round(total / self.consultas, 1) if self.consultas else 0.0
+                for fase, total in self.total_ms.items()
+            },
+            "max_ms": {fase: round(ms, 1) for fase, ms in self.max_ms.items()},
+        }
 
-                # Extraer datos
-                datos = await self._extraer_datos(page)
 
-                if datos:
-                    logger.info(f"✓ RUC {ruc}: {datos.get('razon_social')} - Estado: {datos.get('estado_ruc')} - Condición: {datos.get('condicion_ruc')} - CIIU: {datos.get('ciiu')}")
-                else:
-                    logger.warning(f"No se pudieron extraer datos para RUC {ruc}")
- 
-                return datos
+metricas_scraper = MetricasScraper()
 
-            except PlaywrightTimeoutError:
-                logger.error(f"Timeout scrapeando SUNAT para RUC {ruc}")
-                return None
-            except Exception as e:
-                logger.error(f"Error scrapeando SUNAT: {e}")
-                return None
-            finally:
-                await browser.close()
 
-    async def _extraer_datos(self, page) -> Optional[Dict[str, str]]:
-        try:
-            texto_body = await page.inner_text("body")
+class SunatRucScraper:
+    def __init__(self, headless: bool = True):
+        self.headless = headless
+        self.url_consulta = "https://e-consultaruc.sunat.gob.pe/cl-ti-itmrconsruc/FrameCriterioBusquedaWeb.jsp"
+        self.timeout_resultado_ms = settings.sunat_timeout_resultado_ms
+        self.ultimos_tiempos: Dict[str, float] = {}
+
+    async def consultar_ruc(self, ruc: str) -> Optional[Dict[str, str]]:
+        _, datos = await self.consultar_ruc_con_estado(ruc)
+        return datos
+
+    async def consultar_ruc_con_estado(self, ruc: str) -> Tuple[str, Optional[Dict[str, str]]]:
+        """
+        Consulta un RUC indicando además cómo terminó la consulta.
+
+        Returns:
+            (estado, datos) donde estado es ESTADO_ENCONTRADO,
+            ESTADO_NO_ENCONTRADO (SUNAT no tiene el RUC) o ESTADO_ERROR
+            (timeout, error de navegador o página no reconocida).
+        """
+        logger.info(f"Iniciando scraping async SUNAT para RUC: {ruc}")
 
-            if "No se encontraron resultados" in texto_body:
+        try:
+            pool = get_browser_pool()
+            if pool is not None:
+                # Navegador persistente del proceso (ver browser_pool)
+                async with pool.pagina() as page:
+                    estado, datos = await self._consultar_en_pagina(page, ruc)
+            else:
+                async with async_playwright() as p:
+                    browser = await p.chromium.launch(headless=self.headless)
+                    try:
+                        context = await browser.new_context(user_agent=USER_AGENT)
+                        page = await context.new_page()
+                        estado, datos = await self._consultar_en_pagina(page, ruc)
+                    finally:
+                        await browser.close()
+
+        except PlaywrightTimeoutError:
+            logger.error(f"Timeout scrapeando SUNAT para RUC {ruc}")
+            return ESTADO_ERROR, None
+        except Exception as e:
+            logger.error(f"Error scrapeando SUNAT: {e}")
+            return ESTADO_ERROR, None
+
+        if datos:
+            logger.info(f"✓ RUC {ruc}: {datos.get('razon_social')} - Estado: {datos.get('estado_ruc')} - Condición: {datos.get('condicion_ruc')} - CIIU: {datos.get('ciiu')}")
+        elif estado == ESTADO_NO_ENCONTRADO:
+            logger.warning(f"RUC {ruc} no encontrado en SUNAT")
+        else:
+            logger.warning(f"No se pudieron extraer datos para RUC {ruc}")
+
+        return estado, datos
+
+    async def _consultar_en_pagina(self, page, ruc: str) -> Tuple[str, Optional[Dict[str, str]]]:
+        tiempos: Dict[str, float] = {}
+        self.ultimos_tiempos = tiempos
+        inicio = time.perf_counter()
+
+        def marcar(fase: str) -> None:
+            nonlocal inicio
+            ahora = time.perf_counter()
+            tiempos[fase] = (ahora - inicio) * 1000
+            inicio = ahora
+
+        # Navegar a la página
+        await page.goto(self.url_consulta, timeout=30000)
+        marcar("goto")
+
+        # Llenar formulario
+        await page.wait_for_selector("#txtRuc", state="visible", timeout=10000)
+        await page.fill("#txtRuc", ruc)
+        marcar("fill")
+
+        # Click en Buscar y esperar el panel de resultados o el aviso de
+        # "sin resultados", lo que aparezca primero
+        await page.click("#btnAceptar", timeout=5000)
+        respuesta = page.get_by_text(TEXTO_RESULTADO).or_(page.get_by_text(TEXTO_SIN_RESULTADOS))
+        await respuesta.first.wait_for(state="visible", timeout=self.timeout_resultado_ms)
+        marcar("result")
+
+        # Extraer datos
+        texto_body = await page.inner_text("body")
+        if TEXTO_SIN_RESULTADOS in texto_body:
+            estado, datos = ESTADO_NO_ENCONTRADO, None
+        else:
+            datos = self._extraer_datos(texto_body)
+            estado = ESTADO_ENCONTRADO if datos and datos.get("razon_social") else ESTADO_ERROR
+        marcar("extract")
+
+        metricas_scraper.registrar(tiempos)
+        logger.info(
+            f"Tiempos SUNAT RUC {ruc}: "
+            + ", ".join(f"{fase}={ms:.0f}ms" for fase, ms in tiempos.items())
+        )
+        return estado, datos
+
+    def _extraer_datos(self, texto_body: str) -> Optional[Dict[str, str]]:
+        try:
+            if TEXTO_SIN_RESULTADOS in texto_body:
                 return None
 
             resultado = {
@@ -0,0 +1,153 @@
+"""
+Cache en disco de entradas JSON por clave hexadecimal (SHA-256).
+
+Cada entrada es un archivo `<dir>/<clave[:2]>/<clave>.json` con la versión de
+formato, la fecha de creación y el valor. Las escrituras son atómicas (tmp +
+`os.replace`), así varios procesos comparten el directorio. Cuando supera el
+tamaño máximo se eliminan las entradas usadas hace más tiempo (LRU por mtime;
+cada lectura actualiza el mtime). Opcionalmente las entradas vencen.
+
+Los caches concretos (`CacheOcr`, `CacheLlm`) definen el nombre del campo del
+valor y su versión de formato.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# al desalojar se baja hasta este porcentaje del máximo para no desalojar en cada escritura
+_FRACCION_OBJETIVO = 0.9
+
+
+class CacheDisco:
+    # prefijo de los logs y campo de la entrada que guarda el valor
+    nombre = "CacheDisco"
+    campo = "valor"
+
+    def __init__(self, directorio: str, max_bytes: int, max_edad_segundos: Optional[float] = None):
+        self.directorio = Path(directorio)
+        self.max_bytes = max_bytes
+        self.max_edad_segundos = max_edad_segundos
+        self._lock = threading.Lock()
+        self._tamano_total: Optional[int] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.expiradas = 0
+        self.desalojadas = 0
+
+    @property
+    def version(self) -> int:
+        """Versión del formato; subirla invalida las entradas anteriores."""
+        return 1
+
+    def _ruta(self, clave: str) -> Path:
+        return self.directorio / clave[:2] / f"{clave}.json"
+
+    def leer(self, clave: str) -> Optional[Any]:
+        """Valor guardado para la clave, o None si no existe, es de otra versión o venció."""
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                entrada = json.load(f)
+            if entrada.get("version") != self.version:
+                self.misses += 1
+                return None
+            if self.max_edad_segundos is not None and time.time() - entrada["creado"] > self.max_edad_segundos:
+                ruta.unlink(missing_ok=True)
+                self.expiradas += 1
+                self.misses += 1
+                return None
+            os.utime(ruta)  # marca de uso reciente para el LRU
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"[{self.nombre}] Entrada ilegible {ruta.name}: {e}")
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entrada[self.campo]
+
+    def escribir(self, clave: str, valor: Any) -> None:
+        ruta = self._ruta(clave)
+        datos = json.dumps(
+            {"version": self.version, "creado": time.time(), self.campo: valor},
+            ensure_ascii=False,
+        ).encode("utf-8")
+
+        try:
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            tamano_previo = ruta.stat().st_size if ruta.exists() else 0
+            # escritura atómica: otro proceso nunca lee un JSON a medias
+            fd, ruta_tmp = tempfile.mkstemp(dir=ruta.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(datos)
+            os.replace(ruta_tmp, ruta)
+        except OSError as e:
+            logger.warning(f"[{self.nombre}] No se pudo guardar {clave[:8]}: {e}")
+            return
+
+        with self._lock:
+            if self._tamano_total is None:
+                self._tamano_total = self._calcular_tamano()
+            else:
+                self._tamano_total += len(datos) - tamano_previo
+            if self._tamano_total > self.max_bytes:
+                self._desalojar()
+
+    def _entradas(self) -> List[Tuple[float, int, Path]]:
+        entradas = []
+        for ruta in self.directorio.glob("*/*.json"):
+            try:
+                stat = ruta.stat()
+            except FileNotFoundError:
+                continue
+            entradas.append((stat.st_mtime, stat.st_size, ruta))
+        return entradas
+
+    def _calcular_tamano(self) -> int:
+        return sum(tamano for _, tamano, _ in self._entradas())
+
+    def _desalojar(self) -> None:
+        entradas = sorted(self._entradas())
+        total = sum(tamano for _, tamano, _ in entradas)
+        objetivo = self.max_bytes * _FRACCION_OBJETIVO
+
+        for _, tamano, ruta in entradas:
+            if total <= objetivo:
+                break
+            try:
+                ruta.unlink()
+            except FileNotFoundError:
+                pass
+            total -= tamano
+            self.desalojadas += 1
+
+        self._tamano_total = total
+        logger.info(f"[{self.nombre}] Desalojo completado, tamaño actual {total / 1024 / 1024:.1f} MB")
+
+    def estadisticas(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "activo": True,
+            "directorio": str(self.directorio),
+            "tamano_bytes": self._tamano_total,
+            "max_bytes": self.max_bytes,
+            "max_edad_segundos": self.max_edad_segundos,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expiradas": self.expiradas,
+            "desalojadas": self.desalojadas,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,107 @@
+"""
+Executors de hilos dedicados para el trabajo bloqueante del pipeline.
+
+Las corrutinas de ingesta llaman código síncrono (OCR inline, `agent.run`,
+`Session` de SQLAlchemy). Ejecutarlo directo en la corrutina congela el event
+loop y con él todos los requests del worker, incluido /health. Cada tipo de
+trabajo tiene su propio pool con tamaño configurable, así un lote de OCR no
+deja sin hilos a las consultas de BD:
+
+  - "ocr": PaddleOCR inline, PyMuPDF y decodificación de imágenes (1 hilo por
+           defecto: ni el modelo ni PyMuPDF son thread-safe)
+  - "llm": llamadas síncronas al modelo y clasificación
+  - "bd":  consultas y commits con la sesión síncrona, y archivos en disco
+           (uploads encolados, caches)
+
+`ejecutar_en` copia las ContextVars del llamador, así el estado vinculado con
+`registro_agentes.vincular` llega a las herramientas que corren en el pool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_pendientes: Dict[str, int] = {}
+_completadas: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def _hilos(nombre: str) -> int:
+    tamanos = {
+        "ocr": settings.ejecutor_ocr_hilos,
+        "llm": settings.ejecutor_llm_hilos,
+        "bd": settings.ejecutor_bd_hilos,
+    }
+    if nombre not in tamanos:
+        raise ValueError(f"Executor desconocido: {nombre}")
+    return max(1, tamanos[nombre])
+
+
+def _get_executor(nombre: str) -> ThreadPoolExecutor:
+    with _lock:
+        executor = _executors.get(nombre)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=_hilos(nombre), thread_name_prefix=f"finchat-{nombre}")
+            _executors[nombre] = executor
+            logger.info(f"[Ejecutores] Pool '{nombre}' iniciado con {executor._max_workers} hilos")
+        return executor
+
+
+def _contar(nombre: str, pendientes: int, completadas: int = 0) -> None:
+    with _lock:
+        _pendientes[nombre] = _pendientes.get(nombre, 0) + pendientes
+        _completadas[nombre] = _completadas.get(nombre, 0) + completadas
+
+
+async def ejecutar_en(nombre: str, funcion: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Ejecuta `funcion` en el pool `nombre` sin bloquear el event loop.
+
+    Args:
+        nombre: "ocr", "llm" o "bd"
+        funcion: Función síncrona; recibe `args` y `kwargs`
+
+    Returns:
+        Lo que devuelva `funcion` (sus excepciones se propagan)
+    """
+    executor = _get_executor(nombre)
+    contexto = contextvars.copy_context()
+    llamada = functools.partial(contexto.run, funcion, *args, **kwargs)
+
+    _contar(nombre, 1)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, llamada)
+    finally:
+        _contar(nombre, -1, 1)
+
+
+def detener_ejecutores() -> None:
+    with _lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
+
+
+def estadisticas_ejecutores() -> Dict:
+    with _lock:
+        return {
+            nombre: {
+                "hilos": executor._max_workers,
+                "pendientes": _pendientes.get(nombre, 0),
+                "completadas": _completadas.get(nombre, 0),
+            }
+            for nombre, executor in _executors.items()
+        }
@@ -1,91 +1,59 @@
-import re
-from typing import Optional
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.utils import patrones
+
+@dataclass(frozen=True)
+class CamposTexto:
+    """Campos de un texto OCR extraídos en una sola pasada."""
+    serie_numero: Optional[str]
+    fecha: Optional[str]
+    fecha_etiquetada: bool
+    fechas: Tuple[str, ...]
+    moneda: Optional[str]
+    nombre_cliente: Optional[str]
+    dni_cliente: Optional[str]
+    linea_importe_total: Optional[str]
+    etiqueta_total: Optional[str]
+    version: str = patrones.VERSION_PATRONES
 
 def compactar(texto: str) -> str:
     if not texto:
         return ""
-    return re.sub(r"\s+", " ", texto).strip()
+    return patrones.ESPACIOS.sub(" ", texto).strip()
 
-def extraer_serie_numero(texto: str) -> Optional[str]:
-    if not texto:
-        return None
-
-    compact = compactar(texto)
-
-    patrones = [
-        r"\b((?:[FBTVE][A-Z0-9]{3})-\d{1,8})\b",  # FXXX-123, BXXX-123, EB01-123, etc.
-        r"\b([A-Z]{1,4}\d{0,3}-\d{1,8})\b",       # B001-000123, T001-123, etc.
-        r"\b([A-Z]{1,4}\d{0,3})\s*(?:N[Oº\.]|\bN\b)?\s*\.?\s*0*([0-9]{3,12})\b",  # B001 No.172923
-    ]
-
-    for patron in patrones:
-        match = re.search(patron, compact)
+def _serie_numero(compact: str) -> Optional[str]:
+    for patron in patrones.SERIE_NUMERO:
+        match = patron.search(compact)
         if match:
             if match.lastindex and match.lastindex >= 2:
                 return f"{match.group(1)}-{match.group(2)}"
             return match.group(1)
-
     return None
 
-def extraer_fecha(texto: str) -> Optional[str]:
-    if not texto:
-        return None
-
-    compact = compactar(texto)
-
-    patrones = [
-        # "Fecha de Emisión : 02/08/2025"
-        r"Fecha\s+de\s+Emisi[oó]n[^0-9]{0,20}(\d{2}/\d{2}/\d{4})",
-        # "Fecha emision: 06/09/2025 ..."
-        r"Fecha[^0-9]{0,20}(\d{2}/\d{2}/\d{4})",
-        # Fallback: primer dd/mm/yyyy que aparezca
-        r"(\d{2}/\d{2}/\d{4})",
-    ]
-
-    for patron in patrones:
-        match = re.search(patron, compact, flags=re.IGNORECASE)
+def _fecha(compact: str) -> Tuple[Optional[str], bool]:
+    for idx, patron in enumerate(patrones.FECHA):
+        match = patron.search(compact)
         if match:
-            return match.group(1)
-
-    return None
-
-def extraer_moneda(texto: str) -> Optional[str]:
-    if not texto:
-        return None
-
-    compact = compactar(texto)
+            return match.group(1), idx < patrones.FECHAS_ETIQUETADAS
+    return None, False
 
+def _moneda(compact: str) -> Optional[str]:
     # 1) 'Tipo de Moneda : SOLES'
-    match = re.search(
-        r"Tipo\s+de?\s*Moneda\s*[:\-]?\s*([A-Z/.$]+)",
-        compact,
-        flags=re.IGNORECASE,
-    )
-    if match:
-        return match.group(1).upper()
-
     # 2) Si no hay campo explícito, usar la línea 'SON: ... SOLES'
-    match = re.search(
-        r"SON[:\s]+.*?\b(SOLES?|DOLARES?|USD|US\$|PEN|S/\.?)\b",
-        compact,
-        flags=re.IGNORECASE,
-    )
-    if match:
-        return match.group(1).upper()
-
+    for patron in (patrones.MONEDA_TIPO, patrones.MONEDA_SON):
+        match = patron.search(compact)
+        if match:
+            return match.group(1).upper()
     return None
 
-def extraer_nombre_cliente(texto: str) -> Optional[str]:
-    if not texto:
-        return None
-
-    lineas = [ln.strip() for ln in texto.splitlines()]
+def _nombre_cliente(lineas: List[str]) -> Optional[str]:
     for idx, linea in enumerate(lineas):
         if not linea:
             continue
 
         lower = linea.lower()
-        if not any(kw in lower for kw in ["señor", "cliente", "nombre", "sr."]):
+        if not any(kw in lower for kw in patrones.CLIENTE_PALABRAS):
             continue
 
         # Unir con la siguiente línea para manejar el caso:
@@ -94,68 +62,168 @@ def extraer_nombre_cliente(texto: str) -> Optional[str]:
         if idx + 1 < len(lineas):
             joined = linea + " " + lineas[idx + 1].strip()
 
-        match = re.search(
-            r"(?:Señor\(es\)|Cliente|Nombre(?:\s+Cliente)?|Sr\.?)\s*[:\-]?\s*(.+)",
-            joined,
-            flags=re.IGNORECASE,
-        )
+        match = patrones.CLIENTE.search(joined)
         if match:
             valor = match.group(1)
             # Cortar si aparecen otros labels ('DNI', 'RUC', etc.)
-            valor = re.split(r"\b(DNI|RUC|DOC\.?|DOCUMENTO)\b", valor)[0]
+            valor = patrones.CLIENTE_CORTE.split(valor)[0]
             valor = valor.strip(" :,-")
             if len(valor) >= 3:
                 return valor
 
     return None
 
-def extraer_dni_cliente(texto: str) -> Optional[str]:
-    if not texto:
-        return None
+def _dni_cliente(compact: str) -> Optional[str]:
+    # 1) Preferir DNI (8 dígitos); 2) RUC asociado al cliente
+    for patron in (patrones.DNI_CLIENTE, patrones.RUC_CLIENTE):
+        match = patron.search(compact)
+        if match:
+            return match.group(1)
+    return None
 
-    compact = compactar(texto)
+def _importe_total(compact: str) -> Tuple[Optional[str], Optional[str]]:
+    for etiqueta, patron in patrones.IMPORTE_TOTAL:
+        match = patron.search(compact)
+        if match:
+            return match.group(0), etiqueta
+    return None, None
 
-    # 1) Preferir DNI (8 dígitos)
-    match = re.search(
-        r"(?:DNI|DOC(?:\.|UMENTO)?(?:\s+DE\s+IDENTIDAD)?)\s*[:\-]?\s*(\d{8})",
-        compact,
-        flags=re.IGNORECASE,
-    )
-    if match:
-        return match.group(1)
-
-    # 2) RUC asociado al cliente
-    match = re.search(
-        r"Cliente.*?RUC\s*[:\-]?\s*(\d{11})",
-        compact,
-        flags=re.IGNORECASE,
+def extraer_campos(texto: str) -> CamposTexto:
+    """
+    Extrae todos los campos por patrones compactando el texto una sola vez.
+
+    Args:
+        texto: Texto OCR del comprobante
+
+    Returns:
+        CamposTexto con los mismos valores que las funciones `extraer_*` por separado
+    """
+    compact = compactar(texto)
+    fecha, fecha_etiquetada = _fecha(compact)
+    linea_total, etiqueta_total = _importe_total(compact)
+    return CamposTexto(
+        serie_numero=_serie_numero(compact),
+        fecha=fecha,
+        fecha_etiquetada=fecha_etiquetada,
+        fechas=tuple(dict.fromkeys(m.group(1) for m in patrones.FECHA[-1].finditer(compact))),
+        moneda=_moneda(compact),
+        nombre_cliente=_nombre_cliente([ln.strip() for ln in texto.splitlines()]) if texto else None,
+        dni_cliente=_dni_cliente(compact),
+        linea_importe_total=linea_total,
+        etiqueta_total=etiqueta_total,
     )
-    if match:
-        return match.group(1)
 
+def nombre_antes_de_ruc(linea: str) -> str:
+    # "COMERCIAL OMEGA SAC RUC: 2034..." -> "COMERCIAL OMEGA SAC"
+    return patrones.ETIQUETA_RUC.split(linea)[0].strip(" :-")
+
+def moneda_por_palabras(texto: str) -> Optional[str]:
+    """'USD' o 'PEN' según las palabras de moneda del texto, o None si no aparece ninguna."""
+    upper = texto.upper()
+    if any(palabra in upper for palabra in patrones.PALABRAS_DOLARES):
+        return "USD"
+    if any(palabra in upper for palabra in patrones.PALABRAS_SOLES):
+        return "PEN"
     return None
 
-def extraer_linea_importe_total(texto: str) -> Optional[str]:
+def tipo_por_palabras(texto: str) -> Optional[str]:
+    """'factura' o 'boleta' si el texto lo nombra, o None."""
+    upper = texto.upper()
+    for palabra, tipo in patrones.PALABRAS_TIPO:
+        if palabra in upper:
+            return tipo
+    return None
+
+def numero_item(token: str) -> Optional[float]:
+    """Importe de una celda de la tabla de ítems, o None si el token no es un número."""
+    match = patrones.NUMERO_ITEM.match(token.strip())
+    if not match:
+        return None
+    valor = match.group(1)
+    if "," in valor and "." in valor:
+        valor = valor.replace(",", "")
+    else:
+        valor = valor.replace(",", ".")
+    return float(valor)
+
+def inicio_items(lineas: List[str]) -> Optional[int]:
+    """Índice de la línea de encabezado de la tabla de ítems, o None."""
+    for idx, linea in enumerate(lineas):
+        upper = linea.upper()
+        if any(k in upper for k in patrones.ETIQUETAS_INICIO_ITEMS) \
+                and any(k in upper for k in patrones.ETIQUETAS_COLUMNA_ITEMS):
+            return idx
+    return None
+
+def filas_items(lineas: List[str], inicio: int) -> Iterator[int]:
+    """Índices de las filas de la tabla que empieza en `inicio`, sin separadores, hasta los totales."""
+    for idx in range(inicio + 1, len(lineas)):
+        linea = lineas[idx]
+        if patrones.SEPARADOR.match(linea):
+            continue
+        if any(k in linea.upper() for k in patrones.ETIQUETAS_FIN_ITEMS):
+            return
+        yield idx
+
+def extraer_items(lineas: List[str]) -> List[Dict]:
+    """
+    Ítems de la tabla del comprobante leyendo cada línea de texto.
+
+    La descripción llega hasta el último token no numérico ("GASEOSA 1.5 LIT 1 7.00");
+    de los números, el último es el importe y el primero la cantidad. Una
+    línea sin números continúa la descripción del ítem anterior.
+    """
+    inicio = inicio_items(lineas)
+    if inicio is None:
+        return []
+
+    items: List[Dict] = []
+    for idx in filas_items(lineas, inicio):
+        tokens = lineas[idx].split()
+        corte = max((i for i, t in enumerate(tokens) if numero_item(t) is None), default=-1) + 1
+        numeros = [numero_item(t) for t in tokens[corte:]]
+        if not numeros:
+            if items and corte:
+                items[-1]["descripcion"] += " " + " ".join(tokens)
+            continue
+
+        monto = numeros[-1]
+        cantidad = numeros[0] if len(numeros) >= 2 and numeros[0] > 0 else 1.0
+        precio = numeros[1] if len(numeros) >= 3 else round(monto / cantidad, 2)
+        items.append({
+            "descripcion": " ".join(tokens[:corte]) or "ITEM",
+            "cantidad": cantidad,
+            "precio_unitario": precio,
+            "monto_item": monto,
+        })
+    return items
+
+def extraer_serie_numero(texto: str) -> Optional[str]:
     if not texto:
         return None
+    return _serie_numero(compactar(texto))
 
-    compact = compactar(texto)
+def extraer_fecha(texto: str) -> Optional[str]:
+    if not texto:
+        return None
+    return _fecha(compactar(texto))[0]
 
-    labels = [
-        "Importe Total",
-        "Monto Total",
-        "Total de Venta",
-        "Total Venta",
-        "Importe a Pagar",
-        "Total a Pagar",
-        "Neto a Pagar",
-        "Total",
-    ]
-
-    for label in labels:
-        patron = rf"{label}\s*[:\-]?\s*(S/\.?\s*)?([\d.,]+)"
-        match = re.search(patron, compact, flags=re.IGNORECASE)
-        if match:
-            return match.group(0)
+def extraer_moneda(texto: str) -> Optional[str]:
+    if not texto:
+        return None
+    return _moneda(compactar(texto))
 
-    return None
+def extraer_nombre_cliente(texto: str) -> Optional[str]:
+    if not texto:
+        return None
+    return _nombre_cliente([ln.strip() for ln in texto.splitlines()])
+
+def extraer_dni_cliente(texto: str) -> Optional[str]:
+    if not texto:
+        return None
+    return _dni_cliente(compactar(texto))
+
+def extraer_linea_importe_total(texto: str) -> Optional[str]:
+    if not texto:
+        return None
+    return _importe_total(compactar(texto))[0]
@@ -0,0 +1,144 @@
+"""
+Parser incremental del primer objeto JSON de una respuesta en streaming.
+
+Recibe los fragmentos a medida que llegan, ignora el texto previo al primer
+`{` (fences de markdown, "Aquí está el JSON:") y sigue la profundidad de
+llaves y corchetes fuera de strings. Cada miembro de primer nivel se valida
+en cuanto se cierra, así el llamador puede cortar la generación apenas el
+objeto termina o apenas la salida deja de ser válida.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+ESPERANDO = "esperando"
+EN_OBJETO = "en_objeto"
+COMPLETO = "completo"
+INVALIDO = "invalido"
+
+# texto tolerado antes del primer "{"
+_MAX_PREAMBULO = 200
+_CIERRES = {"{": "}", "[": "]"}
+
+
+class JsonIncremental:
+    def __init__(
+        self,
+        validar_miembro: Optional[Callable[[str, Any], None]] = None,
+        max_caracteres: int = 0,
+    ):
+        """
+        Args:
+            validar_miembro: Recibe (clave, valor) de cada miembro de primer nivel
+                al cerrarse; debe lanzar ValueError si el valor no es aceptable
+            max_caracteres: Corta si el objeto supera este tamaño (0 = sin límite)
+        """
+        self.validar_miembro = validar_miembro
+        self.max_caracteres = max_caracteres
+
+        self.estado = ESPERANDO
+        self.motivo: Optional[str] = None
+        self.recibido = 0
+
+        self._caracteres = 0
+        self._pila: List[str] = []
+        self._en_string = False
+        self._escape = False
+        self._preambulo = 0
+        self._miembro: List[str] = []
+        self._objeto: Dict[str, Any] = {}
+
+    @property
+    def terminado(self) -> bool:
+        return self.estado in (COMPLETO, INVALIDO)
+
+    def alimentar(self, fragmento: str) -> str:
+        """Procesa un fragmento y devuelve el estado resultante."""
+        self.recibido += len(fragmento)
+        for caracter in fragmento:
+            if self.terminado:
+                break
+            self._procesar(caracter)
+
+        if self.estado == EN_OBJETO and self.max_caracteres and self._caracteres > self.max_caracteres:
+            self._invalidar(f"objeto de más de {self.max_caracteres} caracteres")
+        return self.estado
+
+    def resultado(self) -> Dict[str, Any]:
+        """Objeto completo; lanza ValueError si quedó inválido o incompleto."""
+        if self.estado == COMPLETO:
+            return self._objeto
+        if self.estado == INVALIDO:
+            raise ValueError(self.motivo)
+        if self.estado == ESPERANDO:
+            raise ValueError("la respuesta no contiene un objeto JSON")
+        raise ValueError("objeto JSON incompleto")
+
+    def _invalidar(self, motivo: str) -> None:
+        self.estado = INVALIDO
+        self.motivo = motivo
+
+    def _procesar(self, caracter: str) -> None:
+        if self.estado == ESPERANDO:
+            if caracter == "{":
+                self.estado = EN_OBJETO
+                self._pila.append("}")
+                self._caracteres = 1
+            elif not caracter.isspace():
+                self._preambulo += 1
+                if self._preambulo > _MAX_PREAMBULO:
+                    self._invalidar("la respuesta no empieza con un objeto JSON")
+            return
+
+        self._caracteres += 1
+        profundidad = len(self._pila)
+
+        if self._en_string:
+            if self._escape:
+                self._escape = False
+            elif caracter == "\\":
+                self._escape = True
+            elif caracter == '"':
+                self._en_string = False
+            self._miembro.append(caracter)
+            return
+
+        if caracter == '"':
+            self._en_string = True
+        elif caracter in _CIERRES:
+            self._pila.append(_CIERRES[caracter])
+        elif caracter in "}]":
+            if caracter != self._pila[-1]:
+                self._invalidar(f"'{caracter}' inesperado")
+                return
+            self._pila.pop()
+
+        if profundidad == 1 and (caracter == "," or not self._pila):
+            # se cerró un miembro de primer nivel
+            self._cerrar_miembro()
+            if not self._pila and self.estado != INVALIDO:
+                self.estado = COMPLETO
+            return
+
+        self._miembro.append(caracter)
+
+    def _cerrar_miembro(self) -> None:
+        texto = "".join(self._miembro).strip()
+        self._miembro = []
+        if not texto:
+            return
+        try:
+            ((clave, valor),) = json.loads("{" + texto + "}").items()
+        except ValueError:
+            self._invalidar(f"miembro JSON mal formado: {texto[:60]}")
+            return
+
+        if self.validar_miembro is not None:
+            try:
+                self.validar_miembro(clave, valor)
+            except ValueError as e:
+                self._invalidar(f"campo '{clave}' inválido: {e}")
+                return
+        self._objeto[clave] = valor
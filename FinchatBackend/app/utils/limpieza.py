@@ -1,12 +1,16 @@
-import re
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from datetime import date
 
+from app.utils import patrones
+
+_MONEDAS_SOLES = frozenset({"S/.", "S/", "SOLES", "PEN"})
+_MONEDAS_DOLARES = frozenset({"US$", "DOLARES", "USD"})
+
 def limpiar_ruc(texto: str) -> Optional[str]:
     if not texto:
         return None
-    match = re.search(r"\b(\d{11})\b", texto)
+    match = patrones.RUC.search(texto)
     return match.group(1) if match else None
 
 
@@ -14,7 +18,7 @@ def limpiar_monto(fila: str) -> Optional[float]:
   if fila is None:
       return None
   txt = fila.replace(",", "")
-  num = re.search(r"\d+(?:\.\d+)?", txt)
+  num = patrones.MONTO.search(txt)
   return float(num.group()) if num else None
 
 
@@ -31,11 +35,47 @@ def parsear_fecha(texto: str) -> Optional[date]:
 
 def normalizar_moneda(texto: str) -> Optional[str]:
     texto = texto.strip().upper()
-    monedas_soles = ["S/.", "S/", "SOLES", "PEN"]
-    monedas_dolares = ["US$", "DOLARES", "USD"]
-    if texto in monedas_soles:
+    if texto in _MONEDAS_SOLES:
         return "PEN"
-    elif texto in monedas_dolares:
+    elif texto in _MONEDAS_DOLARES:
         return "USD"
     else:
         return "PEN"
+
+_PESOS_RUC = (5, 4, 3, 2, 7, 6, 5, 4, 3, 2)
+
+def ruc_valido(ruc: Optional[str]) -> bool:
+    """Valida longitud, prefijo y dígito verificador (módulo 11) de un RUC."""
+    if not ruc or len(ruc) != 11 or not ruc.isdigit():
+        return False
+    if ruc[:2] not in ("10", "15", "17", "20"):
+        return False
+    suma = sum(int(d) * p for d, p in zip(ruc[:10], _PESOS_RUC))
+    digito = 11 - suma % 11
+    if digito == 10:
+        digito = 0
+    elif digito == 11:
+        digito = 1
+    return digito == int(ruc[10])
+
+
+def candidatos_ruc(texto: str, maximo: int = 2) -> List[str]:
+    """
+    RUCs válidos (dígito verificador) del texto, los etiquetados "RUC" primero.
+
+    Se excluye el RUC del cliente ("Cliente ... RUC: ...") para no consultar
+    a SUNAT por quien recibe el comprobante.
+    """
+    if not texto or maximo <= 0:
+        return []
+    cliente = patrones.RUC_CLIENTE.search(texto)
+    excluir = cliente.group(1) if cliente else None
+
+    etiquetados, otros = [], []
+    for match in patrones.RUC.finditer(texto):
+        ruc = match.group(1)
+        if ruc == excluir or ruc in etiquetados or ruc in otros or not ruc_valido(ruc):
+            continue
+        etiquetado = "RUC" in texto[max(0, match.start() - 12):match.start()].upper()
+        (etiquetados if etiquetado else otros).append(ruc)
+    return (etiquetados + otros)[:maximo]
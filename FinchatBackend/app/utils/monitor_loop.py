@@ -0,0 +1,120 @@
+"""
+Monitor de retraso del event loop.
+
+Una tarea duerme `intervalo` y mide cuánto tarde despierta: ese exceso es el
+tiempo que el loop estuvo ocupado con código bloqueante. Los retrasos por
+encima del umbral se cuentan como bloqueos y se registran en el log.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# muestras recientes para los percentiles (~1 min con el intervalo por defecto)
+_MAX_MUESTRAS = 600
+
+
+class MonitorLoop:
+    def __init__(self, intervalo: float, umbral: float):
+        """
+        Args:
+            intervalo: Segundos entre mediciones
+            umbral: Retraso (segundos) a partir del cual se considera un bloqueo
+        """
+        self.intervalo = intervalo
+        self.umbral = umbral
+        self._tarea: Optional[asyncio.Task] = None
+        self._muestras: Deque[float] = deque(maxlen=_MAX_MUESTRAS)
+
+        self.mediciones = 0
+        self.bloqueos = 0
+        self.retraso_max = 0.0
+        self.ultimo_bloqueo: Optional[float] = None
+
+    @property
+    def activo(self) -> bool:
+        return self._tarea is not None and not self._tarea.done()
+
+    def iniciar(self) -> None:
+        if not self.activo:
+            self._tarea = asyncio.get_running_loop().create_task(self._vigilar())
+
+    async def detener(self) -> None:
+        if self._tarea is None:
+            return
+        self._tarea.cancel()
+        try:
+            await self._tarea
+        except asyncio.CancelledError:
+            pass
+        self._tarea = None
+
+    def registrar(self, retraso: float) -> None:
+        retraso = max(0.0, retraso)
+        self.mediciones += 1
+        self._muestras.append(retraso)
+        self.retraso_max = max(self.retraso_max, retraso)
+        if retraso >= self.umbral:
+            self.bloqueos += 1
+            self.ultimo_bloqueo = time.time()
+            logger.warning(f"[EventLoop] Loop bloqueado {retraso * 1000:.0f} ms")
+
+    async def _vigilar(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            inicio = loop.time()
+            await asyncio.sleep(self.intervalo)
+            self.registrar(loop.time() - inicio - self.intervalo)
+
+    def _percentil(self, fraccion: float) -> float:
+        if not self._muestras:
+            return 0.0
+        ordenadas = sorted(self._muestras)
+        return ordenadas[min(len(ordenadas) - 1, int(fraccion * len(ordenadas)))]
+
+    def estadisticas(self) -> Dict:
+        return {
+            "activo": self.activo,
+            "intervalo_ms": self.intervalo * 1000,
+            "umbral_ms": self.umbral * 1000,
+            "mediciones": self.mediciones,
+            "bloqueos": self.bloqueos,
+            "retraso_p50_ms": round(self._percentil(0.5) * 1000, 2),
+            "retraso_p99_ms": round(self._percentil(0.99) * 1000, 2),
+            "retraso_max_ms": round(self.retraso_max * 1000, 2),
+            "ultimo_bloqueo": self.ultimo_bloqueo,
+        }
+
+
+_monitor: Optional[MonitorLoop] = None
+
+
+def iniciar_monitor_loop() -> MonitorLoop:
+    """Arranca el monitor en el loop actual (una vez por proceso)."""
+    global _monitor
+    if _monitor is None:
+        _monitor = MonitorLoop(
+            intervalo=settings.loop_monitor_intervalo_ms / 1000,
+            umbral=settings.loop_monitor_umbral_ms / 1000,
+        )
+    _monitor.iniciar()
+    return _monitor
+
+
+async def detener_monitor_loop() -> None:
+    if _monitor is not None:
+        await _monitor.detener()
+
+
+def estadisticas_monitor_loop() -> Dict:
+    if _monitor is None:
+        return {"activo": False}
+    return _monitor.estadisticas()
@@ -0,0 +1,85 @@
+"""
+Registro de expresiones regulares precompiladas para la extracción por patrones.
+
+Todas se compilan una vez al importar el módulo. `VERSION_PATRONES` se sube
+cada vez que cambia alguna, para saber con qué versión se extrajo un campo.
+"""
+
+import re
+from typing import Tuple
+
+VERSION_PATRONES = "v1.2"
+
+ESPACIOS = re.compile(r"\s+")
+
+# serie-número, en orden de preferencia
+SERIE_NUMERO = (
+    re.compile(r"\b((?:[FBTVE][A-Z0-9]{3})-\d{1,8})\b"),  # FXXX-123, BXXX-123, EB01-123, etc.
+    re.compile(r"\b([A-Z]{1,4}\d{0,3}-\d{1,8})\b"),       # B001-000123, T001-123, etc.
+    # B001 No.172923; la marca acepta "No"/"NO"/"Nº"/"N°": con solo "NO" o "Nº",
+    # "B001 No. 0172923" daba "B-001" y la deduplicación por metadatos no lo reconocía
+    re.compile(r"\b([A-Z]{1,4}\d{0,3})\s*(?:N[Ooº°\.]|\bN\b)?\s*\.?\s*0*([0-9]{3,12})\b"),
+)
+# serie-número electrónico separado en (serie, número sin ceros a la izquierda)
+SERIE_NUMERO_ELECTRONICO = re.compile(r"\b([FBE][A-Z0-9]{3})\s*-\s*0*(\d{1,8})\b")
+SERIE_ELECTRONICA = re.compile(r"^[FBE][A-Z0-9]{3}$")
+SERIE_FISICA = re.compile(r"^\d{3,4}$")
+
+# fechas: las dos primeras llevan etiqueta, la última es el primer dd/mm/yyyy
+FECHA = (
+    re.compile(r"Fecha\s+de\s+Emisi[oó]n[^0-9]{0,20}(\d{2}/\d{2}/\d{4})", re.IGNORECASE),
+    re.compile(r"Fecha[^0-9]{0,20}(\d{2}/\d{2}/\d{4})", re.IGNORECASE),
+    re.compile(r"(\d{2}/\d{2}/\d{4})"),
+)
+FECHAS_ETIQUETADAS = 2
+# dd/mm/yyyy o dd-mm-yyyy separada en (día, mes, año)
+FECHA_DMA = re.compile(r"\b(\d{2})[/-](\d{2})[/-](\d{4})\b")
+
+MONEDA_TIPO = re.compile(r"Tipo\s+de?\s*Moneda\s*[:\-]?\s*([A-Z/.$]+)", re.IGNORECASE)
+MONEDA_SON = re.compile(r"SON[:\s]+.*?\b(SOLES?|DOLARES?|USD|US\$|PEN|S/\.?)\b", re.IGNORECASE)
+# palabras sueltas (en mayúsculas) cuando no hay campo de moneda explícito
+PALABRAS_DOLARES = ("US$", "USD", "DOLARES", "DÓLARES")
+PALABRAS_SOLES = ("S/", "SOLES")
+
+# (palabra en mayúsculas, tipo_comprobante) en orden de preferencia
+PALABRAS_TIPO = (("FACTURA", "factura"), ("BOLETA", "boleta"))
+
+CLIENTE_PALABRAS = ("señor", "cliente", "nombre", "sr.")
+CLIENTE = re.compile(r"(?:Señor\(es\)|Cliente|Nombre(?:\s+Cliente)?|Sr\.?)\s*[:\-]?\s*(.+)", re.IGNORECASE)
+CLIENTE_CORTE = re.compile(r"\b(DNI|RUC|DOC\.?|DOCUMENTO)\b")
+
+DNI_CLIENTE = re.compile(r"(?:DNI|DOC(?:\.|UMENTO)?(?:\s+DE\s+IDENTIDAD)?)\s*[:\-]?\s*(\d{8})", re.IGNORECASE)
+RUC_CLIENTE = re.compile(r"Cliente.*?RUC\s*[:\-]?\s*(\d{11})", re.IGNORECASE)
+
+ETIQUETAS_TOTAL = (
+    "Importe Total",
+    "Monto Total",
+    "Total de Venta",
+    "Total Venta",
+    "Importe a Pagar",
+    "Total a Pagar",
+    "Neto a Pagar",
+    "Total",
+)
+# (etiqueta, patrón) en orden de preferencia
+IMPORTE_TOTAL: Tuple[Tuple[str, re.Pattern], ...] = tuple(
+    (etiqueta, re.compile(rf"{etiqueta}\s*[:\-]?\s*(S/\.?\s*)?([\d.,]+)", re.IGNORECASE))
+    for etiqueta in ETIQUETAS_TOTAL
+)
+
+# tabla de ítems: el encabezado lleva una etiqueta de inicio y una de columna,
+# la tabla termina en la primera línea de totales
+ETIQUETAS_INICIO_ITEMS = ("DESCRIP", "DETALLE", "CANT")
+ETIQUETAS_COLUMNA_ITEMS = ("CANT", "P.U", "PRECIO", "UNIT", "IMPORTE", "TOTAL", "VALOR", "MONTO")
+ETIQUETAS_FIN_ITEMS = ("TOTAL", "IGV", "GRAVAD", "SON:", "OP.", "EXONERAD")
+# importe de una celda: 12.50, 12,50, 1,234.50 o S/ 12.50
+NUMERO_ITEM = re.compile(r"^(?:S/\.?)?(\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:[.,]\d{1,2})?)$")
+SEPARADOR = re.compile(r"^[=\-_*.\s]+$")
+
+# RUC: 11 dígitos que no son parte de un número más largo
+RUC = re.compile(r"(?<!\d)(\d{11})(?!\d)")
+ETIQUETA_RUC = re.compile(r"\bR\.?U\.?C\.?\b", re.IGNORECASE)
+# confusiones típicas del OCR en secuencias numéricas (tabla para str.translate)
+OCR_DIGITOS = str.maketrans({"O": "0", "o": "0", "I": "1", "l": "1", "B": "8", "S": "5", "Z": "2"})
+
+MONTO = re.compile(r"\d+(?:\.\d+)?")
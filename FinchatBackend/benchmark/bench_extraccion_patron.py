@@ -0,0 +1,119 @@
+"""
+Micro-benchmark de la extracción por patrones.
+
+Compara, por comprobante:
+  - por_funcion: las funciones `extraer_*` por separado (cada una compacta el texto)
+  - una_pasada: `extraer_campos` (compacta una vez y corre el registro precompilado)
+  - comprobante: `extraer_comprobante` completo (patrones + RUC + ítems + verificación)
+
+Uso:
+    python benchmark/bench_extraccion_patron.py --iteraciones 5000
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+try:
+    from app.features.agents.extractor_determinista import extraer_comprobante
+    from app.utils.extraccion_patron import (
+        extraer_campos,
+        extraer_dni_cliente,
+        extraer_fecha,
+        extraer_linea_importe_total,
+        extraer_moneda,
+        extraer_nombre_cliente,
+        extraer_serie_numero,
+    )
+    from app.utils.patrones import VERSION_PATRONES
+except ImportError as e:
+    print(f"Error: No se pudo importar la extracción por patrones: {e}")
+    sys.exit(1)
+
+BOLETA = """CHIFA YEN YEN
+TEAM SABOR SAC
+RUC:20556519065
+AV. LOS PROCERES 123 - SAN JUAN DE LURIGANCHO
+BOLETA DE VENTA ELECTRONICA
+B001 No. 0172923 Mesa 29 Sala 2
+CAJERO: BALVIN 02/08/2025     16:00:39
+CLIENTE: ABEL ESPINOZA PARI
+DNI:75524035
+Descripcion   Cant.  P.U.   Dscto  P.Total
+WANTAN FRITO   1  15.00  0    15.00
+ARROZ CHAUFA ESPECIAL   2  18.50  0    37.00
+GASEOSA 1.5 LIT   1  9.00  0    9.00
+SUB TOTAL    S/ 61.00
+TOTAL A PAGAR   S/ 61.00
+SON: SESENTA Y UNO CON 00/100 SOLES
+Representación impresa de la Boleta de Venta Electrónica"""
+
+FACTURA = """COMERCIAL OMEGA SAC RUC: 20556519065
+FACTURA ELECTRONICA F001-00000123
+Fecha de Emisión: 15/07/2025
+Señor(es): INVERSIONES ALFA EIRL RUC: 20100070970
+Tipo de Moneda: SOLES
+DESCRIPCION CANT P.UNIT IMPORTE
+Servicio Contable 1 500.00 500.00
+Asesoría Tributaria 2 200.00 400.00
+OP. GRAVADA 762.71
+IGV 137.29
+IMPORTE TOTAL S/ 900.00"""
+
+TEXTOS = {"boleta": BOLETA, "factura": FACTURA}
+
+
+def _por_funcion(texto: str) -> tuple:
+    return (
+        extraer_serie_numero(texto),
+        extraer_fecha(texto),
+        extraer_moneda(texto),
+        extraer_nombre_cliente(texto),
+        extraer_dni_cliente(texto),
+        extraer_linea_importe_total(texto),
+    )
+
+
+def _medir(funcion, texto: str, iteraciones: int, rondas: int = 5) -> float:
+    """Mediana de microsegundos por llamada sobre varias rondas."""
+    tiempos = []
+    for _ in range(rondas):
+        t0 = time.perf_counter()
+        for _ in range(iteraciones):
+            funcion(texto)
+        tiempos.append((time.perf_counter() - t0) / iteraciones * 1e6)
+    return statistics.median(tiempos)
+
+
+def run_benchmark(iteraciones: int) -> None:
+    print(f"--- Benchmark extracción por patrones (registro {VERSION_PATRONES}) ---")
+    print(f"{'comprobante':<12} {'por_funcion':>14} {'una_pasada':>14} {'comprobante':>14}")
+
+    for nombre, texto in TEXTOS.items():
+        campos = extraer_campos(texto)
+        por_funcion = _por_funcion(texto)
+        esperado = (
+            campos.serie_numero, campos.fecha, campos.moneda,
+            campos.nombre_cliente, campos.dni_cliente, campos.linea_importe_total,
+        )
+        if por_funcion != esperado:
+            print(f"[{nombre}] ¡Resultados distintos! {por_funcion} != {esperado}")
+
+        us_funcion = _medir(_por_funcion, texto, iteraciones)
+        us_pasada = _medir(extraer_campos, texto, iteraciones)
+        us_comprobante = _medir(extraer_comprobante, texto, iteraciones)
+        print(f"{nombre:<12} {us_funcion:>11.1f} µs {us_pasada:>11.1f} µs {us_comprobante:>11.1f} µs")
+
+    print("----------------------------")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark de extracción por patrones")
+    parser.add_argument("--iteraciones", type=int, default=2000, help="Llamadas por ronda")
+    args = parser.parse_args()
+    run_benchmark(args.iteraciones)
@@ -7,3 +7,24 @@ from pathlib import Path
 # Agregar el directorio raíz al path
 root_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(root_dir))
+
+
+@pytest.fixture(autouse=True)
+def _agentes_compartidos_limpios(monkeypatch):
+    """
+    Cada test construye sus propios agentes y modelos (y ve los mocks de Agent),
+    sin los caches de OCR y de respuestas LLM en disco ni perfiles de emisor
+    salvo que el test los inyecte.
+    """
+    from app.config.settings import settings
+    from app.features.agents.registro_agentes import limpiar_agentes
+    from app.libs.models.model_selector import limpiar_modelos
+
+    monkeypatch.setattr(settings, "ocr_cache_habilitado", False)
+    monkeypatch.setattr(settings, "llm_cache_habilitado", False)
+    monkeypatch.setattr(settings, "perfil_emisor_habilitado", False)
+    limpiar_agentes()
+    limpiar_modelos()
+    yield
+    limpiar_agentes()
+    limpiar_modelos()
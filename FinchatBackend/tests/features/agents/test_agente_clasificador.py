@@ -0,0 +1,105 @@
+"""Tests unitarios para el Agente Clasificador y el índice de reglas CIIU."""
+
+import json
+
+import pytest
+from unittest.mock import Mock, patch
+
+from app.features.agents.agente_clasificador import (
+    AgenteClasificador,
+    ClasificacionToolkit,
+    get_conjunto_reglas,
+)
+from app.features.agents.motor_clasificacion import ConjuntoReglas
+from app.features.agents.pipeline_context import PipelineContext
+
+
+def _contexto(ciiu):
+    contexto = PipelineContext(usuario_id=1)
+    contexto.validacion_sunat = {"ciiu": ciiu}
+    return contexto
+
+
+class TestConjuntoReglas:
+    """Tests para el índice de prefijos."""
+
+    def test_exacto_gana_sobre_prefijo(self):
+        regla = get_conjunto_reglas("v1.0").buscar("5610")
+
+        assert regla.fuente == "ciiu_exacto"
+        assert regla.categoria_gasto == "hotelesRestaurantes"
+
+    def test_prefijo_mas_largo(self):
+        reglas = ConjuntoReglas.desde_tablas(
+            "prueba",
+            {},
+            [
+                {"prefijo": "6", "categoria": "Corto", "deduccion": 0},
+                {"prefijo": "69", "categoria": "Largo", "deduccion": 30},
+            ],
+        )
+
+        assert reglas.buscar("6911").categoria == "Largo"
+        assert reglas.buscar("6011").categoria == "Corto"
+        assert reglas.buscar("1234") is None
+
+    def test_version_desconocida(self):
+        with pytest.raises(ValueError):
+            get_conjunto_reglas("v9.9")
+
+    def test_toolkit_usa_el_indice(self):
+        resultado = json.loads(ClasificacionToolkit(PipelineContext()).mapear_ciiu("5621"))
+
+        assert resultado["fuente"] == "ciiu_prefijo_56"
+        assert resultado["porcentaje"] == 15
+
+
+class TestToolClasificar:
+    """Tests para tool_clasificar."""
+
+    @patch('app.features.agents.agente_clasificador.get_ollama')
+    def test_ciiu_mapeado_no_llama_al_modelo(self, mock_get_ollama):
+        clasificador = AgenteClasificador(_contexto("5610"))
+
+        resultado = clasificador.tool_clasificar()
+
+        assert resultado == {
+            "categoria_gasto": "hotelesRestaurantes",
+            "porcentaje_deduccion": 15.0,
+            "ciiu_utilizado": "5610",
+            "version_regla": "v1.0",
+            "fuente_clasificacion": "ciiu_exacto",
+        }
+        mock_get_ollama.assert_not_called()
+
+    def test_sin_ciiu(self):
+        resultado = AgenteClasificador(_contexto(None)).tool_clasificar()
+
+        assert resultado["categoria_gasto"] == "gastoGeneral"
+        assert resultado["fuente_clasificacion"] == "sin_ciiu"
+
+    @patch('app.features.agents.agente_clasificador.settings')
+    def test_no_mapeado_usa_llm(self, mock_settings):
+        mock_settings.clasificacion_version_regla = "v1.0"
+        mock_settings.clasificacion_llm_no_mapeados = True
+
+        clasificador = AgenteClasificador(_contexto("0111"))
+        clasificador._agent = Mock()
+        clasificador._agent.run.return_value = Mock(
+            content='{"categoria_gasto": "gastoGeneral", "porcentaje_deduccion": 0.0}'
+        )
+
+        resultado = clasificador.tool_clasificar()
+
+        clasificador._agent.run.assert_called_once()
+        assert resultado["ciiu_utilizado"] == "0111"
+        assert resultado["version_regla"] == "v1.0"
+
+    @patch('app.features.agents.agente_clasificador.settings')
+    def test_no_mapeado_sin_llm(self, mock_settings):
+        mock_settings.clasificacion_version_regla = "v1.0"
+        mock_settings.clasificacion_llm_no_mapeados = False
+
+        resultado = AgenteClasificador(_contexto("0111")).tool_clasificar()
+
+        assert resultado["fuente_clasificacion"] == "default_ciiu_no_mapeado"
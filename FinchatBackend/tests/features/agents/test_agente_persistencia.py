@@ -0,0 +1,136 @@
+"""Tests unitarios para la persistencia masiva de comprobantes."""
+
+import pytest
+from unittest.mock import Mock
+from sqlalchemy.dialects import postgresql
+
+from app.db.repositories import ComprobanteRepositorio, EmisorRepositorio
+from app.features.agents.agente_persistencia import AgentePersistencia
+from app.features.agents.pipeline_context import PipelineContext
+
+
+def _contexto(hash_archivo, ruc="20556519065", validacion=None, items=2):
+    contexto = PipelineContext(usuario_id=1, mime_type="application/pdf")
+    contexto.hash_archivo = hash_archivo
+    contexto.comprobante_parseado = {
+        "emisor": {"ruc": ruc, "razon_social": "TEAM SABOR SAC"},
+        "comprobante": {
+            "tipo_comprobante": "boleta",
+            "serie": "B001",
+            "numero": hash_archivo,
+            "fecha_emision": "2025-01-10",
+            "monto_total": 50.0,
+            "moneda": "PEN",
+            "origen": "electronico",
+        },
+        "items": [{"descripcion": f"item {i}", "monto_item": 10.0} for i in range(items)],
+    }
+    contexto.validacion_sunat = validacion
+    contexto.clasificacion = {"categoria_gasto": "hotelesRestaurantes", "porcentaje_deduccion": 15.0}
+    contexto.set("texto_ocr", "texto")
+    return contexto
+
+
+@pytest.fixture
+def persistencia():
+    persistencia = AgentePersistencia.desde_sesion(Mock())
+    for nombre in ("emisor_repo", "comprobante_repo", "detalle_repo", "validacion_repo", "clasificacion_repo", "ocr_repo"):
+        setattr(persistencia, nombre, Mock())
+
+    persistencia.emisor_repo.upsert_lote.side_effect = lambda filas, actualizar: {
+        f["ruc"]: 7 for f in filas
+    }
+    persistencia.comprobante_repo.insertar_lote.side_effect = lambda filas: {
+        (f["id_usuario"], f["hash_archivo"]): 100 + i for i, f in enumerate(filas)
+    }
+    return persistencia
+
+
+class TestGuardarLote:
+    """Tests para guardar_lote."""
+
+    def test_una_sentencia_por_tabla(self, persistencia):
+        """Test que varios comprobantes se guardan con una llamada por tabla."""
+        contextos = [_contexto("a"), _contexto("b", items=3)]
+
+        ids = persistencia.guardar_lote(contextos)
+
+        assert ids == [100, 101]
+        assert [c.comprobante_id for c in contextos] == [100, 101]
+        persistencia.comprobante_repo.insertar_lote.assert_called_once()
+        filas_items = persistencia.detalle_repo.insertar_lote.call_args[0][0]
+        assert len(filas_items) == 5
+        assert {f["id_comprobante"] for f in filas_items} == {100, 101}
+        assert len(persistencia.clasificacion_repo.insertar_lote.call_args[0][0]) == 2
+        assert len(persistencia.ocr_repo.insertar_lote.call_args[0][0]) == 2
+        # sin validación no hay filas de validación
+        persistencia.validacion_repo.insertar_lote.assert_called_once_with([])
+
+    def test_emisor_repetido_se_agrupa(self, persistencia):
+        """Test que un RUC repetido va una sola vez y gana el dato de SUNAT."""
+        validacion = {"razon_social": "TEAM SABOR S.A.C.", "estado_ruc": "ACTIVO", "ciiu": "5610"}
+        contextos = [_contexto("a"), _contexto("b", validacion=validacion)]
+
+        persistencia.guardar_lote(contextos)
+
+        llamadas = persistencia.emisor_repo.upsert_lote.call_args_list
+        con_sunat = llamadas[0]
+        sin_sunat = llamadas[1]
+        assert con_sunat.kwargs["actualizar"] is True
+        assert [f["razon_social"] for f in con_sunat.args[0]] == ["TEAM SABOR S.A.C."]
+        assert sin_sunat.args[0] == []
+
+    def test_una_fila_ocr_por_pagina(self, persistencia):
+        contexto = _contexto("a")
+        contexto.set("paginas_ocr", [
+            {"numero_pagina": 1, "texto": "p1", "confianza_promedio": 1.0},
+            {"numero_pagina": 2, "texto": "p2", "confianza_promedio": 0.7},
+        ])
+
+        persistencia.guardar_lote([contexto])
+
+        filas = persistencia.ocr_repo.insertar_lote.call_args[0][0]
+        assert [(f["numero_pagina"], f["confianza_promedio"]) for f in filas] == [(1, 1.0), (2, 0.7)]
+
+    def test_guardar_todo_usa_el_lote(self, persistencia):
+        persistencia.contexto = _contexto("a")
+
+        assert persistencia.guardar_todo() == 100
+
+
+class TestSentenciasMasivas:
+    """Tests del SQL generado por los repositorios."""
+
+    def _sql(self, session):
+        stmt = session.execute.call_args[0][0]
+        return str(stmt.compile(dialect=postgresql.dialect()))
+
+    def test_upsert_emisor(self):
+        session = Mock()
+        session.execute.return_value = [("20556519065", 7)]
+
+        ids = EmisorRepositorio(session).upsert_lote([{"ruc": "20556519065", "razon_social": "X"}])
+
+        assert ids == {"20556519065": 7}
+        sql = self._sql(session)
+        assert "ON CONFLICT (ruc) DO UPDATE" in sql
+        assert "RETURNING emisor.ruc, emisor.id_emisor" in sql
+
+    def test_buscar_por_metadatos_ignora_ceros(self):
+        session = Mock()
+
+        ComprobanteRepositorio(session).buscar_por_ruc_serie_numero(1, ["20556519065"], "F001", "00012345")
+
+        stmt = session.scalar.call_args[0][0]
+        compilado = stmt.compile(dialect=postgresql.dialect())
+        assert "ltrim(comprobante.numero" in str(compilado)
+        assert "12345" in compilado.params.values()
+
+    def test_insert_comprobantes_returning(self):
+        session = Mock()
+        session.execute.return_value = [(1, "a", 10), (1, "b", 11)]
+
+        ids = ComprobanteRepositorio(session).insertar_lote([{"hash_archivo": "a"}, {"hash_archivo": "b"}])
+
+        assert ids == {(1, "a"): 10, (1, "b"): 11}
+        assert "RETURNING" in self._sql(session)
@@ -173,3 +173,32 @@ class TestValidarArchivo:
         assert resultado["tipo_duplicado"] == "hash"
         assert resultado["comprobante_id"] == 999
         assert "hash_archivo" in resultado
+
+
+class TestValidarMetadatos:
+    """Tests para la detección de duplicados por metadatos del texto OCR."""
+
+    TEXTO = "TEAM SABOR S.A.C.\nRUC: 20556519065\nFACTURA ELECTRONICA\nF001-00012345\nTOTAL S/ 50.00"
+
+    def test_duplicado_por_metadatos(self, agente_validador, mock_comprobante_repo):
+        """Test que un comprobante con el mismo RUC/serie/número es duplicado."""
+        mock_comprobante = MagicMock(spec=Comprobante)
+        mock_comprobante.id_comprobante = 321
+        mock_comprobante_repo.buscar_por_ruc_serie_numero.return_value = mock_comprobante
+
+        resultado = agente_validador.validar_metadatos(usuario_id=1, texto_ocr=self.TEXTO)
+
+        assert resultado == {"es_duplicado": True, "tipo_duplicado": "metadatos", "comprobante_id": 321}
+        kwargs = mock_comprobante_repo.buscar_por_ruc_serie_numero.call_args.kwargs
+        assert kwargs["rucs"] == ["20556519065"]
+        assert (kwargs["serie"], kwargs["numero"]) == ("F001", "00012345")
+
+    def test_sin_duplicado(self, agente_validador, mock_comprobante_repo):
+        mock_comprobante_repo.buscar_por_ruc_serie_numero.return_value = None
+
+        assert agente_validador.validar_metadatos(usuario_id=1, texto_ocr=self.TEXTO) is None
+
+    def test_texto_sin_metadatos_no_consulta(self, agente_validador, mock_comprobante_repo):
+        """Test que sin RUC o serie-número reconocibles no se va a la BD."""
+        assert agente_validador.validar_metadatos(usuario_id=1, texto_ocr="TICKET\nTOTAL 10.00") is None
+        mock_comprobante_repo.buscar_por_ruc_serie_numero.assert_not_called()
@@ -0,0 +1,141 @@
+"""Tests unitarios para el Agente Validador SUNAT y sus reglas deterministas."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.features.agents.agente_validador_sunat import AgenteValidadorSunat
+from app.features.agents.pipeline_context import PipelineContext
+from app.features.agents.reglas_sunat import evaluar_reglas, normalizar_nombre, similitud_nombres
+
+DATOS_SUNAT = {
+    "ruc": "20556519065",
+    "razon_social": "TEAM SABOR S.A.C.",
+    "nombre_comercial": None,
+    "estado_ruc": "ACTIVO",
+    "condicion_ruc": "HABIDO",
+    "ciiu": "5610",
+}
+
+
+@pytest.fixture
+def contexto():
+    contexto = PipelineContext(usuario_id=1)
+    contexto.sunat_cache["20556519065"] = DATOS_SUNAT
+    return contexto
+
+
+class TestSimilitudNombres:
+    """Tests para la comparación difusa de nombres."""
+
+    def test_normaliza_forma_societaria(self):
+        """Test que S.A.C., SAC y puntuación no afectan."""
+        assert normalizar_nombre("Team Sabor S.A.C.") == normalizar_nombre("TEAM SABOR SAC")
+
+    def test_orden_de_palabras(self):
+        """Test que nombres de persona en distinto orden coinciden."""
+        assert similitud_nombres("HUMBELINA TELLO MENDOZA", "TELLO MENDOZA HUMBELINA") == 1.0
+
+    def test_nombres_distintos(self):
+        """Test que nombres sin relación tienen similitud baja."""
+        assert similitud_nombres("CINCO MILLAS SAC", "TEAM SABOR S.A.C.") < 0.6
+
+
+class TestEvaluarReglas:
+    """Tests para las reglas de deducibilidad."""
+
+    def test_activo_habido_pasa_reglas(self):
+        resultado = evaluar_reglas(DATOS_SUNAT, "TEAM SABOR SAC", 0.85, 0.6)
+
+        assert resultado.validacion["pasa_reglas_basicas"] is True
+        assert resultado.validacion["coincide_nombre"] is True
+        assert resultado.validacion["motivo_no_deducible"] is None
+        assert resultado.validacion["ciiu"] == "5610"
+        assert resultado.ambiguo is False
+
+    def test_no_habido_no_pasa_reglas(self):
+        datos = {**DATOS_SUNAT, "condicion_ruc": "NO HABIDO"}
+
+        resultado = evaluar_reglas(datos, "TEAM SABOR SAC", 0.85, 0.6)
+
+        assert resultado.validacion["pasa_reglas_basicas"] is False
+        assert "NO HABIDO" in resultado.validacion["motivo_no_deducible"]
+
+
+class TestValidarCompleto:
+    """Tests para los modos de validación."""
+
+    @patch('app.features.agents.agente_validador_sunat.settings')
+    def test_modo_reglas_no_usa_llm(self, mock_settings, contexto):
+        """Test que el modo reglas no construye ni llama al agente."""
+        mock_settings.sunat_validacion_modo = "reglas"
+        mock_settings.sunat_umbral_coincide_nombre = 0.85
+        mock_settings.sunat_umbral_ambiguo_nombre = 0.6
+
+        validador = AgenteValidadorSunat(contexto)
+        resultado = asyncio.run(validador.validar_completo("20556519065", "TEAM SABOR SAC"))
+
+        assert resultado["pasa_reglas_basicas"] is True
+        assert resultado["fuente_validacion"] == "reglas"
+        assert validador._agent is None
+
+    @patch('app.features.agents.agente_validador_sunat.settings')
+    def test_modo_hibrido_consulta_llm_si_es_ambiguo(self, mock_settings, contexto):
+        """Test que un nombre ambiguo se resuelve con el LLM."""
+        mock_settings.sunat_validacion_modo = "hibrido"
+        mock_settings.sunat_umbral_coincide_nombre = 0.99
+        mock_settings.sunat_umbral_ambiguo_nombre = 0.3
+
+        validador = AgenteValidadorSunat(contexto)
+        validador._validar_con_llm = AsyncMock(return_value={"coincide_nombre": True})
+        resultado = asyncio.run(validador.validar_completo("20556519065", "TEAM SABORES"))
+
+        validador._validar_con_llm.assert_awaited_once()
+        assert resultado["coincide_nombre"] is True
+        assert resultado["fuente_validacion"] == "reglas+llm"
+        assert resultado["estado_ruc"] == "ACTIVO"
+
+    @patch('app.features.agents.agente_validador_sunat.settings')
+    def test_sin_datos_sunat_retorna_fallback(self, mock_settings):
+        """Test que sin datos de SUNAT se retorna el fallback."""
+        mock_settings.sunat_validacion_modo = "hibrido"
+
+        contexto = PipelineContext(usuario_id=1)
+        contexto.sunat_cache["99999999999"] = None
+
+        resultado = asyncio.run(AgenteValidadorSunat(contexto).validar_completo("99999999999", "X"))
+
+        assert resultado["fallback"] is True
+        assert resultado["pasa_reglas_basicas"] is False
+
+
+class TestValidacionLlmEstructurada:
+    """Tests del agente con salida restringida al schema ValidacionSunatLlm."""
+
+    @patch('app.features.agents.agente_validador_sunat.settings')
+    @patch('app.features.agents.agente_validador_sunat.Agent')
+    def test_datos_sunat_en_el_prompt_sin_herramientas(self, mock_agent, mock_settings, contexto):
+        mock_settings.ollama_salida_estructurada = True
+        mock_agent.return_value.arun = AsyncMock(return_value=Mock(content=(
+            '{"estado_ruc": "ACTIVO", "condicion_ruc": "HABIDO", "ciiu": "5610", '
+            '"razon_social": "TEAM SABOR S.A.C.", "coincide_nombre": true, "pasa_reglas_basicas": true}'
+        )))
+        validador = AgenteValidadorSunat(contexto)
+
+        resultado = asyncio.run(validador._validar_con_llm("20556519065", "TEAM SABORES"))
+
+        assert mock_agent.call_args.kwargs["tools"] == []
+        assert "TEAM SABOR S.A.C." in mock_agent.return_value.arun.call_args.args[0]
+        assert resultado["coincide_nombre"] is True
+        assert resultado["motivo_no_deducible"] is None
+
+    @patch('app.features.agents.agente_validador_sunat.settings')
+    @patch('app.features.agents.agente_validador_sunat.Agent')
+    def test_salida_fuera_del_schema_usa_fallback(self, mock_agent, mock_settings, contexto):
+        mock_settings.ollama_salida_estructurada = True
+        mock_agent.return_value.arun = AsyncMock(return_value=Mock(content='{"estado_ruc": "ACTIVO"}'))
+
+        resultado = asyncio.run(AgenteValidadorSunat(contexto)._validar_con_llm("20556519065", "X"))
+
+        assert resultado["fallback"] is True
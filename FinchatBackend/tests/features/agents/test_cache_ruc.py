@@ -0,0 +1,120 @@
+"""Tests unitarios para el cache compartido de RUC."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from app.features.agents.cache_ruc import RucCache
+from app.libs.sunat_scraper.ruc_scraper import (
+    ESTADO_ENCONTRADO,
+    ESTADO_ERROR,
+    ESTADO_NO_ENCONTRADO,
+)
+
+DATOS = {"razon_social": "TEST SAC", "estado_ruc": "ACTIVO", "ciiu": "5610"}
+
+
+@pytest.fixture
+def cache():
+    """Cache sin BD: _leer_bd/_guardar_bd mockeados."""
+    cache = RucCache(ttl_seg=3600, ttl_negativo_seg=60, max_memoria=10)
+    cache._leer_bd = Mock(return_value=None)
+    cache._guardar_bd = Mock()
+    return cache
+
+
+class TestRucCache:
+    """Tests para RucCache.obtener."""
+
+    def test_segunda_consulta_usa_memoria(self, cache):
+        """Test que un RUC encontrado se scrapea una sola vez."""
+        consultar = AsyncMock(return_value=(ESTADO_ENCONTRADO, DATOS))
+
+        async def escenario():
+            return (
+                await cache.obtener("20123456789", consultar),
+                await cache.obtener("20123456789", consultar),
+            )
+
+        primero, segundo = asyncio.run(escenario())
+
+        assert primero == segundo == DATOS
+        consultar.assert_awaited_once_with("20123456789")
+        cache._guardar_bd.assert_called_once_with("20123456789", True, DATOS)
+        assert cache.hits_memoria == 1
+
+    def test_cache_negativo(self, cache):
+        """Test que un RUC no encontrado también se cachea."""
+        consultar = AsyncMock(return_value=(ESTADO_NO_ENCONTRADO, None))
+
+        async def escenario():
+            await cache.obtener("99999999999", consultar)
+            return await cache.obtener("99999999999", consultar)
+
+        assert asyncio.run(escenario()) is None
+        consultar.assert_awaited_once()
+        cache._guardar_bd.assert_called_once_with("99999999999", False, None)
+
+    def test_errores_no_se_cachean(self, cache):
+        """Test que un timeout de SUNAT se vuelve a intentar."""
+        consultar = AsyncMock(return_value=(ESTADO_ERROR, None))
+
+        async def escenario():
+            await cache.obtener("20123456789", consultar)
+            await cache.obtener("20123456789", consultar)
+
+        asyncio.run(escenario())
+
+        assert consultar.await_count == 2
+        cache._guardar_bd.assert_not_called()
+
+    def test_single_flight(self, cache):
+        """Test que consultas concurrentes del mismo RUC scrapean una sola vez."""
+        llamadas = []
+
+        async def consultar(ruc):
+            llamadas.append(ruc)
+            await asyncio.sleep(0.01)
+            return ESTADO_ENCONTRADO, DATOS
+
+        async def escenario():
+            return await asyncio.gather(*(cache.obtener("20123456789", consultar) for _ in range(5)))
+
+        resultados = asyncio.run(escenario())
+
+        assert llamadas == ["20123456789"]
+        assert all(r == DATOS for r in resultados)
+        assert cache.deduplicadas == 4
+
+    def test_usa_registro_fresco_de_bd(self, cache):
+        """Test que un registro vigente de cache_ruc evita el scraping."""
+        cache._leer_bd.return_value = (True, DATOS, datetime.now(timezone.utc))
+        consultar = AsyncMock()
+
+        resultado = asyncio.run(cache.obtener("20123456789", consultar))
+
+        assert resultado == DATOS
+        consultar.assert_not_awaited()
+        assert cache.hits_bd == 1
+
+    def test_registro_vencido_de_bd_vuelve_a_scrapear(self, cache):
+        """Test que un registro vencido se refresca en SUNAT."""
+        vencido = datetime.now(timezone.utc) - timedelta(hours=2)
+        cache._leer_bd.return_value = (True, {"razon_social": "VIEJO"}, vencido)
+        consultar = AsyncMock(return_value=(ESTADO_ENCONTRADO, DATOS))
+
+        resultado = asyncio.run(cache.obtener("20123456789", consultar))
+
+        assert resultado == DATOS
+        consultar.assert_awaited_once()
+
+    def test_conserva_fecha_de_consulta_de_bd(self, cache):
+        """Test que los datos de cache_ruc conservan la fecha de su consulta original."""
+        consultado_en = datetime.now(timezone.utc) - timedelta(minutes=30)
+        cache._leer_bd.return_value = (True, DATOS, consultado_en)
+
+        asyncio.run(cache.obtener("20123456789", AsyncMock()))
+
+        assert cache.consultado_en("20123456789") == consultado_en.timestamp()
@@ -0,0 +1,122 @@
+"""Tests para la extracción determinista y su uso en AgenteParseador."""
+
+import json
+from unittest.mock import patch
+
+from agno.run.agent import RunContentEvent
+
+from app.features.agents.agente_parseador import AgenteParseador
+from app.features.agents.extractor_determinista import CAMPOS_REQUERIDOS, extraer_comprobante
+from app.features.agents.pipeline_context import PipelineContext
+
+
+BOLETA = """CHIFA YEN YEN
+TEAM SABOR SAC
+RUC:20556519065
+BOLETA DE VENTA ELECTRONICA
+B001 No. 0172923
+Fecha de Emisión: 02/08/2025 16:00:39
+CLIENTE: ABEL ESPINOZA PARI
+DNI:75524035
+Descripcion   Cant.  P.U.   P.Total
+WANTAN FRITO   1  15.00  15.00
+GASEOSA 1.5 LIT  2  3.50  7.00
+SUB TOTAL    S/ 22.00
+IMPORTE TOTAL: S/ 22.00
+SON: VEINTIDOS CON 00/100 SOLES"""
+
+
+def _resultado_ocr(texto, confianza=0.95):
+    return {
+        "texto": texto,
+        "confianza_promedio": confianza,
+        "paginas": [{"numero_pagina": 1, "texto": texto, "confianza_promedio": confianza}],
+    }
+
+
+class TestExtraerComprobante:
+    """Tests para extraer_comprobante."""
+
+    def test_boleta_completa(self):
+        extraccion = extraer_comprobante(BOLETA, 0.95)
+
+        assert extraccion.emisor == {"ruc": "20556519065", "razon_social": "TEAM SABOR SAC", "nombre_comercial": None}
+        assert extraccion.comprobante["serie"] == "B001"
+        assert extraccion.comprobante["numero"] == "172923"
+        assert extraccion.comprobante["fecha_emision"] == "2025-08-02"
+        assert extraccion.comprobante["monto_total"] == 22.0
+        assert extraccion.comprobante["moneda"] == "PEN"
+        assert extraccion.comprobante["tipo_comprobante"] == "boleta"
+        assert extraccion.cliente["doc_cliente"] == "75524035"
+        assert [i["monto_item"] for i in extraccion.items] == [15.0, 7.0]
+        assert extraccion.items[1]["descripcion"] == "GASEOSA 1.5 LIT"
+        assert extraccion.campos_pendientes(0.85) == []
+
+    def test_ruc_con_digito_verificador_invalido(self):
+        extraccion = extraer_comprobante(BOLETA.replace("20556519065", "20556519066"), 0.95)
+
+        assert "ruc" in extraccion.inconsistencias
+        assert "ruc" in extraccion.campos_pendientes(0.85)
+
+    def test_falta_total(self):
+        texto = "\n".join(ln for ln in BOLETA.splitlines() if "TOTAL" not in ln)
+
+        extraccion = extraer_comprobante(texto, 0.95)
+
+        assert extraccion.campos_pendientes(0.85) == ["monto_total"]
+
+    def test_items_que_no_suman_se_resumen(self):
+        extraccion = extraer_comprobante(BOLETA.replace("IMPORTE TOTAL: S/ 22.00", "IMPORTE TOTAL: S/ 30.00"), 0.95)
+
+        assert extraccion.items == [
+            {"descripcion": "CONSUMO", "cantidad": 1.0, "precio_unitario": 30.0, "monto_item": 30.0}
+        ]
+        assert "items" in extraccion.inconsistencias
+        assert extraccion.campos_pendientes(0.85) == []
+
+    def test_ocr_dudoso_limita_la_confianza(self):
+        extraccion = extraer_comprobante(BOLETA, 0.6)
+
+        assert max(extraccion.confianza[campo] for campo in CAMPOS_REQUERIDOS) <= 0.65
+        assert extraccion.requiere_llm(0.85)
+
+
+class TestParseadorDeterminista:
+    """Tests de la compuerta del LLM en AgenteParseador."""
+
+    @patch('app.features.agents.agente_parseador.Agent')
+    def test_campos_confiables_no_llaman_al_llm(self, mock_agent):
+        parseador = AgenteParseador(PipelineContext(usuario_id=1))
+
+        resultado = parseador._parsear_resultado_ocr(_resultado_ocr(BOLETA))
+
+        mock_agent.return_value.run.assert_not_called()
+        assert parseador.contexto.get("fuente_parseo") == "patrones"
+        assert resultado["emisor"]["ruc"] == "20556519065"
+        assert resultado["comprobante"]["monto_total"] == 22.0
+
+    @patch('app.features.agents.agente_parseador.Agent')
+    def test_campo_faltante_llama_al_llm_y_conserva_lo_confiable(self, mock_agent):
+        texto = BOLETA.replace("IMPORTE TOTAL: S/ 22.00", "IMPORTE T0TAL S/ 22.00")
+        respuesta_llm = {
+            "comprobante": {
+                "tipo_comprobante": "boleta", "serie": "B001", "numero": "172923",
+                "fecha_emision": "2025-08-02", "moneda": "PEN", "monto_total": 22.0,
+            },
+            "emisor": {"ruc": "20556519060", "razon_social": "TEAM SABOR SAC"},
+            "items": [{"descripcion": "CONSUMO", "monto_item": 22.0}],
+        }
+        contenido = json.dumps(respuesta_llm)
+        mock_agent.return_value.run.return_value = iter(
+            [RunContentEvent(content=contenido[i:i + 20]) for i in range(0, len(contenido), 20)]
+        )
+        parseador = AgenteParseador(PipelineContext(usuario_id=1))
+
+        resultado = parseador._parsear_resultado_ocr(_resultado_ocr(texto))
+
+        mock_agent.return_value.run.assert_called_once()
+        assert parseador.contexto.get("fuente_parseo") == "llm"
+        assert parseador.contexto.get("campos_pendientes") == ["monto_total"]
+        # el RUC verificado por dígito de control prevalece sobre el del LLM
+        assert resultado["emisor"]["ruc"] == "20556519065"
+        assert resultado["comprobante"]["monto_total"] == 22.0
@@ -0,0 +1,136 @@
+"""Tests unitarios para la ingesta concurrente de varios archivos."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.features.agents import ingesta_concurrente
+from app.features.agents.ingesta_concurrente import procesar_archivos
+from app.features.agents.pipeline_ingesta import ETAPAS_INGESTA
+
+
+def _entrada(nombre):
+    return {
+        "usuario_id": 1,
+        "nombre_archivo": nombre,
+        "mime_type": "application/pdf",
+        "contenido": nombre.encode(),
+    }
+
+
+def _workflow(ejecutar):
+    """Workflow mock: `ejecutar(input_data)` corre en la última etapa y da el resultado."""
+    workflow = Mock()
+
+    async def ejecutar_etapa(nombre, estado):
+        if nombre == ETAPAS_INGESTA[-1]:
+            estado.resultado = await ejecutar(estado.input_data)
+        return True
+
+    workflow.ejecutar_etapa = ejecutar_etapa
+    workflow.resultado = lambda estado: estado.resultado
+    workflow.resultado_error = AsyncMock(side_effect=lambda estado, e: {
+        "exito": False, "error": str(e), "error_tipo": type(e).__name__,
+    })
+    return workflow
+
+
+@pytest.fixture(autouse=True)
+def reset_semaforo_global():
+    """El semáforo global se crea por event loop; lo reiniciamos por test."""
+    ingesta_concurrente._semaforo_global = None
+    yield
+    ingesta_concurrente._semaforo_global = None
+
+
+class TestProcesarArchivos:
+    """Tests para procesar_archivos."""
+
+    @patch('app.features.agents.ingesta_concurrente.Session')
+    @patch('app.features.agents.ingesta_concurrente.IngestaWorkflow')
+    def test_mantiene_orden_y_sesion_por_archivo(self, mock_workflow_class, mock_session_class):
+        """Test que el resultado respeta el orden de entrada y cada archivo usa su sesión."""
+        demoras = {"a.pdf": 0.03, "b.pdf": 0.0, "c.pdf": 0.01}
+
+        async def ejecutar(input_data):
+            await asyncio.sleep(demoras[input_data["nombre_archivo"]])
+            return {"exito": True, "hash_archivo": input_data["nombre_archivo"]}
+
+        mock_workflow_class.side_effect = lambda session: _workflow(ejecutar)
+
+        resultados = asyncio.run(procesar_archivos([_entrada(n) for n in demoras]))
+
+        assert [r["hash_archivo"] for r in resultados] == ["a.pdf", "b.pdf", "c.pdf"]
+        assert mock_session_class.call_count == 3
+        assert mock_session_class.return_value.close.call_count == 3
+
+    @patch('app.features.agents.ingesta_concurrente.Session')
+    @patch('app.features.agents.ingesta_concurrente.IngestaWorkflow')
+    def test_error_en_un_archivo_no_afecta_a_los_demas(self, mock_workflow_class, mock_session_class):
+        """Test que una excepción se reporta solo en su archivo."""
+        async def ejecutar(input_data):
+            if input_data["nombre_archivo"] == "malo.pdf":
+                raise RuntimeError("falló OCR")
+            return {"exito": True, "hash_archivo": input_data["nombre_archivo"]}
+
+        mock_workflow_class.side_effect = lambda session: _workflow(ejecutar)
+
+        resultados = asyncio.run(
+            procesar_archivos([_entrada("ok.pdf"), _entrada("malo.pdf"), _entrada("ok2.pdf")])
+        )
+
+        assert resultados[0]["exito"] is True
+        assert resultados[1]["exito"] is False
+        assert resultados[1]["error"] == "falló OCR"
+        assert resultados[1]["error_tipo"] == "RuntimeError"
+        assert resultados[2]["exito"] is True
+
+    @patch('app.features.agents.ingesta_concurrente.Session')
+    @patch('app.features.agents.ingesta_concurrente.IngestaWorkflow')
+    def test_respeta_limite_de_concurrencia(self, mock_workflow_class, mock_session_class):
+        """Test que nunca hay más archivos en paralelo que el límite del request."""
+        estado = {"activos": 0, "maximo": 0}
+
+        async def ejecutar(input_data):
+            estado["activos"] += 1
+            estado["maximo"] = max(estado["maximo"], estado["activos"])
+            await asyncio.sleep(0.01)
+            estado["activos"] -= 1
+            return {"exito": True}
+
+        mock_workflow_class.side_effect = lambda session: _workflow(ejecutar)
+
+        asyncio.run(procesar_archivos([_entrada(f"{i}.pdf") for i in range(6)], concurrencia=2))
+
+        assert estado["maximo"] == 2
+
+    @patch('app.features.agents.ingesta_concurrente.Session')
+    @patch('app.features.agents.ingesta_concurrente.IngestaWorkflow')
+    def test_archivos_solapan_etapas(self, mock_workflow_class, mock_session_class):
+        """Test que un archivo entra a OCR mientras otro sigue en el parseo."""
+        en_etapa = {nombre: set() for nombre in ETAPAS_INGESTA}
+        solapes = []
+
+        def crear_workflow(session):
+            workflow = _workflow(AsyncMock(return_value={"exito": True}))
+
+            async def ejecutar_etapa(nombre, estado):
+                archivo = estado.input_data["nombre_archivo"]
+                if nombre == "ocr" and en_etapa["parseo"]:
+                    solapes.append(archivo)
+                en_etapa[nombre].add(archivo)
+                await asyncio.sleep(0.01)
+                en_etapa[nombre].discard(archivo)
+                estado.resultado = {"exito": True}
+                return True
+
+            workflow.ejecutar_etapa = ejecutar_etapa
+            return workflow
+
+        mock_workflow_class.side_effect = crear_workflow
+
+        resultados = asyncio.run(procesar_archivos([_entrada(f"{i}.pdf") for i in range(4)]))
+
+        assert all(r["exito"] for r in resultados)
+        assert solapes
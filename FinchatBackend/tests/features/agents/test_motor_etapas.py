@@ -0,0 +1,127 @@
+"""Tests unitarios para el motor de etapas en tubería."""
+
+import asyncio
+
+import pytest
+
+from app.features.agents.motor_etapas import (
+    Etapa,
+    MotorEtapas,
+    estadisticas_etapas,
+    limpiar_estadisticas_etapas,
+)
+
+
+@pytest.fixture(autouse=True)
+def estadisticas_limpias():
+    limpiar_estadisticas_etapas()
+    yield
+    limpiar_estadisticas_etapas()
+
+
+def _etapa(nombre, demora=0.0, workers=1, capacidad=1, registro=None, fallar_en=None, terminar_en=None):
+    async def funcion(valor):
+        if registro is not None:
+            registro.append((nombre, valor))
+        await asyncio.sleep(demora)
+        if valor == fallar_en:
+            raise RuntimeError(f"falló {valor}")
+        return valor != terminar_en
+    return Etapa(nombre=nombre, funcion=funcion, workers=workers, capacidad=capacidad)
+
+
+class TestMotorEtapas:
+    """Tests para MotorEtapas.procesar."""
+
+    def test_orden_y_todas_las_etapas(self):
+        registro = []
+        motor = MotorEtapas([_etapa("a", registro=registro), _etapa("b", registro=registro)])
+
+        elementos = asyncio.run(motor.procesar([1, 2, 3]))
+
+        assert [e.valor for e in elementos] == [1, 2, 3]
+        assert sorted(registro) == [("a", 1), ("a", 2), ("a", 3), ("b", 1), ("b", 2), ("b", 3)]
+
+    def test_solapa_etapas(self):
+        # 4 elementos x 2 etapas de 50 ms: en serie 400 ms, en tubería ~250 ms
+        motor = MotorEtapas([_etapa("a", demora=0.05), _etapa("b", demora=0.05)])
+
+        async def medir():
+            loop = asyncio.get_running_loop()
+            inicio = loop.time()
+            await motor.procesar([1, 2, 3, 4])
+            return loop.time() - inicio
+
+        assert asyncio.run(medir()) < 0.35
+
+    def test_error_y_fin_anticipado_saltan_las_etapas_siguientes(self):
+        registro = []
+        motor = MotorEtapas([
+            _etapa("a", registro=registro, fallar_en=2, terminar_en=3),
+            _etapa("b", registro=registro),
+        ])
+
+        elementos = asyncio.run(motor.procesar([1, 2, 3]))
+
+        assert isinstance(elementos[1].error, RuntimeError)
+        assert elementos[1].etapa_final == "a"
+        assert elementos[2].etapa_final == "a"
+        assert [v for etapa, v in registro if etapa == "b"] == [1]
+
+    def test_contrapresion_limita_los_elementos_en_vuelo(self):
+        en_vuelo = {"actual": 0, "maximo": 0}
+
+        async def entrar(valor):
+            en_vuelo["actual"] += 1
+            en_vuelo["maximo"] = max(en_vuelo["maximo"], en_vuelo["actual"])
+            return True
+
+        async def lenta(valor):
+            await asyncio.sleep(0.01)
+            en_vuelo["actual"] -= 1
+            return True
+
+        motor = MotorEtapas([
+            Etapa("rapida", entrar, workers=4, capacidad=1),
+            Etapa("lenta", lenta, workers=1, capacidad=1),
+        ])
+
+        asyncio.run(motor.procesar(list(range(10))))
+
+        # 1 en proceso en "lenta" + 1 en su cola + los workers de "rapida" esperando para encolar
+        assert en_vuelo["maximo"] <= 6
+        assert estadisticas_etapas()["rapida"]["bloqueo_promedio_ms"] > 0
+
+    def test_estadisticas_por_etapa(self):
+        motor = MotorEtapas([_etapa("a", workers=2, terminar_en=2), _etapa("b")])
+
+        asyncio.run(motor.procesar([1, 2, 3]))
+
+        estadisticas = estadisticas_etapas()
+        assert estadisticas["a"]["procesados"] == 3
+        assert estadisticas["a"]["workers"] == 2
+        assert estadisticas["a"]["terminados_aqui"] == 1
+        assert estadisticas["b"]["procesados"] == 2
+
+    def test_cancelar_libera_la_admision_de_los_elementos_en_vuelo(self):
+        global_ = asyncio.Semaphore(8)
+        descartados = []
+        motor = MotorEtapas([_etapa("a", demora=10, workers=4, capacidad=4)])
+
+        async def escenario():
+            por_request = asyncio.Semaphore(4)
+            tarea = asyncio.create_task(motor.procesar(
+                list(range(6)),
+                admision=(por_request, global_),
+                al_descartar=lambda elemento: descartados.append(elemento.indice),
+            ))
+            await asyncio.sleep(0.05)
+            assert global_._value == 4
+            tarea.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await tarea
+            return por_request._value
+
+        assert asyncio.run(escenario()) == 4
+        assert global_._value == 8
+        assert sorted(descartados) == [0, 1, 2, 3]
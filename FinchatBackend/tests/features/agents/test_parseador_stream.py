@@ -0,0 +1,78 @@
+"""Tests del parseo en streaming de la respuesta del LLM en AgenteParseador."""
+
+import json
+from unittest.mock import patch
+
+from agno.run.agent import RunContentEvent
+
+from app.features.agents.agente_parseador import AgenteParseador
+from app.features.agents.pipeline_context import PipelineContext
+
+
+RESPUESTA = {
+    "comprobante": {
+        "tipo_comprobante": "boleta", "serie": "B001", "numero": "172923",
+        "fecha_emision": "2025-08-02", "moneda": "PEN", "monto_total": 15.0,
+    },
+    "emisor": {"ruc": "20556519065", "razon_social": "TEAM SABOR SAC"},
+    "items": [{"descripcion": "WANTAN FRITO", "cantidad": 1, "precio_unitario": 15.0, "monto_item": 15.0}],
+}
+
+
+class _Stream:
+    """Generador de eventos que registra cuántos fragmentos se consumieron y si se cerró."""
+
+    def __init__(self, texto, tamano=10):
+        self.fragmentos = [texto[i:i + tamano] for i in range(0, len(texto), tamano)]
+        self.consumidos = 0
+        self.cerrado = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.consumidos >= len(self.fragmentos):
+            raise StopIteration
+        self.consumidos += 1
+        return RunContentEvent(content=self.fragmentos[self.consumidos - 1])
+
+    def close(self):
+        self.cerrado = True
+
+
+class TestParseadorStream:
+    """Tests para _respuesta_llm_stream."""
+
+    @patch('app.features.agents.agente_parseador.Agent')
+    def test_corta_al_cerrar_el_json(self, mock_agent):
+        stream = _Stream(json.dumps(RESPUESTA) + "\n\nEspero que esto ayude. " * 20)
+        mock_agent.return_value.run.return_value = stream
+        parseador = AgenteParseador(PipelineContext(usuario_id=1))
+
+        resultado, _ = parseador._respuesta_llm_stream("texto")
+
+        assert resultado == RESPUESTA
+        assert stream.cerrado
+        assert stream.consumidos < len(stream.fragmentos)
+        assert mock_agent.return_value.run.call_args.kwargs["stream"] is True
+
+    @patch('app.features.agents.agente_parseador.Agent')
+    def test_campo_invalido_aborta_y_usa_fallback(self, mock_agent):
+        invalida = dict(RESPUESTA, comprobante={"tipo_comprobante": "boleta", "monto_total": "quince"})
+        stream = _Stream(json.dumps(invalida))
+        mock_agent.return_value.run.return_value = stream
+        parseador = AgenteParseador(PipelineContext(usuario_id=1))
+        texto = "TEAM SABOR SAC\nRUC:20556519065\nB001-172923 02/08/2025\nTOTAL S/ 15.00"
+
+        resultado = parseador._parsear_resultado_ocr({
+            "texto": texto,
+            "confianza_promedio": 0.95,
+            "paginas": [{"numero_pagina": 1, "texto": texto, "confianza_promedio": 0.95}],
+        })
+
+        # se corta tras el miembro "comprobante", sin leer emisor ni items
+        assert stream.cerrado
+        assert stream.consumidos < len(stream.fragmentos)
+        assert parseador.contexto.get("llm_stream")["estado"] == "invalido"
+        assert resultado["emisor"]["ruc"] == "20556519065"
+        assert resultado["comprobante"]["monto_total"] == 15.0
@@ -0,0 +1,101 @@
+"""Tests unitarios para el cache de perfiles de emisor."""
+
+import asyncio
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from app.features.agents.perfil_emisor import CachePerfilEmisor, PerfilEmisor
+
+RUC = "20556519065"
+DATOS = {
+    "razon_social": "TEAM SABOR S.A.C.",
+    "nombre_comercial": "TEAM SABOR",
+    "estado_ruc": "ACTIVO",
+    "condicion_ruc": "HABIDO",
+    "ciiu": "5510",
+}
+
+
+@pytest.fixture
+def cache():
+    """Cache sin BD: _leer_bd mockeado."""
+    cache = CachePerfilEmisor(vigencia_seg=3600, max_memoria=10)
+    cache._leer_bd = Mock(return_value=None)
+    return cache
+
+
+class TestCachePerfilEmisor:
+    """Tests para CachePerfilEmisor.resolver."""
+
+    def test_emisor_desconocido_es_miss(self, cache):
+        assert asyncio.run(cache.resolver(RUC, "TEAM SABOR SAC")) is None
+        assert cache.estadisticas()["misses"] == 1
+
+    def test_hit_desde_bd_aplica_reglas_y_clasifica(self, cache):
+        """Test que el perfil guardado da validación y clasificación sin agentes."""
+        cache._leer_bd.return_value = PerfilEmisor(datos=DATOS, validado_en=time.time())
+
+        async def escenario():
+            return await cache.resolver(RUC, "TEAM SABOR SAC"), await cache.resolver(RUC, "TEAM SABOR SAC")
+
+        (validacion, clasificacion), _ = asyncio.run(escenario())
+
+        assert validacion["fuente_validacion"] == "perfil_emisor"
+        assert validacion["pasa_reglas_basicas"] is True
+        assert validacion["coincide_nombre"] is True
+        assert clasificacion["ciiu_utilizado"] == "5510"
+        assert clasificacion["porcentaje_deduccion"] == 15
+        cache._leer_bd.assert_called_once_with(RUC)
+        assert cache.hits_bd == 1
+        assert cache.hits_memoria == 1
+        assert cache.estadisticas()["hit_rate"] == 1.0
+
+    def test_perfil_vencido(self, cache):
+        cache._leer_bd.return_value = PerfilEmisor(datos=DATOS, validado_en=time.time() - 7200)
+
+        assert asyncio.run(cache.resolver(RUC, "TEAM SABOR SAC")) is None
+        assert cache.vencidos == 1
+
+    def test_nombre_ambiguo_sigue_camino_completo(self, cache):
+        cache._leer_bd.return_value = PerfilEmisor(datos=DATOS, validado_en=time.time())
+
+        assert asyncio.run(cache.resolver(RUC, "TEAM SABORES DEL NORTE")) is None
+        assert cache.insuficientes == 1
+
+    def test_registrar_reutiliza_clasificacion(self, cache):
+        """Test que una clasificación previa del RUC se reutiliza sin volver a la BD."""
+        validacion = {
+            "estado_ruc": "ACTIVO",
+            "condicion_ruc": "HABIDO",
+            "ciiu": "9999",
+            "razon_social": "TEAM SABOR S.A.C.",
+            "nombre_comercial_sunat": None,
+            "fuente_validacion": "reglas",
+        }
+        clasificacion = {
+            "categoria_gasto": "restaurantes",
+            "porcentaje_deduccion": 15.0,
+            "ciiu_utilizado": "9999",
+            "version_regla": "v1.0",
+            "fuente_clasificacion": "llm",
+        }
+        cache.registrar(RUC, validacion, clasificacion, time.time())
+
+        _, reutilizada = asyncio.run(cache.resolver(RUC, "TEAM SABOR SAC"))
+
+        assert reutilizada == clasificacion
+        cache._leer_bd.assert_not_called()
+
+    def test_no_registra_validaciones_sin_sunat(self, cache):
+        cache.registrar(RUC, {"estado_ruc": "DESCONOCIDO", "fallback": True}, None, time.time())
+
+        assert cache.estadisticas()["entradas_memoria"] == 0
+
+    def test_no_registra_sin_fecha_de_consulta(self, cache):
+        validacion = {"estado_ruc": "ACTIVO", "condicion_ruc": "HABIDO", "fuente_validacion": "reglas"}
+
+        cache.registrar(RUC, validacion, None, None)
+
+        assert cache.estadisticas()["entradas_memoria"] == 0
@@ -1,7 +1,7 @@
 """Tests unitarios para PipelineContext."""
 
-import pytest
-from unittest.mock import patch, Mock
+import asyncio
+from unittest.mock import AsyncMock, patch, Mock
 
 from app.features.agents.pipeline_context import PipelineContext
 
@@ -140,6 +140,45 @@ class TestGetSunatData:
         assert "22222222222" in contexto.sunat_cache
 
 
+class TestPrecargaSunat:
+    """Tests para la consulta SUNAT especulativa tras el OCR."""
+
+    @patch.object(PipelineContext, '_consultar_sunat', new_callable=AsyncMock)
+    def test_precarga_coincidente_se_reutiliza(self, mock_consultar):
+        """Test que get_sunat_data usa la precarga en vez de consultar de nuevo."""
+        mock_consultar.return_value = {"razon_social": "TEST SAC"}
+
+        async def escenario():
+            contexto = PipelineContext()
+            contexto.precargar_sunat(["20556519065"])
+            return await contexto.get_sunat_data("20556519065")
+
+        assert asyncio.run(escenario()) == {"razon_social": "TEST SAC"}
+        mock_consultar.assert_awaited_once_with("20556519065")
+
+    @patch.object(PipelineContext, '_consultar_sunat', new_callable=AsyncMock)
+    def test_precarga_distinta_se_descarta(self, mock_consultar):
+        """Test que la precarga de otro RUC se cancela y el parseado se consulta."""
+        async def lenta(ruc):
+            await asyncio.sleep(1)
+
+        mock_consultar.side_effect = lenta
+
+        async def escenario():
+            contexto = PipelineContext()
+            contexto.precargar_sunat(["20100070970"])
+            precarga = contexto._precargas["20100070970"]
+            contexto.descartar_precargas(conservar="20556519065")
+            await asyncio.sleep(0)
+            return precarga, contexto
+
+        precarga, contexto = asyncio.run(escenario())
+
+        assert precarga.cancelled()
+        assert contexto._precargas == {}
+        assert "20100070970" not in contexto.sunat_cache
+
+
 class TestToDict:
     """Tests para serialización del contexto."""
 
@@ -0,0 +1,59 @@
+"""Tests para el registro de agentes compartidos y el estado vinculado."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app.features.agents.agente_clasificador import AgenteClasificador
+from app.features.agents.agente_validador_sunat import SunatToolkit
+from app.features.agents.pipeline_context import PipelineContext
+from app.features.agents.registro_agentes import estado_vinculado, get_agente, vincular
+from app.libs.models.model_selector import get_ollama
+
+
+class TestRegistroAgentes:
+    """Tests para get_agente y vincular."""
+
+    def test_fabrica_se_llama_una_vez(self):
+        fabrica = Mock(return_value=Mock())
+
+        primero = get_agente("prueba", fabrica)
+        segundo = get_agente("prueba", fabrica)
+
+        assert primero is segundo
+        fabrica.assert_called_once()
+
+    def test_vincular_anida_y_restaura(self):
+        with vincular(contexto="a", usuario_id=1):
+            with vincular(contexto="b"):
+                assert estado_vinculado("contexto") == "b"
+                assert estado_vinculado("usuario_id") == 1
+            assert estado_vinculado("contexto") == "a"
+
+        with pytest.raises(RuntimeError):
+            estado_vinculado("contexto")
+
+    def test_toolkit_compartido_usa_el_contexto_vinculado(self):
+        toolkit = SunatToolkit()
+        contexto = PipelineContext(usuario_id=1)
+        contexto.get_sunat_data = AsyncMock(return_value={"ruc": "20556519065"})
+
+        async def consultar():
+            with vincular(contexto=contexto):
+                return await toolkit.consultar_ruc("20556519065")
+
+        assert json.loads(asyncio.run(consultar())) == {"ruc": "20556519065"}
+
+    @patch('app.features.agents.agente_clasificador.Agent')
+    def test_un_agente_para_varias_peticiones(self, mock_agent):
+        primero = AgenteClasificador(PipelineContext(usuario_id=1))
+        segundo = AgenteClasificador(PipelineContext(usuario_id=2))
+
+        assert primero.agent is segundo.agent
+        mock_agent.assert_called_once()
+
+    def test_modelo_compartido_por_schema(self):
+        assert get_ollama() is get_ollama()
+        assert get_ollama({"type": "object"}) is not get_ollama()
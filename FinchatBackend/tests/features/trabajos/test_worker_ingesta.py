@@ -0,0 +1,173 @@
+"""Tests unitarios para el worker de ingesta asíncrona."""
+
+import asyncio
+import uuid
+from pathlib import Path
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.features.trabajos.worker_ingesta import WorkerIngesta
+
+
+@pytest.fixture
+def trabajo(tmp_path):
+    """Trabajo pendiente con su archivo guardado en disco."""
+    ruta = tmp_path / "boleta.pdf"
+    ruta.write_bytes(b"PDF content")
+
+    trabajo = Mock()
+    trabajo.id_trabajo = uuid.uuid4()
+    trabajo.id_usuario = 1
+    trabajo.intentos = 1
+    trabajo.nombre_archivo = "boleta.pdf"
+    trabajo.mime_type = "application/pdf"
+    trabajo.ruta_archivo = str(ruta)
+    return trabajo
+
+
+@pytest.fixture
+def mock_repo(trabajo):
+    repo = Mock()
+    repo.tomar_pendientes.return_value = [trabajo]
+    repo.obtener.return_value = trabajo
+    return repo
+
+
+class TestProcesarSiguiente:
+    """Tests para WorkerIngesta.procesar_siguiente."""
+
+    @patch('app.features.trabajos.worker_ingesta.Session')
+    @patch('app.features.trabajos.worker_ingesta.EstadoTrabajoRepositorio')
+    def test_cola_vacia(self, mock_repo_class, mock_session_class):
+        """Test que retorna False cuando no hay trabajos pendientes."""
+        mock_repo_class.return_value.tomar_pendientes.return_value = []
+
+        procesado = asyncio.run(WorkerIngesta(num_workers=1).procesar_siguiente())
+
+        assert procesado is False
+        mock_session_class.return_value.close.assert_called_once()
+
+    @patch('app.features.trabajos.worker_ingesta.IngestaWorkflow')
+    @patch('app.features.trabajos.worker_ingesta.Session')
+    @patch('app.features.trabajos.worker_ingesta.EstadoTrabajoRepositorio')
+    def test_trabajo_completado(
+        self, mock_repo_class, mock_session_class, mock_workflow_class, mock_repo, trabajo
+    ):
+        """Test que un workflow exitoso marca el trabajo como completado."""
+        mock_repo_class.return_value = mock_repo
+        mock_workflow_class.return_value.run = AsyncMock(
+            return_value={"exito": True, "comprobante_id": 100, "mensaje": "ok"}
+        )
+
+        procesado = asyncio.run(WorkerIngesta(num_workers=1).procesar_siguiente())
+
+        assert procesado is True
+        input_data = mock_workflow_class.return_value.run.call_args.kwargs["input_data"]
+        assert input_data["contenido"] == b"PDF content"
+        mock_repo.marcar_completado.assert_called_once_with(trabajo, id_comprobante=100, mensaje="ok")
+        mock_repo.marcar_fallido.assert_not_called()
+
+    @patch('app.features.trabajos.worker_ingesta.IngestaWorkflow')
+    @patch('app.features.trabajos.worker_ingesta.Session')
+    @patch('app.features.trabajos.worker_ingesta.EstadoTrabajoRepositorio')
+    def test_trabajo_fallido_se_reintenta(
+        self, mock_repo_class, mock_session_class, mock_workflow_class, mock_repo, trabajo
+    ):
+        """Test que un error delega en marcar_fallido con el máximo de intentos."""
+        mock_repo_class.return_value = mock_repo
+        mock_workflow_class.return_value.run = AsyncMock(
+            return_value={"exito": False, "error": "timeout", "error_tipo": "TimeoutError"}
+        )
+
+        asyncio.run(WorkerIngesta(num_workers=1).procesar_siguiente())
+
+        mock_repo.marcar_fallido.assert_called_once()
+        kwargs = mock_repo.marcar_fallido.call_args.kwargs
+        assert kwargs["codigo_error"] == "TimeoutError"
+        assert kwargs["mensaje"] == "timeout"
+        mock_repo.marcar_completado.assert_not_called()
+
+    @patch('app.features.trabajos.worker_ingesta.IngestaWorkflow')
+    @patch('app.features.trabajos.worker_ingesta.Session')
+    @patch('app.features.trabajos.worker_ingesta.EstadoTrabajoRepositorio')
+    def test_error_definitivo_no_se_reintenta_y_borra_archivo(
+        self, mock_repo_class, mock_session_class, mock_workflow_class, mock_repo, trabajo
+    ):
+        """Test que un archivo inválido pasa a 'error' sin reintentos y libera el upload."""
+        mock_repo_class.return_value = mock_repo
+        mock_workflow_class.return_value.run = AsyncMock(return_value={
+            "exito": False, "error": "Error en parsing: imagen", "error_tipo": "Exception", "error_causa": "ValueError",
+        })
+
+        def marcar_fallido(trabajo, reintentable, **kwargs):
+            trabajo.estado = "pendiente" if reintentable else "error"
+
+        mock_repo.marcar_fallido.side_effect = marcar_fallido
+
+        asyncio.run(WorkerIngesta(num_workers=1).procesar_siguiente())
+
+        assert mock_repo.marcar_fallido.call_args.kwargs["reintentable"] is False
+        assert trabajo.estado == "error"
+        assert not Path(trabajo.ruta_archivo).exists()
+
+    @patch('app.features.trabajos.worker_ingesta.settings')
+    @patch('app.features.trabajos.worker_ingesta.IngestaWorkflow')
+    @patch('app.features.trabajos.worker_ingesta.Session')
+    @patch('app.features.trabajos.worker_ingesta.EstadoTrabajoRepositorio')
+    def test_latido_mientras_corre_el_pipeline(
+        self, mock_repo_class, mock_session_class, mock_workflow_class, mock_settings, mock_repo, trabajo
+    ):
+        """Test que un trabajo largo renueva su actualizado_en y deja de hacerlo al terminar."""
+        mock_settings.trabajos_intervalo_latido_seg = 0.01
+        mock_repo_class.return_value = mock_repo
+
+        async def run(input_data):
+            await asyncio.sleep(0.05)
+            return {"exito": True, "comprobante_id": 100, "mensaje": "ok"}
+
+        mock_workflow_class.return_value.run = run
+
+        async def escenario():
+            await WorkerIngesta(num_workers=1).procesar_siguiente()
+            latidos = mock_repo.renovar.call_count
+            await asyncio.sleep(0.03)
+            return latidos
+
+        latidos = asyncio.run(escenario())
+
+        assert latidos >= 2
+        assert mock_repo.renovar.call_count == latidos
+        mock_repo.renovar.assert_called_with(trabajo.id_trabajo)
+
+
+class TestRecuperarHuerfanos:
+    """Tests para la recuperación periódica de trabajos huérfanos."""
+
+    def test_recupera_cada_intervalo(self):
+        worker = WorkerIngesta(num_workers=1)
+        worker._recuperar_huerfanos = Mock()
+
+        async def escenario():
+            await worker._recuperar_huerfanos_periodico()
+            await worker._recuperar_huerfanos_periodico()  # dentro del intervalo
+            worker._proxima_recuperacion = 0.0
+            await worker._recuperar_huerfanos_periodico()
+
+        asyncio.run(escenario())
+
+        assert worker._recuperar_huerfanos.call_count == 2
+
+    @patch('app.features.trabajos.worker_ingesta.Session')
+    @patch('app.features.trabajos.worker_ingesta.EstadoTrabajoRepositorio')
+    def test_huerfano_sin_intentos_borra_su_archivo(self, mock_repo_class, mock_session_class, tmp_path):
+        """Test que un huérfano que agotó sus intentos no vuelve a la cola y libera el upload."""
+        ruta = tmp_path / "mata_al_worker.pdf"
+        ruta.write_bytes(b"PDF")
+        mock_repo_class.return_value.recuperar_huerfanos.return_value = (1, [str(ruta)])
+
+        WorkerIngesta(num_workers=1)._recuperar_huerfanos()
+
+        assert mock_repo_class.return_value.recuperar_huerfanos.call_args.args[2] == 3
+        mock_session_class.return_value.commit.assert_called_once()
+        assert not ruta.exists()
@@ -1,6 +1,9 @@
 """Tests de integración del pipeline INGESTA completo."""
 
+import asyncio
+
 import pytest
+from sqlalchemy.exc import IntegrityError
 from unittest.mock import Mock, MagicMock, patch
 from datetime import date
 
@@ -10,6 +13,7 @@ from app.features.agents.agente_parseador import AgenteParseador
 from app.features.agents.agente_validador_sunat import AgenteValidadorSunat
 from app.features.agents.agente_clasificador import AgenteClasificador
 from app.features.agents.agente_persistencia import AgentePersistencia
+from app.features.agents.pipeline_ingesta import EstadoIngesta, IngestaWorkflow
 
 
 @pytest.fixture
@@ -209,3 +213,28 @@ class TestPipelineIngestaCompleto:
 
         # El pipeline debería detenerse aquí
         # No se ejecutan: Parseador, SUNAT, Clasificador, ni Persistencia
+
+
+class TestGuardarArchivoRepetido:
+    """Tests para el mismo archivo guardado dos veces en paralelo."""
+
+    def test_restriccion_de_hash_se_reporta_como_duplicado(self, contexto_pipeline):
+        """Test que la copia que pierde la carrera por el hash termina como duplicado."""
+        workflow = IngestaWorkflow(Mock())
+        workflow.comprobante_repo = Mock()
+        workflow.comprobante_repo.buscar_por_hash.return_value = Mock(id_comprobante=7)
+        workflow._persistir = Mock(side_effect=IntegrityError(
+            "INSERT INTO comprobante ...", {},
+            Exception('duplicate key value violates unique constraint "comprobante_unq_usuario_hash"'),
+        ))
+        estado = EstadoIngesta(
+            input_data={"usuario_id": 1, "nombre_archivo": "test_boleta.pdf", "contenido": b"PDF"},
+            contexto=contexto_pipeline,
+        )
+
+        continuar = asyncio.run(workflow.ejecutar_etapa("persistencia", estado))
+
+        assert continuar is False
+        assert workflow.resultado(estado)["duplicado"] is True
+        assert workflow.resultado(estado)["comprobante_id"] == 7
+        workflow.session.rollback.assert_called_once()
@@ -0,0 +1,140 @@
+"""Tests para el cache de respuestas LLM."""
+
+import asyncio
+import os
+import threading
+import time
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.config.settings import settings
+from app.features.agents.agente_clasificador import AgenteClasificador
+from app.features.agents.agente_validador_sunat import AgenteValidadorSunat
+from app.features.agents.pipeline_context import PipelineContext
+from app.libs.models.cache_llm import CacheLlm, clave_llm
+
+
+def _agente(instrucciones=("sistema",), opciones=None):
+    return Mock(
+        model=Mock(id="modelo", options=opciones or {"temperature": 0, "seed": 123}, format=None),
+        instructions=list(instrucciones),
+    )
+
+
+class TestClaveLlm:
+    """Tests para clave_llm."""
+
+    def test_misma_ejecucion_misma_clave(self):
+        assert clave_llm(_agente(), "hola") == clave_llm(_agente(), "hola")
+
+    def test_cambia_con_prompt_instrucciones_y_opciones(self):
+        base = clave_llm(_agente(), "hola")
+
+        assert clave_llm(_agente(), "chau") != base
+        assert clave_llm(_agente(instrucciones=("otro",)), "hola") != base
+        assert clave_llm(_agente(opciones={"temperature": 0.5}), "hola") != base
+        assert clave_llm(_agente(), "hola", fecha="2025-08-02") != base
+
+
+class TestCacheLlm:
+    """Tests para CacheLlm."""
+
+    def test_guardar_y_obtener(self, tmp_path):
+        cache = CacheLlm(str(tmp_path), max_bytes=1024 * 1024, max_edad_segundos=60)
+
+        assert cache.obtener("ab" * 32) is None
+        cache.guardar("ab" * 32, '{"a": 1}')
+
+        assert cache.obtener("ab" * 32) == '{"a": 1}'
+        assert cache.estadisticas()["hits"] == 1
+        assert cache.estadisticas()["misses"] == 1
+
+    def test_entrada_vencida(self, tmp_path):
+        cache = CacheLlm(str(tmp_path), max_bytes=1024 * 1024, max_edad_segundos=60)
+        cache.guardar("ab" * 32, "respuesta")
+
+        with patch("app.utils.cache_disco.time.time", return_value=time.time() + 120):
+            assert cache.obtener("ab" * 32) is None
+
+        assert cache.expiradas == 1
+        assert not list(tmp_path.glob("*/*.json"))
+
+    def test_desaloja_las_menos_usadas(self, tmp_path):
+        cache = CacheLlm(str(tmp_path), max_bytes=300, max_edad_segundos=60)
+        cache.guardar("aa" * 32, "x" * 100)
+        os.utime(tmp_path / "aa" / f"{'aa' * 32}.json", (1, 1))
+        cache.guardar("bb" * 32, "y" * 100)
+        cache.guardar("cc" * 32, "z" * 100)
+
+        assert cache.obtener("aa" * 32) is None
+        assert cache.obtener("cc" * 32) == "z" * 100
+        assert cache.desalojadas >= 1
+
+
+class TestCacheEnAgentes:
+    """El clasificador no vuelve a llamar al LLM con el mismo prompt."""
+
+    @patch('app.features.agents.agente_clasificador.Agent')
+    def test_clasificador_reutiliza_respuesta(self, mock_agent, tmp_path):
+        mock_agent.return_value = _agente()
+        mock_agent.return_value.run.return_value = Mock(content=(
+            '{"categoria_gasto": "restaurantes", "porcentaje_deduccion": 15.0, '
+            '"ciiu_utilizado": "9999", "version_regla": "v1.0"}'
+        ))
+        cache = CacheLlm(str(tmp_path), max_bytes=1024 * 1024, max_edad_segundos=60)
+        contexto = PipelineContext(usuario_id=1)
+        contexto.validacion_sunat = {"ciiu": "9999"}
+
+        with patch('app.features.agents.agente_clasificador.get_cache_llm', return_value=cache):
+            primero = AgenteClasificador(contexto).tool_clasificar()
+            segundo = AgenteClasificador(contexto).tool_clasificar()
+
+        assert primero == segundo
+        assert primero["categoria_gasto"] == "restaurantes"
+        mock_agent.return_value.run.assert_called_once()
+        assert cache.hits == 1
+
+    @patch('app.features.agents.agente_validador_sunat.Agent')
+    def test_validador_con_herramientas_invalida_si_cambia_sunat(self, mock_agent, tmp_path, monkeypatch):
+        """En modo herramientas los datos SUNAT no van en el prompt, pero sí en la clave."""
+        monkeypatch.setattr(settings, "ollama_salida_estructurada", False)
+        mock_agent.return_value = _agente()
+        mock_agent.return_value.arun = AsyncMock(return_value=Mock(content=(
+            '{"estado_ruc": "ACTIVO", "condicion_ruc": "HABIDO", "ciiu": "5610", '
+            '"razon_social": "TEAM SABOR S.A.C.", "coincide_nombre": true, "pasa_reglas_basicas": true}'
+        )))
+        cache = CacheLlm(str(tmp_path), max_bytes=1024 * 1024, max_edad_segundos=60)
+
+        def validar(estado_ruc):
+            contexto = PipelineContext(usuario_id=1)
+            contexto.sunat_cache["20556519065"] = {"razon_social": "TEAM SABOR S.A.C.", "estado_ruc": estado_ruc}
+            return asyncio.run(AgenteValidadorSunat(contexto)._validar_con_llm("20556519065", "TEAM SABOR"))
+
+        with patch('app.features.agents.agente_validador_sunat.get_cache_llm', return_value=cache):
+            validar("ACTIVO")
+            validar("ACTIVO")
+            validar("BAJA DE OFICIO")
+
+        assert mock_agent.return_value.arun.await_count == 2
+        assert cache.hits == 1
+
+    @patch('app.features.agents.agente_validador_sunat.Agent')
+    def test_validador_lee_y_escribe_fuera_del_event_loop(self, mock_agent, tmp_path):
+        """El disco del cache no bloquea el event loop del validador."""
+        mock_agent.return_value = _agente()
+        mock_agent.return_value.arun = AsyncMock(return_value=Mock(content=(
+            '{"estado_ruc": "ACTIVO", "condicion_ruc": "HABIDO", "ciiu": "5610", '
+            '"razon_social": "TEAM SABOR S.A.C.", "coincide_nombre": true, "pasa_reglas_basicas": true}'
+        )))
+        cache = CacheLlm(str(tmp_path), max_bytes=1024 * 1024, max_edad_segundos=60)
+        hilos = []
+        for metodo in ("obtener", "guardar"):
+            original = getattr(cache, metodo)
+            setattr(cache, metodo, lambda *args, _original=original: hilos.append(threading.get_ident()) or _original(*args))
+
+        contexto = PipelineContext(usuario_id=1)
+        contexto.sunat_cache["20556519065"] = {"razon_social": "TEAM SABOR S.A.C.", "estado_ruc": "ACTIVO"}
+        with patch('app.features.agents.agente_validador_sunat.get_cache_llm', return_value=cache):
+            asyncio.run(AgenteValidadorSunat(contexto)._validar_con_llm("20556519065", "TEAM SABOR"))
+
+        assert len(hilos) == 2
+        assert threading.get_ident() not in hilos
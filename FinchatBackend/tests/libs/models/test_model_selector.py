@@ -0,0 +1,31 @@
+"""Tests para get_ollama y la salida estructurada."""
+
+from unittest.mock import patch
+
+from app.features.agents.models import ClasificacionLlm, ComprobanteSalidaLlm
+from app.libs.models.model_selector import get_ollama
+
+
+class TestGetOllama:
+    """Tests para get_ollama."""
+
+    def test_sin_formato(self):
+        assert get_ollama().format is None
+
+    def test_schema_desde_modelo_pydantic(self):
+        modelo = get_ollama(ComprobanteSalidaLlm)
+
+        assert modelo.format == ComprobanteSalidaLlm.model_json_schema()
+        # el LLM no debe generar el texto OCR completo ni la confianza
+        assert set(modelo.format["properties"]) == {"comprobante", "emisor", "items", "cliente"}
+
+    def test_schema_como_dict(self):
+        esquema = {"type": "object", "properties": {"a": {"type": "string"}}}
+
+        assert get_ollama(esquema).format == esquema
+
+    @patch('app.libs.models.model_selector.settings')
+    def test_deshabilitado(self, mock_settings):
+        mock_settings.ollama_salida_estructurada = False
+
+        assert get_ollama(ClasificacionLlm).format is None
@@ -0,0 +1,79 @@
+"""Tests unitarios para el cache OCR en disco."""
+
+import os
+from unittest.mock import patch
+
+from app.features.agents.agente_parseador import AgenteParseador
+from app.features.agents.pipeline_context import PipelineContext
+from app.libs.ocr.cache_ocr import VERSION_FORMATO, CacheOcr
+
+RESULTADO = {
+    "texto": "TEAM SABOR SAC\nRUC 20556519065",
+    "confianza_promedio": 0.93,
+    "paginas": [{"numero_pagina": 1, "texto": "TEAM SABOR SAC", "confianza_promedio": 0.93}],
+}
+
+
+def _hash(n):
+    return f"{n:02x}" + "a" * 62
+
+
+class TestCacheOcr:
+    """Tests para CacheOcr."""
+
+    def test_guardar_y_obtener(self, tmp_path):
+        cache = CacheOcr(str(tmp_path), max_bytes=1024 * 1024)
+
+        assert cache.obtener(_hash(1)) is None
+        cache.guardar(_hash(1), RESULTADO)
+
+        assert cache.obtener(_hash(1)) == RESULTADO
+        assert cache.estadisticas()["hits"] == 1
+        assert cache.estadisticas()["misses"] == 1
+
+    def test_version_distinta_es_miss(self, tmp_path):
+        cache = CacheOcr(str(tmp_path), max_bytes=1024 * 1024)
+        cache.guardar(_hash(1), RESULTADO)
+
+        with patch("app.libs.ocr.cache_ocr.VERSION_FORMATO", VERSION_FORMATO + 1):
+            assert cache.obtener(_hash(1)) is None
+
+    def test_desaloja_las_menos_usadas(self, tmp_path):
+        """Test que al superar el máximo se eliminan las entradas más antiguas."""
+        cache = CacheOcr(str(tmp_path), max_bytes=1024 * 1024)
+        for n in range(3):
+            cache.guardar(_hash(n), RESULTADO)
+            os.utime(cache._ruta(_hash(n)), (1000 + n, 1000 + n))
+
+        # leer la primera la vuelve la más reciente
+        cache.obtener(_hash(0))
+        tamano_entrada = cache._ruta(_hash(0)).stat().st_size
+        cache.max_bytes = tamano_entrada * 3
+
+        cache.guardar(_hash(3), RESULTADO)
+
+        assert cache.obtener(_hash(1)) is None
+        assert cache.obtener(_hash(0)) == RESULTADO
+        assert cache.obtener(_hash(3)) == RESULTADO
+        assert cache.desalojadas >= 1
+
+
+
+class TestParseadorConCache:
+    """Tests de la integración del cache con AgenteParseador."""
+
+    @patch('app.features.agents.agente_parseador.Agent')
+    def test_mismo_archivo_no_repite_ocr(self, mock_agent, tmp_path):
+        cache = CacheOcr(str(tmp_path), max_bytes=1024 * 1024)
+
+        with patch('app.features.agents.agente_parseador.get_cache_ocr', return_value=cache), \
+             patch('app.features.agents.agente_parseador.extraer_texto_img') as mock_img:
+            mock_img.return_value = {"texto": "TEXTO", "confianza_promedio": 0.9}
+
+            for usuario_id in (1, 2):
+                parseador = AgenteParseador(PipelineContext(usuario_id=usuario_id))
+                resultado = parseador._obtener_ocr(b"imagen", "image/png")
+
+        assert mock_img.call_count == 1
+        assert resultado["texto"] == "TEXTO"
+        assert parseador.contexto.get("ocr_desde_cache") is True
@@ -0,0 +1,59 @@
+"""Tests de extracción OCR desde bytes en memoria."""
+
+import cv2
+import fitz
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from app.libs.ocr.imagen_ocr import decodificar_imagen, extraer_texto_img
+from app.libs.ocr.pdf_extractor import extraer_texto_pdf
+
+
+def _pdf_bytes(*textos):
+    doc = fitz.open()
+    for texto in textos:
+        doc.new_page().insert_text((72, 72), texto)
+    contenido = doc.tobytes()
+    doc.close()
+    return contenido
+
+
+class TestExtraerTextoPdf:
+    """Tests para extraer_texto_pdf."""
+
+    def test_desde_bytes(self):
+        paginas = extraer_texto_pdf(_pdf_bytes("RUC 20556519065", "TOTAL 50.00"))
+
+        assert [p["numero_pagina"] for p in paginas] == [1, 2]
+        assert "20556519065" in paginas[0]["texto"]
+        assert "TOTAL" in paginas[1]["texto"]
+
+
+class TestExtraerTextoImg:
+    """Tests para extraer_texto_img."""
+
+    def test_decodifica_bytes(self):
+        imagen = np.full((20, 30, 3), 255, dtype=np.uint8)
+        _, png = cv2.imencode(".png", imagen)
+
+        decodificada = decodificar_imagen(png.tobytes())
+
+        assert decodificada.shape == (20, 30, 3)
+
+    def test_bytes_invalidos(self):
+        with pytest.raises(ValueError):
+            decodificar_imagen(b"no es una imagen")
+
+    @patch('app.libs.ocr.imagen_ocr._get_ocr')
+    def test_paddle_recibe_arreglo(self, mock_get_ocr):
+        """Test que PaddleOCR recibe el arreglo decodificado, no una ruta."""
+        mock_get_ocr.return_value.ocr.return_value = [{"rec_texts": ["HOLA"], "rec_scores": [0.9]}]
+        _, png = cv2.imencode(".png", np.zeros((10, 10, 3), dtype=np.uint8))
+
+        resultado = extraer_texto_img(png.tobytes())
+
+        argumento = mock_get_ocr.return_value.ocr.call_args[0][0]
+        assert isinstance(argumento, np.ndarray)
+        assert resultado["texto"] == "HOLA"
+        assert resultado["confianza_promedio"] == pytest.approx(0.9)
@@ -0,0 +1,93 @@
+"""Tests unitarios para el worker de PaddleOCR por lotes."""
+
+import asyncio
+
+import numpy as np
+import pytest
+from unittest.mock import Mock, patch
+
+from app.libs.ocr.lote_ocr import OcrLoteWorker
+
+
+def _imagen(valor):
+    return np.full((4, 4, 3), valor, dtype=np.uint8)
+
+
+@pytest.fixture
+def ocr_falso():
+    """PaddleOCR falso: devuelve el valor del primer pixel como texto."""
+    ocr = Mock()
+    ocr.lotes = []
+
+    def predict(imagenes):
+        ocr.lotes.append(len(imagenes))
+        return [{"rec_texts": [str(img[0, 0, 0])], "rec_scores": [0.5]} for img in imagenes]
+
+    ocr.predict.side_effect = predict
+    with patch('app.libs.ocr.lote_ocr._get_ocr', return_value=ocr):
+        yield ocr
+
+
+class TestOcrLoteWorker:
+    """Tests para OcrLoteWorker."""
+
+    def test_agrupa_imagenes_concurrentes(self, ocr_falso):
+        """Test que las imágenes de varios requests se infieren juntas y cada una recibe lo suyo."""
+        worker = OcrLoteWorker(max_lote=4, max_espera_ms=200)
+        worker.iniciar()
+
+        async def principal():
+            return await asyncio.gather(*(worker.reconocer(_imagen(v)) for v in range(6)))
+
+        try:
+            resultados = asyncio.run(principal())
+        finally:
+            worker.detener()
+
+        assert [r["texto"] for r in resultados] == [str(v) for v in range(6)]
+        assert max(ocr_falso.lotes) <= 4
+        assert len(ocr_falso.lotes) < 6
+        assert worker.imagenes == 6
+
+    def test_error_de_inferencia_llega_al_futuro(self, ocr_falso):
+        ocr_falso.predict.side_effect = RuntimeError("sin memoria")
+        worker = OcrLoteWorker(max_lote=2, max_espera_ms=1)
+        worker.iniciar()
+
+        try:
+            with pytest.raises(RuntimeError, match="sin memoria"):
+                worker.enviar(_imagen(1)).result(timeout=5)
+        finally:
+            worker.detener()
+
+    def test_enviar_sin_iniciar(self):
+        with pytest.raises(RuntimeError):
+            OcrLoteWorker(max_lote=2, max_espera_ms=1).enviar(_imagen(1))
+
+    def test_resultados_incompletos_o_ilegibles_no_dejan_futuros_pendientes(self, ocr_falso):
+        """Test que un resultado que no se puede convertir o que falta falla solo su imagen."""
+        ocr_falso.predict.side_effect = lambda imagenes: [{"rec_texts": ["1"], "rec_scores": [0.5]}, [[None, 5]]]
+        worker = OcrLoteWorker(max_lote=3, max_espera_ms=200)
+        worker.iniciar()
+
+        try:
+            futuros = [worker.enviar(_imagen(v)) for v in range(3)]
+            assert futuros[0].result(timeout=5)["texto"] == "1"
+            for futuro in futuros[1:]:
+                assert futuro.exception(timeout=5) is not None
+        finally:
+            worker.detener()
+
+    def test_fallo_al_cargar_el_modelo_llega_a_los_futuros(self):
+        with patch('app.libs.ocr.lote_ocr._get_ocr', side_effect=RuntimeError("sin modelo")):
+            worker = OcrLoteWorker(max_lote=2, max_espera_ms=1)
+            worker._cerrado = False
+            worker._hilo = Mock(is_alive=Mock(return_value=True))
+            futuro = worker.enviar(_imagen(1))
+            worker._bucle()
+
+            with pytest.raises(RuntimeError, match="sin modelo"):
+                futuro.result(timeout=5)
+            assert not worker.activo
+            with pytest.raises(RuntimeError):
+                worker.enviar(_imagen(2))
@@ -0,0 +1,102 @@
+"""Tests para la extracción estructurada de PDFs digitales."""
+
+import fitz
+from unittest.mock import patch
+
+from app.features.agents.agente_parseador import AgenteParseador
+from app.features.agents.pipeline_context import PipelineContext
+from app.libs.ocr.pdf_estructurado import agrupar_lineas, estructura_confiable, extraer_estructura
+from app.libs.ocr.pdf_extractor import extraer_paginas_pdf
+
+# (x, y, texto) de una factura electrónica típica
+FACTURA = [
+    (72, 60, "COMERCIAL OMEGA SAC"),
+    (72, 75, "RUC: 20556519065"),
+    (72, 90, "FACTURA ELECTRONICA"),
+    (72, 105, "F001-000123"),
+    (72, 120, "Fecha de Emisión: 15/07/2025"),
+    (72, 135, "Cliente: JUAN PEREZ LOPEZ DNI: 75524035"),
+    (72, 165, "Descripción"), (300, 165, "Cant."), (360, 165, "P.U."), (430, 165, "Importe"),
+    (72, 180, "Servicio Contable"), (305, 180, "1"), (360, 180, "500.00"), (430, 180, "500.00"),
+    (72, 195, "Asesoría Tributaria"), (305, 195, "2"), (360, 195, "200.00"), (430, 195, "400.00"),
+    (72, 210, "GASEOSA 1.5 LIT"), (305, 210, "1"), (360, 210, "12.50"), (430, 210, "12.50"),
+    (72, 240, "OP. GRAVADA S/ 773.31"),
+    (72, 255, "IGV S/ 139.19"),
+    (72, 270, "IMPORTE TOTAL S/ 912.50"),
+    (72, 285, "SON: NOVECIENTOS DOCE CON 50/100 SOLES"),
+]
+
+
+def _pdf(elementos):
+    doc = fitz.open()
+    page = doc.new_page()
+    for x, y, texto in elementos:
+        page.insert_text((x, y), texto, fontsize=9)
+    contenido = doc.tobytes()
+    doc.close()
+    return contenido
+
+
+def _palabras(contenido):
+    with patch('app.libs.ocr.pdf_extractor.settings') as mock_settings:
+        mock_settings.pdf_paralelo_min_paginas = 100
+        mock_settings.pdf_procesos = 1
+        mock_settings.pdf_dpi_escaneo = 50
+        mock_settings.pdf_min_caracteres_texto = 10
+        return [p["palabras"] for p in extraer_paginas_pdf(contenido)]
+
+
+class TestAgruparLineas:
+    """Tests para agrupar_lineas."""
+
+    def test_misma_altura_misma_linea(self):
+        palabras = [(300, 10, 320, 20, "B"), (10, 11, 30, 21, "A"), (10, 40, 30, 50, "C")]
+
+        lineas = agrupar_lineas(palabras)
+
+        assert [[p[4] for p in linea] for linea in lineas] == [["A", "B"], ["C"]]
+
+
+class TestExtraerEstructura:
+    """Tests para extraer_estructura."""
+
+    def test_factura_digital(self):
+        estructura = extraer_estructura(_palabras(_pdf(FACTURA)))
+
+        assert estructura["emisor"]["ruc"] == "20556519065"
+        assert estructura["emisor"]["razon_social"] == "COMERCIAL OMEGA SAC"
+        assert estructura["comprobante"]["tipo_comprobante"] == "factura"
+        assert estructura["comprobante"]["serie"] == "F001"
+        assert estructura["comprobante"]["numero"] == "123"
+        assert estructura["comprobante"]["fecha_emision"] == "2025-07-15"
+        assert estructura["comprobante"]["monto_total"] == 912.50
+        assert estructura["items"] == [
+            {"descripcion": "Servicio Contable", "cantidad": 1.0, "precio_unitario": 500.0, "monto_item": 500.0},
+            {"descripcion": "Asesoría Tributaria", "cantidad": 2.0, "precio_unitario": 200.0, "monto_item": 400.0},
+            {"descripcion": "GASEOSA 1.5 LIT", "cantidad": 1.0, "precio_unitario": 12.5, "monto_item": 12.5},
+        ]
+        assert estructura_confiable(estructura, 0.85)
+
+    def test_items_que_no_cuadran_no_son_confiables(self):
+        elementos = [e for e in FACTURA if e[2] != "IMPORTE TOTAL S/ 912.50"] + [(72, 270, "IMPORTE TOTAL S/ 999.00")]
+
+        estructura = extraer_estructura(_palabras(_pdf(elementos)))
+
+        assert estructura["confianza"]["items"] < 0.85
+        assert not estructura_confiable(estructura, 0.85)
+
+
+class TestParseadorSinLlm:
+    """Tests del atajo sin LLM en AgenteParseador."""
+
+    @patch('app.features.agents.agente_parseador.get_cache_ocr', return_value=None)
+    @patch('app.features.agents.agente_parseador.Agent')
+    def test_pdf_digital_confiable_no_llama_al_llm(self, mock_agent, mock_cache):
+        parseador = AgenteParseador(PipelineContext(usuario_id=1))
+
+        resultado = parseador.parsear_archivo(_pdf(FACTURA), "application/pdf", "factura.pdf")
+
+        mock_agent.return_value.run.assert_not_called()
+        assert parseador.contexto.get("fuente_parseo") == "pdf_estructurado"
+        assert resultado["comprobante"]["monto_total"] == 912.50
+        assert len(resultado["items"]) == 3
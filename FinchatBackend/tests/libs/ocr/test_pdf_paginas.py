@@ -0,0 +1,103 @@
+"""Tests de extracción de PDFs por página (paralela y con páginas escaneadas)."""
+
+import asyncio
+import threading
+
+import fitz
+import pytest
+from unittest.mock import patch
+
+from app.features.agents.agente_parseador import AgenteParseador
+from app.features.agents.pipeline_context import PipelineContext
+from app.libs.ocr import pdf_extractor
+from app.libs.ocr.pdf_extractor import extraer_paginas_pdf, extraer_paginas_pdf_async
+
+
+def _pdf(*paginas):
+    """Crea un PDF; None agrega una página escaneada (solo imagen, sin texto)."""
+    doc = fitz.open()
+    for texto in paginas:
+        page = doc.new_page()
+        if texto is None:
+            pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 20, 20), 0)
+            pix.clear_with(200)
+            page.insert_image(page.rect, pixmap=pix)
+        else:
+            page.insert_text((72, 72), texto)
+    contenido = doc.tobytes()
+    doc.close()
+    return contenido
+
+
+@pytest.fixture
+def settings_pdf():
+    with patch.object(pdf_extractor, "settings") as mock_settings:
+        mock_settings.pdf_paralelo_min_paginas = 100
+        mock_settings.pdf_procesos = 2
+        mock_settings.pdf_dpi_escaneo = 50
+        mock_settings.pdf_min_caracteres_texto = 10
+        yield mock_settings
+    pdf_extractor.detener_executor_pdf()
+
+
+class TestExtraerPaginasPdf:
+    """Tests para extraer_paginas_pdf."""
+
+    def test_detecta_paginas_escaneadas(self, settings_pdf):
+        paginas = extraer_paginas_pdf(_pdf("RUC 20556519065 TEAM SABOR", None))
+
+        assert paginas[0]["escaneada"] is False
+        assert paginas[0]["imagen"] is None
+        assert paginas[1]["escaneada"] is True
+        assert paginas[1]["imagen"].startswith(b"\x89PNG")
+
+    def test_paralelo_mantiene_orden(self, settings_pdf):
+        """Test que los rangos repartidos entre procesos vuelven en orden."""
+        settings_pdf.pdf_paralelo_min_paginas = 2
+        contenido = _pdf(*[f"PAGINA NUMERO {i}" for i in range(1, 6)])
+
+        sincrono = extraer_paginas_pdf(contenido)
+        asincrono = asyncio.run(extraer_paginas_pdf_async(contenido))
+
+        for paginas in (sincrono, asincrono):
+            assert [p["numero_pagina"] for p in paginas] == [1, 2, 3, 4, 5]
+            assert all(f"PAGINA NUMERO {p['numero_pagina']}" in p["texto"] for p in paginas)
+
+    def test_pdf_corto_async_fuera_del_loop(self, settings_pdf):
+        """Test que un PDF corto se extrae en el executor, no en el hilo del event loop."""
+        hilos = []
+        original = pdf_extractor._extraer_rango
+
+        def extraer_rango(*args):
+            hilos.append(threading.current_thread())
+            return original(*args)
+
+        with patch.object(pdf_extractor, "_extraer_rango", side_effect=extraer_rango):
+            paginas = asyncio.run(extraer_paginas_pdf_async(_pdf("RUC 20556519065 TEAM SABOR")))
+
+        assert paginas[0]["numero_pagina"] == 1
+        assert hilos and hilos[0] is not threading.main_thread()
+
+    def test_rangos(self):
+        assert pdf_extractor._rangos(5, 2) == [(0, 3), (3, 5)]
+        assert pdf_extractor._rangos(1, 4) == [(0, 1)]
+
+
+class TestParseadorPaginas:
+    """Tests del OCR por página en AgenteParseador."""
+
+    @patch('app.features.agents.agente_parseador.Agent')
+    @patch('app.features.agents.agente_parseador.extraer_texto_img')
+    def test_pagina_escaneada_pasa_por_ocr_de_imagen(self, mock_img, mock_agent, settings_pdf):
+        mock_img.return_value = {"texto": "TOTAL 50.00", "confianza_promedio": 0.8}
+        parseador = AgenteParseador(PipelineContext(usuario_id=1))
+
+        resultado = asyncio.run(
+            parseador._ejecutar_ocr_completo_async(_pdf("RUC 20556519065 TEAM SABOR", None), "application/pdf")
+        )
+
+        mock_img.assert_called_once()
+        assert [p["confianza_promedio"] for p in resultado["paginas"]] == [1.0, 0.8]
+        assert resultado["paginas"][1]["texto"] == "TOTAL 50.00"
+        assert resultado["confianza_promedio"] == pytest.approx(0.9)
+        assert "===PÁGINA===" in resultado["texto"]
@@ -0,0 +1,56 @@
+"""Tests unitarios para el pool de procesos de OCR."""
+
+import asyncio
+import os
+
+import pytest
+
+from app.libs.ocr.pool_ocr import OcrProcesoPool
+
+# las funciones del pool deben ser importables desde los procesos hijos (spawn)
+_CARGAS = []
+
+
+def _inicializador_falso():
+    _CARGAS.append(os.getpid())
+
+
+def _ocr_falso(contenido):
+    return {"texto": contenido.decode(), "confianza_promedio": float(len(_CARGAS)), "pid": os.getpid()}
+
+
+def _ocr_que_falla(contenido):
+    raise ValueError("imagen corrupta")
+
+
+class TestOcrProcesoPool:
+    """Tests para OcrProcesoPool."""
+
+    def test_procesa_en_otro_proceso_con_modelo_cargado_una_vez(self):
+        pool = OcrProcesoPool(procesos=2, inicializador=_inicializador_falso, funcion=_ocr_falso)
+
+        async def principal():
+            return await asyncio.gather(*(pool.reconocer(f"img{i}".encode()) for i in range(6)))
+
+        try:
+            pool.iniciar()
+            resultados = asyncio.run(principal())
+        finally:
+            pool.detener()
+
+        assert [r["texto"] for r in resultados] == [f"img{i}" for i in range(6)]
+        assert all(r["pid"] != os.getpid() for r in resultados)
+        # el initializer corre una sola vez por proceso
+        assert all(r["confianza_promedio"] == 1.0 for r in resultados)
+        assert pool.estadisticas()["tareas"] == 6
+
+    def test_error_se_propaga(self):
+        pool = OcrProcesoPool(procesos=1, inicializador=_inicializador_falso, funcion=_ocr_que_falla)
+
+        try:
+            with pytest.raises(ValueError, match="imagen corrupta"):
+                asyncio.run(pool.reconocer(b"x"))
+        finally:
+            pool.detener()
+
+        assert pool.errores == 1
@@ -0,0 +1,146 @@
+"""Tests unitarios para el pool persistente de navegador SUNAT."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from app.libs.sunat_scraper.browser_pool import SunatBrowserPool
+
+
+def _fake_browser():
+    """Navegador falso: cada new_context devuelve un contexto con una página."""
+    browser = Mock()
+    browser.is_connected.return_value = True
+    browser.close = AsyncMock()
+
+    async def new_context(**kwargs):
+        context = Mock()
+        context.close = AsyncMock()
+        page = Mock()
+        page.is_closed.return_value = False
+        page.context = context
+        context.new_page = AsyncMock(return_value=page)
+        return context
+
+    browser.new_context = AsyncMock(side_effect=new_context)
+    return browser
+
+
+@pytest.fixture
+def pool():
+    pool = SunatBrowserPool(tamano=2, max_usos=3, intervalo_salud_seg=3600, headless=True)
+    pool._playwright = Mock()
+    pool._playwright.chromium.launch = AsyncMock(side_effect=lambda **kw: _fake_browser())
+    return pool
+
+
+async def _iniciar(pool):
+    await pool._lanzar_navegador()
+    pool.activo = True
+
+
+class TestPrestamoPaginas:
+    """Tests para el préstamo y devolución de páginas."""
+
+    def test_reutiliza_paginas_calientes(self, pool):
+        """Test que dos consultas seguidas usan páginas del pool sin relanzar."""
+        async def escenario():
+            await _iniciar(pool)
+            async with pool.pagina() as p1:
+                pass
+            async with pool.pagina() as p2:
+                pass
+            return p1, p2
+
+        p1, p2 = asyncio.run(escenario())
+
+        assert pool._playwright.chromium.launch.call_count == 1
+        assert pool.salud()["paginas_libres"] == 2
+        assert p1 is not None and p2 is not None
+
+    def test_limite_de_concurrencia(self, pool):
+        """Test que no hay más consultas simultáneas que páginas."""
+        estado = {"activos": 0, "maximo": 0}
+
+        async def consulta():
+            async with pool.pagina():
+                estado["activos"] += 1
+                estado["maximo"] = max(estado["maximo"], estado["activos"])
+                await asyncio.sleep(0.01)
+                estado["activos"] -= 1
+
+        async def escenario():
+            await _iniciar(pool)
+            pool.max_usos = 100
+            await asyncio.gather(*(consulta() for _ in range(6)))
+
+        asyncio.run(escenario())
+
+        assert estado["maximo"] == 2
+
+    def test_reemplaza_pagina_con_error(self, pool):
+        """Test que una página que falló se reemplaza por una nueva."""
+        async def escenario():
+            await _iniciar(pool)
+            with pytest.raises(RuntimeError):
+                async with pool.pagina() as page:
+                    raise RuntimeError("crash")
+            return page
+
+        page = asyncio.run(escenario())
+
+        page.context.close.assert_awaited_once()
+        assert pool.salud()["paginas_libres"] == 2
+        assert pool.errores == 1
+
+    def test_no_reutiliza_pagina_cancelada(self, pool):
+        """Test que una página cuya consulta se canceló a mitad de camino se cierra."""
+        prestada = {}
+
+        async def consulta():
+            async with pool.pagina() as page:
+                prestada["page"] = page
+                await asyncio.sleep(10)
+
+        async def escenario():
+            await _iniciar(pool)
+            tarea = asyncio.create_task(consulta())
+            await asyncio.sleep(0.01)
+            tarea.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await tarea
+
+        asyncio.run(escenario())
+
+        prestada["page"].context.close.assert_awaited_once()
+        assert pool.salud()["paginas_libres"] == 2
+
+
+class TestReinicio:
+    """Tests para el reinicio automático del navegador."""
+
+    def test_reinicia_tras_max_usos(self, pool):
+        """Test que el navegador se relanza al alcanzar max_usos."""
+        async def escenario():
+            await _iniciar(pool)
+            for _ in range(4):
+                async with pool.pagina():
+                    pass
+
+        asyncio.run(escenario())
+
+        assert pool._playwright.chromium.launch.call_count == 2
+        assert pool.reinicios == 1
+
+    def test_reinicia_si_navegador_desconectado(self, pool):
+        """Test que verificar_salud relanza un navegador caído."""
+        async def escenario():
+            await _iniciar(pool)
+            pool._browser.is_connected.return_value = False
+            await pool.verificar_salud()
+
+        asyncio.run(escenario())
+
+        assert pool.reinicios == 1
+        assert pool.salud()["conectado"] is True
@@ -0,0 +1,82 @@
+"""Tests unitarios para SunatRucScraper."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from app.libs.sunat_scraper.ruc_scraper import (
+    ESTADO_ENCONTRADO,
+    ESTADO_NO_ENCONTRADO,
+    FASES,
+    SunatRucScraper,
+)
+
+TEXTO_SUNAT = """
+Número de RUC:
+10470799531 - TELLO MENDOZA HUMBELINA
+Nombre Comercial:
+-
+Estado del Contribuyente:
+ACTIVO
+Condición del Contribuyente:
+HABIDO
+Actividad(es) Económica(s):
+Principal - 5610 - ACTIVIDADES DE RESTAURANTES Y DE SERVICIO MÓVIL DE COMIDAS
+"""
+
+
+@pytest.fixture
+def mock_page():
+    page = Mock()
+    page.goto = AsyncMock()
+    page.wait_for_selector = AsyncMock()
+    page.fill = AsyncMock()
+    page.click = AsyncMock()
+    page.wait_for_timeout = AsyncMock()
+    page.inner_text = AsyncMock(return_value=TEXTO_SUNAT)
+
+    respuesta = Mock()
+    respuesta.first.wait_for = AsyncMock()
+    page.get_by_text.return_value.or_.return_value = respuesta
+    return page
+
+
+class TestConsultarEnPagina:
+    """Tests para la consulta sobre una página ya abierta."""
+
+    def test_espera_resultado_sin_sleep_fijo(self, mock_page):
+        """Test que se espera el panel de resultados en lugar de un sleep de 5s."""
+        scraper = SunatRucScraper()
+
+        estado, datos = asyncio.run(scraper._consultar_en_pagina(mock_page, "10470799531"))
+
+        assert estado == ESTADO_ENCONTRADO
+        mock_page.wait_for_timeout.assert_not_called()
+        respuesta = mock_page.get_by_text.return_value.or_.return_value
+        respuesta.first.wait_for.assert_awaited_once_with(
+            state="visible", timeout=scraper.timeout_resultado_ms
+        )
+        assert datos["razon_social"] == "TELLO MENDOZA HUMBELINA"
+        assert datos["estado_ruc"] == "ACTIVO"
+        assert datos["condicion_ruc"] == "HABIDO"
+        assert datos["ciiu"] == "5610"
+
+    def test_registra_tiempos_por_fase(self, mock_page):
+        """Test que se mide cada fase de la consulta."""
+        scraper = SunatRucScraper()
+
+        asyncio.run(scraper._consultar_en_pagina(mock_page, "10470799531"))
+
+        assert tuple(scraper.ultimos_tiempos) == FASES
+        assert all(ms >= 0 for ms in scraper.ultimos_tiempos.values())
+
+    def test_sin_resultados(self, mock_page):
+        """Test que el aviso de SUNAT sin resultados se reporta como no encontrado."""
+        mock_page.inner_text.return_value = "No se encontraron resultados para la búsqueda"
+        scraper = SunatRucScraper()
+
+        estado, datos = asyncio.run(scraper._consultar_en_pagina(mock_page, "99999999999"))
+
+        assert estado == ESTADO_NO_ENCONTRADO
+        assert datos is None
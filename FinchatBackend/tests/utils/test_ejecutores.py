@@ -0,0 +1,59 @@
+"""Tests para los executors del pipeline y el monitor del event loop."""
+
+import asyncio
+import time
+
+from app.features.agents.registro_agentes import estado_vinculado, vincular
+from app.utils.ejecutores import ejecutar_en, estadisticas_ejecutores
+from app.utils.monitor_loop import MonitorLoop
+
+
+class TestEjecutarEn:
+    """Tests para ejecutar_en."""
+
+    def test_no_bloquea_el_loop(self):
+        async def escenario():
+            latidos = 0
+
+            async def latir():
+                nonlocal latidos
+                while True:
+                    await asyncio.sleep(0.01)
+                    latidos += 1
+
+            tarea = asyncio.create_task(latir())
+            await ejecutar_en("llm", time.sleep, 0.2)
+            tarea.cancel()
+            return latidos
+
+        # con el loop bloqueado 200 ms no habría ningún latido
+        assert asyncio.run(escenario()) >= 5
+
+    def test_propaga_el_estado_vinculado(self):
+        async def escenario():
+            with vincular(usuario_id=7):
+                return await ejecutar_en("bd", estado_vinculado, "usuario_id")
+
+        assert asyncio.run(escenario()) == 7
+        assert estadisticas_ejecutores()["bd"]["pendientes"] == 0
+
+
+class TestMonitorLoop:
+    """Tests para MonitorLoop."""
+
+    def test_detecta_bloqueo(self):
+        monitor = MonitorLoop(intervalo=0.01, umbral=0.1)
+
+        async def escenario():
+            monitor.iniciar()
+            await asyncio.sleep(0.05)
+            time.sleep(0.2)  # bloqueo deliberado del loop
+            await asyncio.sleep(0.05)
+            await monitor.detener()
+
+        asyncio.run(escenario())
+
+        estadisticas = monitor.estadisticas()
+        assert estadisticas["bloqueos"] >= 1
+        assert estadisticas["retraso_max_ms"] >= 150
+        assert not estadisticas["activo"]
@@ -0,0 +1,131 @@
+"""Tests para la extracción por patrones en una sola pasada."""
+
+from app.utils.extraccion_patron import (
+    extraer_campos,
+    extraer_dni_cliente,
+    extraer_fecha,
+    extraer_items,
+    extraer_linea_importe_total,
+    extraer_moneda,
+    extraer_nombre_cliente,
+    extraer_serie_numero,
+    moneda_por_palabras,
+    nombre_antes_de_ruc,
+    tipo_por_palabras,
+)
+from app.utils.patrones import VERSION_PATRONES
+
+
+BOLETA = """TEAM SABOR SAC
+RUC:20556519065
+BOLETA DE VENTA ELECTRONICA
+B001 No. 0172923
+CAJERO: BALVIN 02/08/2025 16:00:39
+CLIENTE: ABEL ESPINOZA PARI
+DNI:75524035
+SUB TOTAL    S/ 61.00
+TOTAL A PAGAR   S/ 61.00
+SON: SESENTA Y UNO CON 00/100 SOLES"""
+
+FACTURA = """COMERCIAL OMEGA SAC RUC: 20556519065
+FACTURA ELECTRONICA F001-00000123
+Fecha de Emisión: 15/07/2025 vence 15/08/2025
+Señor(es)
+: INVERSIONES ALFA EIRL RUC: 20100070970
+Tipo de Moneda: SOLES
+Total 762.71
+IMPORTE TOTAL S/ 900.00"""
+
+
+class TestExtraerCampos:
+    """Tests para extraer_campos."""
+
+    def test_igual_que_funciones_por_separado(self):
+        for texto in (BOLETA, FACTURA):
+            campos = extraer_campos(texto)
+
+            assert campos.serie_numero == extraer_serie_numero(texto)
+            assert campos.fecha == extraer_fecha(texto)
+            assert campos.moneda == extraer_moneda(texto)
+            assert campos.nombre_cliente == extraer_nombre_cliente(texto)
+            assert campos.dni_cliente == extraer_dni_cliente(texto)
+            assert campos.linea_importe_total == extraer_linea_importe_total(texto)
+            assert campos.version == VERSION_PATRONES
+
+    def test_boleta(self):
+        campos = extraer_campos(BOLETA)
+
+        assert campos.serie_numero == "B001-172923"
+        assert campos.fecha == "02/08/2025"
+        assert not campos.fecha_etiquetada
+        assert campos.fechas == ("02/08/2025",)
+        assert campos.moneda == "SOLES"
+        assert campos.dni_cliente == "75524035"
+        assert campos.etiqueta_total == "Total a Pagar"
+
+    def test_factura_prefiere_etiqueta_especifica(self):
+        campos = extraer_campos(FACTURA)
+
+        assert campos.serie_numero == "F001-00000123"
+        assert campos.fecha == "15/07/2025"
+        assert campos.fecha_etiquetada
+        assert campos.fechas == ("15/07/2025", "15/08/2025")
+        assert campos.nombre_cliente == "INVERSIONES ALFA EIRL"
+        assert campos.linea_importe_total == "IMPORTE TOTAL S/ 900.00"
+        assert campos.etiqueta_total == "Importe Total"
+
+    def test_serie_con_marca_de_numero(self):
+        """Regresión: la marca "No."/"N°" no corta la serie ("B001 No. 0172923" daba "B-001")."""
+        for texto in ("B001 No. 0172923", "B001 NO. 0172923", "B001 Nº 172923", "B001 N° 172923"):
+            assert extraer_serie_numero(texto) == "B001-172923"
+            assert extraer_campos(texto).serie_numero == "B001-172923"
+
+    def test_texto_vacio(self):
+        campos = extraer_campos("")
+
+        assert campos.serie_numero is None
+        assert campos.fechas == ()
+        assert campos.linea_importe_total is None
+
+
+class TestPalabrasClave:
+    """Tests para las heurísticas compartidas con el extractor determinista y el de PDFs."""
+
+    def test_nombre_antes_de_ruc(self):
+        assert nombre_antes_de_ruc("COMERCIAL OMEGA SAC R.U.C.: 20556519065") == "COMERCIAL OMEGA SAC"
+        assert nombre_antes_de_ruc("RUC: 20556519065") == ""
+
+    def test_moneda_por_palabras(self):
+        assert moneda_por_palabras("SON: CIEN CON 00/100 DÓLARES") == "USD"
+        assert moneda_por_palabras(FACTURA) == "PEN"
+        assert moneda_por_palabras("TOTAL 100.00") is None
+
+    def test_tipo_por_palabras(self):
+        assert tipo_por_palabras(FACTURA) == "factura"
+        assert tipo_por_palabras("boleta de venta electrónica") == "boleta"
+        assert tipo_por_palabras("TICKET") is None
+
+
+class TestExtraerItems:
+    """Tests para la lectura de la tabla de ítems línea a línea."""
+
+    def test_lee_cantidad_precio_e_importe(self):
+        lineas = [
+            "TEAM SABOR SAC",
+            "DESCRIPCION CANT P.UNIT IMPORTE",
+            "------------------------------",
+            "MENU EJECUTIVO 2 15.00 30.00",
+            "GASEOSA 1.5 LIT 1 1,250.50",
+            "HELADA",
+            "OP. GRAVADA 1,053.81",
+        ]
+
+        items = extraer_items(lineas)
+
+        assert [i["monto_item"] for i in items] == [30.0, 1250.5]
+        assert items[0]["cantidad"] == 2.0
+        assert items[0]["precio_unitario"] == 15.0
+        assert items[1]["descripcion"] == "GASEOSA 1.5 LIT HELADA"
+
+    def test_sin_encabezado(self):
+        assert extraer_items(["MENU 15.00", "TOTAL 15.00"]) == []
@@ -0,0 +1,73 @@
+"""Tests para el parser JSON incremental."""
+
+import pytest
+
+from app.utils.json_incremental import COMPLETO, EN_OBJETO, INVALIDO, JsonIncremental
+
+
+def _alimentar(parser, texto, tamano=7):
+    for i in range(0, len(texto), tamano):
+        parser.alimentar(texto[i:i + tamano])
+        if parser.terminado:
+            break
+    return parser
+
+
+class TestJsonIncremental:
+    """Tests para JsonIncremental."""
+
+    def test_objeto_en_fragmentos_con_fences(self):
+        texto = '```json\n{"a": {"b": [1, {"c": "}]"}]}, "d": "x\\"y"}\n```'
+
+        parser = _alimentar(JsonIncremental(), texto)
+
+        assert parser.estado == COMPLETO
+        assert parser.resultado() == {"a": {"b": [1, {"c": "}]"}]}, "d": 'x"y'}
+
+    def test_completo_ignora_lo_que_sigue(self):
+        parser = JsonIncremental()
+
+        parser.alimentar('{"a": 1} y aquí sigue texto')
+
+        assert parser.estado == COMPLETO
+        assert parser.resultado() == {"a": 1}
+
+    def test_miembro_invalido_corta_antes_del_final(self):
+        def validar(clave, valor):
+            if clave == "total" and not isinstance(valor, (int, float)):
+                raise ValueError("no es número")
+
+        parser = JsonIncremental(validar_miembro=validar)
+
+        parser.alimentar('{"total": "mucho", "items": [')
+
+        assert parser.estado == INVALIDO
+        assert "total" in parser.motivo
+        with pytest.raises(ValueError):
+            parser.resultado()
+
+    def test_cierre_que_no_corresponde(self):
+        parser = JsonIncremental()
+
+        assert parser.alimentar('{"a": [1, 2}') == INVALIDO
+
+    def test_texto_sin_json(self):
+        parser = JsonIncremental()
+
+        parser.alimentar("Lo siento, no puedo procesar este comprobante. " * 10)
+
+        assert parser.estado == INVALIDO
+
+    def test_limite_de_caracteres(self):
+        parser = JsonIncremental(max_caracteres=50)
+
+        parser.alimentar('{"descripcion": "' + "A" * 100)
+
+        assert parser.estado == INVALIDO
+
+    def test_incompleto(self):
+        parser = JsonIncremental()
+
+        assert parser.alimentar('{"a": 1, "b": ') == EN_OBJETO
+        with pytest.raises(ValueError, match="incompleto"):
+            parser.resultado()
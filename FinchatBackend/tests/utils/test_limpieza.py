@@ -0,0 +1,27 @@
+"""Tests para los helpers de limpieza."""
+
+from app.utils.limpieza import candidatos_ruc, limpiar_ruc, ruc_valido
+
+
+class TestCandidatosRuc:
+    """Tests para candidatos_ruc."""
+
+    def test_etiquetado_primero_y_sin_invalidos(self):
+        texto = "TICKET 20100070970\nTEAM SABOR SAC RUC:20556519065\nOTRO 20556519066"
+
+        assert candidatos_ruc(texto) == ["20556519065", "20100070970"]
+
+    def test_excluye_ruc_del_cliente(self):
+        texto = "COMERCIAL OMEGA SAC RUC: 20556519065\nCliente: INVERSIONES ALFA RUC: 20100070970"
+
+        assert candidatos_ruc(texto) == ["20556519065"]
+
+    def test_respeta_maximo(self):
+        assert candidatos_ruc("RUC 20556519065 RUC 20100070970", maximo=1) == ["20556519065"]
+        assert candidatos_ruc("", maximo=2) == []
+
+    def test_coherente_con_limpiar_ruc(self):
+        texto = "RUC: 20556519065"
+
+        assert candidatos_ruc(texto) == [limpiar_ruc(texto)]
+        assert ruc_valido(limpiar_ruc(texto))